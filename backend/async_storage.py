@@ -0,0 +1,104 @@
+# backend/async_storage.py
+"""
+Async facade over backend.storage, used by the async routes in main.py.
+
+Each call runs the blocking storage function (sqlite3 / PyMySQL) on a
+dedicated thread pool of STORAGE_THREADS workers, so routes never block the
+event loop and do not hold one of FastAPI's ~40 shared threadpool slots
+while they wait on the database. Cached session_exists answers return
+without leaving the loop.
+
+Inside `async with unit_of_work():` every call runs in one pinned context, so
+the Aurora request-scoped session from storage.unit_of_work() is reused
+across thread hops. Calls inside one unit of work must be awaited one at a
+time (not gathered).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional
+
+from backend import storage
+
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS") or 32)
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=STORAGE_THREADS, thread_name_prefix="storage")
+_PINNED: contextvars.ContextVar[Optional[contextvars.Context]] = contextvars.ContextVar("storage_ctx", default=None)
+
+
+async def run(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the storage pool (inside the current unit of work, if any)."""
+    ctx = _PINNED.get()
+    if ctx is None:  # not `or`: a Context with no variables set is falsy
+        ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+@asynccontextmanager
+async def unit_of_work():
+    if _PINNED.get() is not None:
+        yield  # nested: join the outer unit of work
+        return
+    token = _PINNED.set(contextvars.copy_context())
+    cm = storage.unit_of_work()
+    try:
+        await run(cm.__enter__)
+        try:
+            yield
+        except BaseException as e:
+            if not await run(cm.__exit__, type(e), e, e.__traceback__):
+                raise
+        else:
+            await run(cm.__exit__, None, None, None)
+    finally:
+        _PINNED.reset(token)
+
+
+def shutdown() -> None:
+    _EXECUTOR.shutdown(wait=True)
+
+
+async def session_exists(session_id: str) -> bool:
+    cached = storage.session_cached(session_id)
+    if cached is not None:
+        return cached
+    return await run(storage.session_exists, session_id)
+
+
+def _wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await run(fn, *args, **kwargs)
+    return wrapper
+
+
+start_session = _wrap(storage.start_session)
+save_demographics = _wrap(storage.save_demographics)
+prolific_id_owner = _wrap(storage.prolific_id_owner)
+mark_recaptcha_result = _wrap(storage.mark_recaptcha_result)
+set_assignment = _wrap(storage.set_assignment)
+get_assignment = _wrap(storage.get_assignment)
+set_source_assignment = _wrap(storage.set_source_assignment)
+get_assignment_record = _wrap(storage.get_assignment_record)
+create_assignment = _wrap(storage.create_assignment)
+get_source_for = _wrap(storage.get_source_for)
+save_mcq_submission = _wrap(storage.save_mcq_submission)
+get_mcq_submission = _wrap(storage.get_mcq_submission)
+save_posttask_feedback = _wrap(storage.save_posttask_feedback)
+init_vocab = _wrap(storage.init_vocab)
+advance_vocab = _wrap(storage.advance_vocab)
+get_vocab_progress = _wrap(storage.get_vocab_progress)
+save_vocab_final = _wrap(storage.save_vocab_final)
+final_check = _wrap(storage.final_check)
+log_total_participation_time = _wrap(storage.log_total_participation_time)
+log_total_task_time = _wrap(storage.log_total_task_time)
+get_task_time = _wrap(storage.get_task_time)
+log_reading_comprehension_details = _wrap(storage.log_reading_comprehension_details)
+log_batch = _wrap(storage.log_batch)
@@ -0,0 +1,166 @@
+# backend/build_content.py
+"""
+Build step: validate the study content and write it as one indexed content pack.
+
+    python -m backend.build_content [-o backend/content.pack] [--prolific-ids ids.txt]
+
+Each build also keeps a copy as content-<version>.pack next to the output, so
+sessions pinned to an older version can still be served after a reload or restart.
+
+Pack layout:  MAGIC | u32 header length | header JSON | blob area
+The header maps every passage to (offset, length) slices of the blob area:
+its full record (passage + all question sets), the public passage body and one
+public question body per source, each body with its strong ETag. Workers
+memory-map the pack (see backend/content.py) and only decode what they touch.
+Prior participants' prolific IDs are stored normalized, sorted and NUL-padded to
+a fixed width, so a lookup is a binary search over the map, not a per-worker set.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+MAGIC = b"RQPACK1\n"
+HEADER_LEN = struct.Struct("<I")
+DEFAULT_PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content.pack")
+
+MIN_QUESTIONS = 6  # 5 RC + 1 attention check per (passage, source)
+SOURCES = ("baseline", "requesta")
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, same encoding FastAPI's JSONResponse uses."""
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _has_two_sources(qnode: Dict[str, Any]) -> bool:
+    q = qnode.get("questions") or {}
+    return all(isinstance(q.get(src), list) and len(q[src]) >= MIN_QUESTIONS for src in SOURCES)
+
+
+def build_pack(passages: Dict[str, Any], questions: Dict[str, Any], vocab: List[Dict[str, Any]],
+               prolific_ids: Iterable[str]) -> bytes:
+    """Serialize content into pack bytes. Public payloads go through the API schemas here, once."""
+    from backend.schemas import Passage, PublicQuestionsResponse
+
+    blobs: List[bytes] = []
+    size = 0
+
+    def add(data: bytes) -> List[int]:
+        nonlocal size
+        blobs.append(data)
+        size += len(data)
+        return [size - len(data), len(data)]
+
+    index: Dict[str, Any] = {}
+    for pid, p in passages.items():
+        qnode = questions.get(pid)
+        entry: Dict[str, Any] = {"uid": p.get("id") or pid, "has_questions": qnode is not None}
+        entry["record"] = add(dumps({"passage": p, "questions": (qnode or {}).get("questions") or {}}))
+        body = dumps(Passage(**p).model_dump())
+        entry["body"] = add(body) + [etag_for(body)]
+        entry["questions"] = {}
+        for src, qset in ((qnode or {}).get("questions") or {}).items():
+            if not isinstance(qset, list) or len(qset) < MIN_QUESTIONS:
+                continue
+            # Do NOT leak correct answers
+            mapped = [{"id": q["question_id"], "prompt": q["prompt"], "choices": q["choices"]} for q in qset]
+            body = dumps(PublicQuestionsResponse(passage_id=pid, questions=mapped).model_dump())
+            entry["questions"][src] = add(body) + [etag_for(body)]
+        index[pid] = entry
+
+    # passages with both sources when there are enough of them, else any passage with questions
+    preferred = [pid for pid in passages if pid in questions and _has_two_sources(questions[pid])]
+    fallback = [pid for pid in passages if pid in questions]
+
+    normalized = sorted({str(x).strip().lower().encode("utf-8") for x in prolific_ids if str(x).strip()})
+    width = max(map(len, normalized), default=0)
+    header = {
+        "passages": index,
+        "eligible": preferred if len(preferred) >= 3 else fallback,
+        "vocab": add(dumps(vocab)),
+        "prolific_ids": add(b"".join(x.ljust(width, b"\0") for x in normalized)) + [width],
+    }
+    blob_area = b"".join(blobs)
+    header["version"] = hashlib.sha256(blob_area).hexdigest()[:12]
+    head = dumps(header)
+    return MAGIC + HEADER_LEN.pack(len(head)) + head + blob_area
+
+
+def read_header(buf) -> Tuple[Dict[str, Any], int]:
+    """Parse a pack's header; returns (header, offset of the blob area)."""
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("not a content pack")
+    start = len(MAGIC) + HEADER_LEN.size
+    (hlen,) = HEADER_LEN.unpack_from(buf, len(MAGIC))
+    return json.loads(bytes(buf[start:start + hlen])), start + hlen
+
+
+def read_id_file(path: str) -> Iterator[str]:
+    """One prolific ID per line; blank lines and `#` comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def archive_path(path: str, version: str) -> str:
+    """Where a version is kept so sessions pinned to it survive later builds and restarts."""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{version}{ext or '.pack'}"
+
+
+def write_pack(path: str, data: bytes) -> None:
+    """Write atomically so a running worker never maps a half-written file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def main(argv: List[str] | None = None) -> int:
+    from backend.data import ID_EXISTING, PASSAGES, QUESTIONS, VOCAB
+    from backend.validators import validate_content
+
+    ap = argparse.ArgumentParser(description="Validate study content and write the content pack.")
+    ap.add_argument("-o", "--out", default=os.getenv("CONTENT_PACK") or DEFAULT_PACK_PATH)
+    ap.add_argument("--allow-errors", action="store_true",
+                    help="write the pack even if validation reports errors")
+    ap.add_argument("--prolific-ids", action="append", default=[], metavar="FILE",
+                    help="file of prior participants' prolific IDs, one per line (repeatable); "
+                         "added to ID_EXISTING")
+    args = ap.parse_args(argv)
+
+    report = validate_content(PASSAGES, QUESTIONS, VOCAB)
+    for w in report["warnings"]:
+        print("[content] warning:", w)
+    for e in report["errors"]:
+        print("[content] error:", e)
+    if report["errors"] and not args.allow_errors:
+        print(f"[content] {len(report['errors'])} error(s); pack not written")
+        return 1
+
+    prolific_ids = itertools.chain(ID_EXISTING, *(read_id_file(p) for p in args.prolific_ids))
+    data = build_pack(PASSAGES, QUESTIONS, VOCAB, prolific_ids)
+    version = read_header(data)[0]["version"]
+    # archive first: a watching worker that sees the new pack can already resolve its version later
+    write_pack(archive_path(args.out, version), data)
+    write_pack(args.out, data)
+    print(f"[content] wrote {args.out} version={version} ({len(data)} bytes, {len(PASSAGES)} passages)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# backend/config.py
+"""
+Lightweight config helpers: ENV > SSM Parameter Store > default.
+
+Every `/requesta/*` parameter is fetched in ONE get_parameters_by_path call
+(paginated, decrypted) the first time a value actually has to come from SSM,
+then served from memory. Nothing heavy is imported at module load; boto3 only
+when SSM is needed.
+
+Optional settings (env only):
+- SSM_ENABLED           0 = never call SSM: env and defaults only (local dev, tests)
+- SSM_PREFIX            parameter path to load (default /requesta/)
+- SSM_ENDPOINT_URL      point boto3 at a local stub instead of AWS
+- SSM_CACHE_FILE        also keep the parameters in this file for fast restarts;
+  SSM_CACHE_KEY         ...encrypted with this Fernet key (required; needs `cryptography`)
+  SSM_CACHE_TTL_S       ...and trusted for this long (default 900)
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+SSM_ENABLED = os.getenv("SSM_ENABLED", "1") != "0"
+SSM_PREFIX = os.getenv("SSM_PREFIX") or "/requesta/"
+SSM_CACHE_FILE = os.getenv("SSM_CACHE_FILE") or ""
+SSM_CACHE_TTL_S = int(os.getenv("SSM_CACHE_TTL_S") or 900)
+
+_LOCK = threading.Lock()
+_PARAMS: Optional[Dict[str, str]] = None
+
+
+def _ssm_client() -> Any:
+    if not SSM_ENABLED:
+        return None
+    try:
+        import boto3  # type: ignore
+    except Exception:
+        return None
+    region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-west-2"
+    return boto3.client("ssm", region_name=region, endpoint_url=os.getenv("SSM_ENDPOINT_URL") or None)
+
+
+def _fetch(client: Any, prefix: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    pages = client.get_paginator("get_parameters_by_path").paginate(
+        Path=prefix, Recursive=True, WithDecryption=True)
+    for page in pages:
+        for p in page.get("Parameters", []):
+            out[p["Name"]] = p["Value"]
+    return out
+
+
+# ── Encrypted file cache ─────────────────────────────────────────────────────
+def _fernet() -> Any:
+    key = os.getenv("SSM_CACHE_KEY")
+    if not (SSM_CACHE_FILE and key):
+        return None
+    try:
+        from cryptography.fernet import Fernet  # type: ignore
+        return Fernet(key.encode("utf-8"))
+    except Exception as e:
+        print("[config] SSM cache file disabled:", repr(e))
+        return None
+
+
+def _read_cache_file(prefix: str) -> Optional[Dict[str, str]]:
+    f = _fernet()
+    if f is None or not os.path.exists(SSM_CACHE_FILE):
+        return None
+    try:
+        with open(SSM_CACHE_FILE, "rb") as fh:
+            data = json.loads(f.decrypt(fh.read(), ttl=SSM_CACHE_TTL_S))  # ttl: token age, set at write
+    except Exception:
+        return None  # expired, other key, or corrupt: fetch again
+    return data["values"] if data.get("prefix") == prefix else None
+
+
+def _write_cache_file(prefix: str, values: Dict[str, str]) -> None:
+    f = _fernet()
+    if f is None:
+        return
+    tmp = f"{SSM_CACHE_FILE}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(f.encrypt(json.dumps({"prefix": prefix, "values": values}).encode("utf-8")))
+        os.replace(tmp, SSM_CACHE_FILE)
+    except Exception as e:
+        print("[config] could not write SSM cache file:", repr(e))
+
+
+# ── Loader ───────────────────────────────────────────────────────────────────
+def load_parameters(client: Any = None, prefix: str = SSM_PREFIX, refresh: bool = False) -> Dict[str, str]:
+    """All parameters under `prefix` by full name; {} if SSM is unavailable. Cached per process."""
+    global _PARAMS
+    if _PARAMS is not None and not refresh:
+        return _PARAMS
+    with _LOCK:
+        if _PARAMS is not None and not refresh:
+            return _PARAMS
+        values = None if refresh else _read_cache_file(prefix)
+        source = "cache file"
+        if values is None:
+            source = "SSM"
+            started = time.monotonic()
+            try:
+                client = client or _ssm_client()
+                values = _fetch(client, prefix) if client is not None else {}
+            except Exception as e:
+                print("[config] SSM load failed:", repr(e))
+                values = {}
+            else:
+                if values:
+                    _write_cache_file(prefix, values)
+            source += f" in {(time.monotonic() - started) * 1000:.0f}ms"
+        print(f"[config] {len(values)} parameter(s) under {prefix} from {source}")
+        _PARAMS = values
+        return values
+
+
+def _get_ssm_param(name: str, decrypt: bool = True) -> Optional[str]:
+    """One SSM parameter, from the batch loaded by load_parameters (always decrypted)."""
+    if name.startswith(SSM_PREFIX):
+        return load_parameters().get(name)
+    client = _ssm_client()  # outside the prefix: not batched
+    if client is None:
+        return None
+    try:
+        return client.get_parameter(Name=name, WithDecryption=decrypt)["Parameter"]["Value"]
+    except Exception:
+        return None
+
+
+def _get(env_key: str, default: Optional[str] = None, ssm_path: Optional[str] = None, secure: bool = False) -> Optional[str]:
+    """Resolve a config value from ENV > SSM > default."""
+    val = os.getenv(env_key)
+    if val:
+        return val
+    if ssm_path:
+        val = _get_ssm_param(ssm_path, decrypt=secure)
+        if val:
+            return val
+    return default
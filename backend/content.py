@@ -0,0 +1,314 @@
+# backend/content.py
+"""
+Read-only access to the study content, served from a content pack.
+
+The pack is built by `python -m backend.build_content` (which runs validate_content)
+and memory-mapped here, so every worker shares the same pages and only decodes the
+passages it touches. Public passage / question bodies are stored pre-serialized with
+strong ETags and are sliced straight out of the map; answer keys, attention-check ids
+and question rows are decoded per passage on first use. Public question payloads never
+include `correct_choice_id`.
+
+Without a pack file the same pack is built in memory from backend/data.py.
+Packs are versioned by content hash; see the registry section below for reloads.
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from backend.build_content import DEFAULT_PACK_PATH, archive_path, dumps, read_header  # noqa: F401  (dumps is re-exported)
+
+CONTENT_PACK = os.getenv("CONTENT_PACK") or DEFAULT_PACK_PATH
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+def is_attention_check(question_id: str) -> bool:
+    return str(question_id).upper().startswith("QX")
+
+
+class ContentPack:
+    """One immutable content version over a pack buffer (mmap or bytes)."""
+
+    def __init__(self, buf, source: str):
+        try:
+            header, self._base = read_header(buf)
+        except ValueError as e:
+            raise ValueError(f"{source}: {e}") from None
+        self._buf = buf
+        self._passages: Dict[str, Dict[str, Any]] = header["passages"]
+        self._vocab_at = header["vocab"]
+        self._prolific_at = header["prolific_ids"]
+        self._lock = threading.Lock()
+        self._records: Dict[str, Tuple[Dict[str, Any], Dict, Dict, Dict]] = {}
+        self._vocab: Optional[List[Dict[str, Any]]] = None
+        self._vocab_deck: Optional[Tuple[Dict[str, str], ...]] = None
+        self._vocab_key: Optional[Mapping[str, bool]] = None
+        self._prolific: Optional[FrozenSet[str]] = None
+        self.version: str = header["version"]
+        self.source = source
+        # assignment pool, in PASSAGES order so seeded shuffles stay reproducible
+        self.eligible_passages: Tuple[str, ...] = tuple(header["eligible"])
+
+    @classmethod
+    def open(cls, path: str) -> "ContentPack":
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, path)
+
+    def _slice(self, at: List[Any]) -> bytes:
+        off, n = at[0], at[1]
+        return self._buf[self._base + off:self._base + off + n]
+
+    def _record(self, passage_id: str):
+        """Decode one passage's record and index its question sets; cached per passage."""
+        rec = self._records.get(passage_id)
+        if rec is not None:
+            return rec
+        entry = self._passages.get(passage_id)
+        if entry is None:
+            return None
+        raw = json.loads(self._slice(entry["record"]))
+        rows: Dict[str, Mapping[str, Dict[str, Any]]] = {}
+        keys: Dict[str, Mapping[str, str]] = {}
+        checks: Dict[str, FrozenSet[str]] = {}
+        for src, qset in raw["questions"].items():
+            if not isinstance(qset, list):
+                continue
+            rows[src] = MappingProxyType({q["question_id"]: q for q in qset})
+            keys[src] = MappingProxyType({q["question_id"]: q["correct_choice_id"] for q in qset})
+            checks[src] = frozenset(q["question_id"] for q in qset if is_attention_check(q["question_id"]))
+        rec = (raw["passage"], rows, keys, checks)
+        with self._lock:
+            return self._records.setdefault(passage_id, rec)
+
+    # ── Passages ────────────────────────────────────────────────────────────
+    def has_questions(self, passage_id: str) -> bool:
+        return bool((self._passages.get(passage_id) or {}).get("has_questions"))
+
+    def passage(self, passage_id: str) -> Optional[Dict[str, Any]]:
+        rec = self._record(passage_id)
+        return rec[0] if rec else None
+
+    def passage_uid(self, passage_id: str) -> Optional[str]:
+        return (self._passages.get(passage_id) or {}).get("uid")
+
+    def passage_body(self, passage_id: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._passages.get(passage_id)
+        if entry is None:
+            return None
+        return self._slice(entry["body"]), entry["body"][2]
+
+    # ── Questions ───────────────────────────────────────────────────────────
+    def public_questions_body(self, passage_id: str, source: str) -> Optional[Tuple[bytes, str]]:
+        at = ((self._passages.get(passage_id) or {}).get("questions") or {}).get(source)
+        if at is None:
+            return None
+        return self._slice(at), at[2]
+
+    def question_rows(self, passage_id: str, source: str) -> Mapping[str, Dict[str, Any]]:
+        rec = self._record(passage_id)
+        return rec[1].get(source, _EMPTY) if rec else _EMPTY
+
+    def answer_key(self, passage_id: str, source: str) -> Mapping[str, str]:
+        rec = self._record(passage_id)
+        return rec[2].get(source, _EMPTY) if rec else _EMPTY
+
+    def attention_check_ids(self, passage_id: str, source: str) -> FrozenSet[str]:
+        rec = self._record(passage_id)
+        return rec[3].get(source, frozenset()) if rec else frozenset()
+
+    # ── Vocab / returning participants ──────────────────────────────────────
+    def vocab(self) -> List[Dict[str, Any]]:
+        if self._vocab is None:
+            self._vocab = json.loads(self._slice(self._vocab_at))
+        return self._vocab
+
+    def vocab_deck(self) -> Tuple[Dict[str, str], ...]:
+        """Public deck ({id, token} per item, in VOCAB order); never includes is_word."""
+        if self._vocab_deck is None:
+            self._index_vocab()
+        return self._vocab_deck
+
+    def vocab_key(self) -> Mapping[str, bool]:
+        """item id -> is_word, for scoring batched answers."""
+        if self._vocab_key is None:
+            self._index_vocab()
+        return self._vocab_key
+
+    def _index_vocab(self) -> None:
+        deck, key = [], {}
+        for i, it in enumerate(self.vocab()):
+            iid = it.get("id") or f"v{i}"  # same fallback /api/vocab/next uses
+            deck.append({"id": iid, "token": it["token"]})
+            key[iid] = bool(it.get("is_word"))
+        with self._lock:
+            self._vocab_deck, self._vocab_key = tuple(deck), MappingProxyType(key)
+
+    def has_prolific_id(self, prolific_id: str) -> bool:
+        """Binary search of the sorted fixed-width ID records; `prolific_id` must be normalized."""
+        if len(self._prolific_at) < 3:  # pack built before fixed-width records
+            if self._prolific is None:
+                raw = self._slice(self._prolific_at).decode("utf-8")
+                self._prolific = frozenset(raw.split("\n")) if raw else frozenset()
+            return prolific_id in self._prolific
+        off, n, width = self._prolific_at
+        key = prolific_id.encode("utf-8")
+        if not key or len(key) > width:
+            return False
+        key = key.ljust(width, b"\0")
+        start = self._base + off
+        lo, hi = 0, n // width
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = start + mid * width
+            rec = self._buf[at:at + width]
+            if rec == key:
+                return True
+            if rec < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+
+# ── Registry: versions, atomic swap, background reload ──────────────────────
+# New requests use the current version; a session keeps the version it was
+# randomized under (stored with its assignment), so a reload never changes the
+# passages, answer keys or vocab list under a participant mid-study.
+
+CONTENT_RELOAD_S = float(os.getenv("CONTENT_RELOAD_S") or 0)  # 0 = no file watcher
+# packs kept open; the least recently used ones beyond this are dropped and reopen from their archive
+CONTENT_MAX_VERSIONS = max(2, int(os.getenv("CONTENT_MAX_VERSIONS") or 4))
+
+_REGISTRY_LOCK = threading.Lock()
+_VERSIONS: "OrderedDict[str, ContentPack]" = OrderedDict()
+_CURRENT: Optional[ContentPack] = None  # set by _load() below
+
+
+def _check(pack: ContentPack) -> None:
+    """Refuse a pack the API could not serve a fresh session from."""
+    if len(pack.eligible_passages) < 3:
+        raise ValueError(f"{pack.source}: only {len(pack.eligible_passages)} eligible passages")
+    for pid in pack.eligible_passages:
+        if pack.passage_body(pid) is None or not pack.has_questions(pid):
+            raise ValueError(f"{pack.source}: eligible passage {pid} has no content")
+
+
+def _register(pack: ContentPack) -> ContentPack:
+    with _REGISTRY_LOCK:
+        pack = _VERSIONS.setdefault(pack.version, pack)
+        _VERSIONS.move_to_end(pack.version)
+        for version in list(_VERSIONS):
+            if len(_VERSIONS) <= CONTENT_MAX_VERSIONS:
+                break
+            # never the current pack, nor one without an archive to reopen it from
+            if _VERSIONS[version] is _CURRENT or not os.path.exists(archive_path(CONTENT_PACK, version)):
+                continue
+            del _VERSIONS[version]  # requests still holding it keep their reference
+            print(f"[content] dropped version {version} from memory")
+        return pack
+
+
+def _load() -> ContentPack:
+    if os.path.exists(CONTENT_PACK):
+        pack = ContentPack.open(CONTENT_PACK)
+    else:
+        from backend.build_content import build_pack
+        from backend.data import ID_EXISTING, PASSAGES, QUESTIONS, VOCAB
+        print(f"[content] no pack at {CONTENT_PACK}; building from backend/data.py "
+              "(run `python -m backend.build_content` to precompile)")
+        pack = ContentPack(build_pack(PASSAGES, QUESTIONS, VOCAB, ID_EXISTING), "backend/data.py")
+    print(f"[content] version={pack.version} source={pack.source}")
+    return _register(pack)
+
+
+_CURRENT = _load()
+
+
+def current() -> ContentPack:
+    return _CURRENT
+
+
+def get(version: Optional[str]) -> ContentPack:
+    """Content for a pinned version; the current one if unknown or unpinned."""
+    if not version:
+        return _CURRENT
+    with _REGISTRY_LOCK:
+        pack = _VERSIONS.get(version)
+        if pack is not None:
+            _VERSIONS.move_to_end(version)
+            return pack
+    # pinned before a restart: the build step keeps every version as content-<version>.pack
+    path = archive_path(CONTENT_PACK, version)
+    if os.path.exists(path):
+        try:
+            return _register(ContentPack.open(path))
+        except Exception as e:
+            print(f"[content] could not open {path}: {e!r}")
+    print(f"[content] version {version} unavailable; serving {_CURRENT.version}")
+    return _CURRENT
+
+
+def reload(path: Optional[str] = None) -> ContentPack:
+    """Open and check a pack, then make it current. Raises (and keeps the old one) if it is bad."""
+    global _CURRENT
+    pack = ContentPack.open(path or CONTENT_PACK)
+    _check(pack)
+    pack = _register(pack)
+    if pack is not _CURRENT:
+        print(f"[content] switched {_CURRENT.version} -> {pack.version}")
+        _CURRENT = pack  # single reference swap: requests see the old or the new pack, never a mix
+    return pack
+
+
+_WATCH_STOP = threading.Event()
+_WATCH_THREAD: Optional[threading.Thread] = None
+
+
+def _watch(interval_s: float) -> None:
+    def sig():
+        try:
+            st = os.stat(CONTENT_PACK)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+    last = sig()
+    while not _WATCH_STOP.wait(interval_s):
+        now = sig()
+        if now is None or now == last:
+            continue
+        last = now
+        try:
+            reload()
+        except Exception as e:
+            print(f"[content] reload failed, keeping {_CURRENT.version}: {e!r}")
+
+
+def start_watcher(interval_s: float = CONTENT_RELOAD_S) -> None:
+    """Poll CONTENT_PACK and hot-swap when the build step replaces it."""
+    global _WATCH_THREAD
+    if interval_s <= 0 or _WATCH_THREAD is not None:
+        return
+    _WATCH_STOP.clear()
+    _WATCH_THREAD = threading.Thread(target=_watch, args=(interval_s,), name="content-watch", daemon=True)
+    _WATCH_THREAD.start()
+
+
+def stop_watcher() -> None:
+    global _WATCH_THREAD
+    _WATCH_STOP.set()
+    if _WATCH_THREAD is not None:
+        _WATCH_THREAD.join(timeout=5)
+        _WATCH_THREAD = None
+
+
+def is_returning_prolific(prolific_id: str | None) -> bool:
+    """Case-insensitive membership in the current pack's prolific IDs; False for empty input."""
+    pid = str(prolific_id or "").strip().lower()
+    return pid != "" and _CURRENT.has_prolific_id(pid)
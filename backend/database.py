@@ -1,45 +1,24 @@
 # backend/database.py
+"""
+SQLAlchemy engine / sessions for the Aurora backend.
+
+Nothing is resolved or connected at import: the URL is built (env / SSM) and
+the engine created on the first get_engine() / SessionLocal() call, which only
+the Aurora storage backend makes.
+"""
 from __future__ import annotations
 
 import os
-from functools import lru_cache
+import threading
 from typing import Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import UniqueConstraint, create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 
+from backend.config import _get, _get_ssm_param  # noqa: F401  (re-exported for older imports)
 from backend.models import Base
 
-try:
-    import boto3  # type: ignore
-except Exception:
-    boto3 = None
-
-
-@lru_cache()
-def _get_ssm_param(name: str, decrypt: bool = True) -> Optional[str]:
-    """Fetch a secure parameter from AWS Systems Manager Parameter Store."""
-    if boto3 is None:
-        return None
-    region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-west-2"
-    try:
-        ssm = boto3.client("ssm", region_name=region)
-        return ssm.get_parameter(Name=name, WithDecryption=decrypt)["Parameter"]["Value"]
-    except Exception:
-        return None
-
-
-def _get(env_key: str, default: Optional[str] = None, ssm_path: Optional[str] = None, secure: bool = False) -> Optional[str]:
-    """Resolve a config value from ENV > SSM > default."""
-    val = os.getenv(env_key)
-    if val:
-        return val
-    if ssm_path:
-        val = _get_ssm_param(ssm_path, decrypt=secure)
-        if val:
-            return val
-    return default
-
 
 def build_aurora_database_url() -> str:
     """
@@ -70,12 +49,91 @@ def build_aurora_database_url() -> str:
     return f"mysql+{driver}://{user}:{password}@{host}:{port}/{name}"
 
 
-# Create engine + sessionmaker for Aurora usage
-AURORA_DB_URL = build_aurora_database_url()
-engine = create_engine(AURORA_DB_URL, pool_pre_ping=True, pool_recycle=300)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_ENGINE_LOCK = threading.Lock()
+_ENGINE: Optional[Engine] = None
+_SESSIONMAKER: Optional[sessionmaker] = None
+
+
+def get_engine() -> Engine:
+    """Create the engine + sessionmaker for Aurora usage on first call."""
+    global _ENGINE, _SESSIONMAKER
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                engine = create_engine(build_aurora_database_url(), pool_pre_ping=True, pool_recycle=300)
+                _SESSIONMAKER = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _ENGINE = engine
+    return _ENGINE
+
+
+def SessionLocal() -> Session:
+    get_engine()
+    return _SESSIONMAKER()
+
+
+def __getattr__(name: str):
+    # `engine` / `AURORA_DB_URL` used to be module globals built at import
+    if name == "engine":
+        return get_engine()
+    if name == "AURORA_DB_URL":
+        return get_engine().url.render_as_string(hide_password=False)
+    raise AttributeError(name)
 
 
 def init_db() -> None:
-    """Create tables if they do not exist."""
-    Base.metadata.create_all(bind=engine)
+    """Create tables if they do not exist, and add new nullable columns / unique keys to existing ones."""
+    Base.metadata.create_all(bind=get_engine())
+    _add_missing_columns()
+    _add_missing_unique_keys()
+
+
+def _add_missing_columns() -> None:
+    # create_all never alters an existing table; columns added to the models later
+    # (all nullable) are added here so old databases keep working without a migration.
+    engine = get_engine()
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have or not col.nullable or col.primary_key:
+                    continue
+                ddl = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {ddl}"))
+                print(f"[db] added column {table.name}.{col.name}")
+
+
+def _add_missing_unique_keys() -> None:
+    # Upserts rely on these keys: without one, ON DUPLICATE KEY UPDATE never fires and
+    # every merge inserts another row. Tables created before a key was added to the
+    # model get it here; older duplicates are collapsed to the newest row (highest id)
+    # first, which for rc_events is the latest merged state of the segment.
+    engine = get_engine()
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        wanted = [c for c in table.constraints if isinstance(c, UniqueConstraint) and c.name]
+        if not wanted:
+            continue
+        have = {tuple(sorted(u["column_names"])) for u in insp.get_unique_constraints(table.name)}
+        have |= {tuple(sorted(ix["column_names"])) for ix in insp.get_indexes(table.name) if ix.get("unique")}
+        for uc in wanted:
+            cols = [c.name for c in uc.columns]
+            if tuple(sorted(cols)) in have:
+                continue
+            col_list = ", ".join(cols)
+            with engine.begin() as conn:
+                if "id" in table.c and table.c.id.primary_key:
+                    removed = conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE id NOT IN ("
+                        f"SELECT id FROM (SELECT MAX(id) AS id FROM {table.name} GROUP BY {col_list}) AS keep)"
+                    )).rowcount
+                    if removed:
+                        print(f"[db] removed {removed} duplicate row(s) from {table.name} before adding {uc.name}")
+                try:
+                    conn.execute(text(f"CREATE UNIQUE INDEX {uc.name} ON {table.name} ({col_list})"))
+                except Exception as e:
+                    raise RuntimeError(
+                        f"{table.name} is missing unique key {uc.name} ({col_list}) and it could not be "
+                        f"added: {e}. Remove the duplicate rows and restart."
+                    ) from e
+            print(f"[db] added unique key {table.name}.{uc.name}")
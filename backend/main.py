@@ -1,15 +1,17 @@
 # backend/main.py
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Body, Query, Request
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from contextlib import asynccontextmanager
+import asyncio
 import hashlib
 import random
 import os
-import httpx
 from pathlib import Path
-from backend.database import _get, _get_ssm_param
 
 
 from backend.schemas import (
@@ -22,38 +24,43 @@ from backend.schemas import (
     SubmitMCQPayload,
     MCQSubmitResult,
     PostTaskFeedbackPayload,
+    VocabStartResponse,
     VocabNextResponse,
     VocabItem,
     VocabAnswerPayload,
     VocabSubmitPayload,
     AttentionLogPayload,
     RCEventPayload,
+    TelemetryBatchPayload,
     ParticipationEndRequest,
 )
 from backend.security import new_session_id
-from backend.data import PASSAGES, QUESTIONS, VOCAB
 from backend import storage
-from .security import new_session_id
-from .data import PASSAGES, QUESTIONS, VOCAB
-from .data import is_returning_prolific
+from .security import new_session_id, issue_session_token, verify_session_token
 from . import storage
+from . import async_storage
+from . import content
+from . import recaptcha
 load_dotenv()
 
 
 APP_VERSION = "0.3.0"
-# reCAPTCHA
-RECAPTCHA_SECRET = os.getenv("RECAPTCHA_SECRET") or _get("RECAPTCHA_SECRET", ssm_path="/requesta/RECAPTCHA_SECRET", secure=True) or ""
-RECAPTCHA_MODE = os.getenv("RECAPTCHA_MODE") or (_get("RECAPTCHA_MODE", default="auto", ssm_path="/requesta/RECAPTCHA_MODE") or "auto").strip().lower()
-DEV_BYPASS_RECAPTCHA = os.getenv("DEV_BYPASS_RECAPTCHA") or (_get("DEV_BYPASS_RECAPTCHA", default="0", ssm_path="/requesta/DEV_BYPASS_RECAPTCHA") or "0").strip() == "1"
 
+# deck mode: present the vocabulary deck in a per-session (seeded) order instead of VOCAB order
+VOCAB_SHUFFLE = os.getenv("VOCAB_SHUFFLE", "0") == "1"
 
-print(
-    "[recaptcha cfg] mode=", RECAPTCHA_MODE,
-    "secret_set=", bool(RECAPTCHA_SECRET),
-    "dev_bypass=", DEV_BYPASS_RECAPTCHA
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    content.start_watcher()  # no-op unless CONTENT_RELOAD_S > 0
+    await recaptcha.startup()
+    yield
+    await recaptcha.shutdown()
+    content.stop_watcher()
+    # drain any queued storage writes before the worker exits
+    async_storage.shutdown()
+    storage.shutdown()
 
-app = FastAPI(title="Study Data Collection API", version=APP_VERSION)
+app = FastAPI(title="Study Data Collection API", version=APP_VERSION, lifespan=lifespan)
 
 # --- CORS ---
 # app.add_middleware(
@@ -72,77 +79,52 @@ app = FastAPI(title="Study Data Collection API", version=APP_VERSION)
 # Utilities
 # ──────────────────────────────────────────────────────────────────────────────
 
-def _recaptcha_required() -> bool:
-    if RECAPTCHA_MODE in ("disabled", "off", "false", "0"):
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 specifies for this header)."""
+    if not if_none_match:
         return False
-    if RECAPTCHA_MODE in ("required", "on", "true", "1"):
-        return True
-    # auto
-    return bool(RECAPTCHA_SECRET)
-
-async def verify_recaptcha_v2(token: str, remote_ip: str | None = None) -> bool:
-    if DEV_BYPASS_RECAPTCHA:
-        print("[reCAPTCHA] bypass (dev)")
-        return True
-    if not _recaptcha_required():
-        print("[reCAPTCHA] not required (mode/secret disabled)")
+    if if_none_match.strip() == "*":
         return True
-    if not RECAPTCHA_SECRET or not token:
-        print("[reCAPTCHA] skipped: missing secret or token")
-        return False
-
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            r = await client.post(
-                "https://www.google.com/recaptcha/api/siteverify",
-                data={
-                    "secret": RECAPTCHA_SECRET,
-                    "response": token,
-                    **({"remoteip": remote_ip} if remote_ip else {}),
-                },
-            )
-        data = r.json()
-        ok = bool(data.get("success"))
-        # Mask token for safety; log code paths clearly
-        print("[reCAPTCHA] verify result:", "OK" if ok else "FAIL", 
-              "hostname=", data.get("hostname"), 
-              "errors=", data.get("error-codes"))
-        return ok
-    except Exception as e:
-        print("[reCAPTCHA] verify exception:", repr(e))
-        return False
-
-
-
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+def _cached_json(request: Request, cached: tuple) -> Response:
+    """Serve pre-serialized JSON bytes with a strong ETag; 304 when the client already has them."""
+    body, etag = cached
+    # session-gated content: browsers may keep it but must revalidate every time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _content_for(session_id: str) -> content.ContentPack:
+    """Content version the session was assigned under (the current one before /api/randomize)."""
+    return (await _assignment_for(session_id))[1]
+
+async def _assignment_for(session_id: str) -> Tuple[Dict[str, Any], content.ContentPack]:
+    """Assignment record ({} before /api/randomize) and the content pack it was made under, in one read."""
+    record = await async_storage.get_assignment_record(session_id) or {}
+    return record, content.get(record.get("content_version"))
+
+def _session_claims(request: Request, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Claims of a valid X-Session-Token for this session, or None (then the route
+    checks storage as before). Claims with "p" also carry the assignment:
+    passage ids, source map ("s") and content version ("v").
+    """
+    claims = verify_session_token(request.headers.get("x-session-token"))
+    return claims if claims is not None and claims.get("sid") == session_id else None
 
 def _sha_seed(text: str) -> int:
     """Stable seed from an arbitrary string (session_id)."""
     return int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16) % (2**31)
 
-def _has_two_sources(pkey: str) -> bool:
-    """True if passage has both 'baseline' and 'requesta' with >= 6 questions each."""
-    try:
-        q = QUESTIONS[pkey]["questions"]
-        return (
-            "baseline" in q
-            and "requesta" in q
-            and isinstance(q["baseline"], list)
-            and isinstance(q["requesta"], list)
-            and len(q["baseline"]) >= 6
-            and len(q["requesta"]) >= 6
-        )
-    except Exception:
-        return False
-
-def _random_three_passages(seed: Optional[int] = None) -> List[str]:
+def _random_three_passages(seed: Optional[int] = None, pack: Optional[content.ContentPack] = None) -> List[str]:
     """
     Deterministically pick 3 distinct passage KEYS (e.g., 'p1', 'p2', ...)
     that exist in PASSAGES and QUESTIONS, preferring those that have both sources.
     """
     rng = random.Random(seed)
-    preferred = [pid for pid in PASSAGES.keys() if pid in QUESTIONS and _has_two_sources(pid)]
-    fallback  = [pid for pid in PASSAGES.keys() if pid in QUESTIONS]
-    pool = preferred if len(preferred) >= 3 else fallback
+    pool = list((pack or content.current()).eligible_passages)  # precomputed by the content build
     if len(pool) < 3:
         raise HTTPException(status_code=500, detail="Not enough passages available.")
     rng.shuffle(pool)
@@ -221,30 +203,51 @@ def normalize_demographics_v2(data: Dict[str, Any]) -> Dict[str, Any]:
 def health():
     return {"ok": True, "version": APP_VERSION}
 
+@app.get("/api/metrics")
+def metrics():
+    """Process-local storage counters (session cache hits/misses, write queues) and content version."""
+    return {"version": APP_VERSION, "content_version": content.current().version,
+            "storage": storage.stats(), "recaptcha": recaptcha.stats()}
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Session & Consent
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.post("/api/session/start", response_model=SessionStartResponse)
-def session_start(req: SessionStartRequest):
+async def session_start(req: SessionStartRequest):
     if not req.consent:
         raise HTTPException(status_code=400, detail="Consent required.")
     sid = new_session_id()
-    storage.start_session(sid, source=req.source)
-    return SessionStartResponse(session_id=sid)
+    await async_storage.start_session(sid, source=req.source)
+    return SessionStartResponse(session_id=sid, token=issue_session_token(sid))
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Returning participant check
 # ──────────────────────────────────────────────────────────────────────────────
 
+async def _is_returning(prolific_id: str, session_id: Optional[str] = None) -> bool:
+    """
+    Known from an earlier study (content pack) or already submitted by another
+    session (storage index). The session that first submitted an ID may resubmit it.
+    """
+    if content.is_returning_prolific(prolific_id):
+        return True
+    if not (prolific_id or "").strip():
+        return False
+    owner = await async_storage.prolific_id_owner(prolific_id)
+    return owner is not None and owner != session_id
+
 @app.get("/api/check_prolific")
-def check_prolific(prolific_id: str = Query(..., description="Prolific participant ID to check")):
+async def check_prolific(
+    prolific_id: str = Query(..., description="Prolific participant ID to check"),
+    session_id: Optional[str] = Query(None, description="Caller's session; its own earlier submission does not count"),
+):
     """
     Return whether the given prolific_id is already known (returning participant).
     Response: {"returning": true|false}
     """
     try:
-        returning = bool(is_returning_prolific(prolific_id))
+        returning = await _is_returning(prolific_id, session_id)
         return {"returning": returning}
     except Exception as e:
         print("[check_prolific] error:", repr(e))
@@ -255,29 +258,8 @@ def check_prolific(prolific_id: str = Query(..., description="Prolific participa
 # Demographics (JSON blob; future-proof)
 # ──────────────────────────────────────────────────────────────────────────────
 
-@app.post("/api/demographics")
-async def submit_demographics(
-    request: Request,
-    payload: Dict[str, Any] = Body(...),
-    session_id: str = "",
-):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-
-    token = (payload.get("recaptcha_token") or "").strip()
-    remote_ip = request.client.host if request.client else None
-    ok = await verify_recaptcha_v2(token, remote_ip)
-    storage.mark_recaptcha_result(session_id, "demographics", ok)
-    if not ok:
-        raise HTTPException(status_code=400, detail="reCAPTCHA failed")
-    
-    # --- Duplicate Prolific ID check (server-side enforcement) ---
-    prolific_id_raw = (payload.get("prolific_id") or "").strip()
-    if is_returning_prolific(prolific_id_raw):
-        # Reject duplicate submissions (client will show a user-facing modal)
-        # 409 Conflict indicates the ID is already present
-        raise HTTPException(status_code=409, detail="duplicate_prolific")
-
+def _demographics_record(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalized, typed demographics plus every unknown key in `extras`."""
     # 1) Normalize (keeps everything in a plain dict)
     normalized = normalize_demographics_v2(payload)
 
@@ -293,244 +275,412 @@ async def submit_demographics(
 
     extras = {k: v for k, v in normalized.items() if k not in base_fields}
     model_dict["extras"] = {**(model_dict.get("extras") or {}), **extras}
+    return model_dict
+
+@app.post("/api/demographics")
+async def submit_demographics(
+    request: Request,
+    payload: Dict[str, Any] = Body(...),
+    session_id: str = "",
+):
+    token = (payload.get("recaptcha_token") or "").strip()
+    remote_ip = request.client.host if request.client else None
+    prolific_id_raw = (payload.get("prolific_id") or "").strip()
+
+    # session lookup, reCAPTCHA and the duplicate-ID lookup run concurrently
+    # (storage calls on the storage pool); normalization runs while they are in flight
+    checks = asyncio.gather(
+        async_storage.session_exists(session_id),
+        recaptcha.verify(token, remote_ip, session_id, "demographics"),
+        _is_returning(prolific_id_raw, session_id),
+    )
+    # a malformed payload is reported after the session / reCAPTCHA / duplicate checks,
+    # in the order they always ran
+    invalid: Optional[HTTPException] = None
+    try:
+        record = _demographics_record(payload)
+    except ValidationError as e:
+        record, invalid = {}, HTTPException(status_code=422, detail=jsonable_encoder(e.errors(include_url=False)))
+    except (TypeError, ValueError, AttributeError) as e:
+        record, invalid = {}, HTTPException(status_code=422, detail=f"Invalid demographics payload: {e}")
+    except BaseException:
+        checks.cancel()
+        raise
+    exists, ok, returning = await checks
+
+    if not exists:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    if not ok or returning or invalid is not None:
+        # every path records the verdict; a successful save records it in the same write below
+        await async_storage.mark_recaptcha_result(session_id, "demographics", ok)
+    if not ok:
+        raise HTTPException(status_code=400, detail="reCAPTCHA failed")
+    # --- Duplicate Prolific ID check (server-side enforcement) ---
+    if returning:
+        # Reject duplicate submissions (client will show a user-facing modal)
+        # 409 Conflict indicates the ID is already present
+        raise HTTPException(status_code=409, detail="duplicate_prolific")
+    if invalid is not None:
+        raise invalid
 
-    # Final save: includes everything (typed + extras)
-    storage.save_demographics(session_id, model_dict, recaptcha_verification="yes")
+    # Final save: includes everything (typed + extras), with the reCAPTCHA flag in the same write
+    await async_storage.save_demographics(session_id, record, recaptcha_verification="yes")
     return {"ok": True}
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Random assignment (3 passages + 2:1 source split, deterministic per session)
 # ──────────────────────────────────────────────────────────────────────────────
 
-@app.post("/api/randomize", response_model=RandomizeResponse)
-def randomize(session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
+async def _assign(session_id: str) -> Dict[str, Any]:
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
 
-    base_seed = _sha_seed(session_id)
-    passages = _random_three_passages(seed=base_seed)
-    storage.set_assignment(session_id, passages)
+        # page reloads and retries get the stored assignment back
+        existing = await async_storage.get_assignment_record(session_id)
+        if existing:
+            return existing
 
-    # derive a different seed for sources so passage choice doesn't fully determine split
-    source_seed = (base_seed * 31 + 7) % (2**31)
-    source_map = _assign_sources_for_three(passages, seed=source_seed)
-    storage.set_source_assignment(session_id, source_map)
+        pack = content.current()
+        base_seed = _sha_seed(session_id)
+        passages = _random_three_passages(seed=base_seed, pack=pack)
 
-    return RandomizeResponse(passage_ids=passages)
+        # derive a different seed for sources so passage choice doesn't fully determine split
+        source_seed = (base_seed * 31 + 7) % (2**31)
+        source_map = _assign_sources_for_three(passages, seed=source_seed)
+
+        # one insert-if-absent write; a concurrent request on another worker that got
+        # there first wins, and both return its assignment
+        return await async_storage.create_assignment(session_id, passages, source_map,
+                                                     content_version=pack.version)
+
+# in-flight randomize calls, keyed by session id (the idempotency key): a double-click
+# awaits the first request's result instead of assigning again
+_ASSIGNING: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+@app.post("/api/randomize", response_model=RandomizeResponse)
+async def randomize(session_id: str = Query(...)):
+    fut = _ASSIGNING.get(session_id)
+    if fut is None:
+        fut = asyncio.ensure_future(_assign(session_id))
+        _ASSIGNING[session_id] = fut
+        fut.add_done_callback(lambda _: _ASSIGNING.pop(session_id, None))
+    # shield: one caller disconnecting must not cancel the assignment the others wait on
+    assigned = await asyncio.shield(fut)
+    token = issue_session_token(session_id, assigned["passage_ids"], assigned["sources"],
+                                assigned["content_version"])
+    return RandomizeResponse(passage_ids=assigned["passage_ids"], token=token)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Passages
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.get("/api/passage/{passage_id}", response_model=Passage)
-def get_passage(passage_id: str, session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    p = PASSAGES.get(passage_id)
-    if not p:
+async def get_passage(request: Request, passage_id: str, session_id: str = Query(...)):
+    claims = _session_claims(request, session_id)
+    if claims is not None and "p" in claims:
+        pack = content.get(claims.get("v"))
+    else:
+        async with async_storage.unit_of_work():
+            if claims is None and not await async_storage.session_exists(session_id):
+                raise HTTPException(status_code=404, detail="Session not found.")
+            pack = await _content_for(session_id)
+    cached = pack.passage_body(passage_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Passage not found.")
-    return Passage(**p)
+    return _cached_json(request, cached)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Questions (serve chosen source; 6 items = 5 RC + 1 attention check)
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.get("/api/questions/{passage_id}", response_model=PublicQuestionsResponse)
-def get_questions(passage_id: str, session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    src = storage.get_source_for(session_id, passage_id)
+async def get_questions(request: Request, passage_id: str, session_id: str = Query(...)):
+    claims = _session_claims(request, session_id)
+    if claims is not None and "p" in claims:
+        src = claims["s"].get(passage_id)
+        pack = content.get(claims.get("v"))
+    else:
+        async with async_storage.unit_of_work():
+            if claims is None and not await async_storage.session_exists(session_id):
+                raise HTTPException(status_code=404, detail="Session not found.")
+            record, pack = await _assignment_for(session_id)
+            src = record.get("sources", {}).get(passage_id)
     if not src:
         raise HTTPException(status_code=400, detail="Source not assigned for this passage.")
 
-    pq = QUESTIONS.get(passage_id)
-    if not pq:
+    if not pack.has_questions(passage_id):
         raise HTTPException(status_code=404, detail="No questions for passage.")
 
-    qset = pq.get("questions", {}).get(src) or []
-    if len(qset) < 6:
+    # public set only: built without correct answers by the content build
+    cached = pack.public_questions_body(passage_id, src)
+    if not cached:
         raise HTTPException(status_code=500, detail="Insufficient questions for assigned source.")
+    return _cached_json(request, cached)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Session bootstrap (assignment + passages + public questions in one round trip)
+# ──────────────────────────────────────────────────────────────────────────────
 
-    # Do NOT leak correct answers
-    mapped = [
-        {
-            "id": q["question_id"],
-            "prompt": q["prompt"],
-            "choices": q["choices"],
-        }
-        for q in qset
-    ]
-    return PublicQuestionsResponse(passage_id=passage_id, questions=mapped)
+@app.get("/api/session/bootstrap")
+async def session_bootstrap(request: Request, session_id: str = Query(...)):
+    claims = _session_claims(request, session_id)
+    if claims is not None and "p" in claims:
+        passage_ids, sources = claims["p"], claims["s"]
+        pack = content.get(claims.get("v"))
+    else:
+        async with async_storage.unit_of_work():
+            if claims is None and not await async_storage.session_exists(session_id):
+                raise HTTPException(status_code=404, detail="Session not found.")
+            record, pack = await _assignment_for(session_id)
+            passage_ids, sources = record.get("passage_ids"), record.get("sources", {})
+    if not passage_ids:
+        raise HTTPException(status_code=400, detail="Passages not assigned.")
+
+    passages: List[bytes] = []
+    questions: List[bytes] = []
+    for pid in passage_ids:
+        p = pack.passage_body(pid)
+        if not p:
+            raise HTTPException(status_code=404, detail="Passage not found.")
+        src = sources.get(pid)
+        if not src:
+            raise HTTPException(status_code=400, detail="Source not assigned for this passage.")
+        qs = pack.public_questions_body(pid, src)
+        if not qs:
+            raise HTTPException(status_code=500, detail="Insufficient questions for assigned source.")
+        key = content.dumps(pid) + b":"
+        passages.append(key + p[0])
+        questions.append(key + qs[0])
+    # splice the pre-serialized bodies instead of re-encoding them
+    body = b"".join([
+        b'{"passage_ids":', content.dumps(passage_ids),
+        b',"sources":', content.dumps(sources),
+        b',"passages":{', b",".join(passages),
+        b'},"questions":{', b",".join(questions), b"}}",
+    ])
+    return Response(content=body, media_type="application/json")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Submit MCQs (store passage_uid, unique question_id, responses)
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.post("/api/submit_mcq", response_model=MCQSubmitResult)
-def submit_mcq(payload: SubmitMCQPayload):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    src = storage.get_source_for(payload.session_id, payload.passage_id)
-    if not src:
-        raise HTTPException(status_code=400, detail="Source not assigned for this passage.")
+async def submit_mcq(payload: SubmitMCQPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        record, pack = await _assignment_for(payload.session_id)
+        src = record.get("sources", {}).get(payload.passage_id)
+        if not src:
+            raise HTTPException(status_code=400, detail="Source not assigned for this passage.")
+
+        if not pack.has_questions(payload.passage_id):
+            raise HTTPException(status_code=404, detail="No question data for passage.")
+        key = pack.answer_key(payload.passage_id, src)
+
+        per: List[Dict[str, Any]] = []
+        score = 0
+        for qid, ans in (payload.answers or {}).items():
+            correct = key.get(qid)
+            if correct is None:
+                # Ignore unknown keys silently (robust to stale client state)
+                continue
+            ok = (ans == correct)
+            score += 1 if ok else 0
+            per.append(
+                {
+                    "question_id": qid,
+                    "user_choice_id": ans,
+                    "correct_choice_id": correct,
+                    "is_correct": ok,
+                }
+            )
 
-    pq = QUESTIONS.get(payload.passage_id)
-    if not pq:
-        raise HTTPException(status_code=404, detail="No question data for passage.")
-    qset = pq.get("questions", {}).get(src) or []
-    qmap = {q["question_id"]: q for q in qset}
-
-    per: List[Dict[str, Any]] = []
-    score = 0
-    for qid, ans in (payload.answers or {}).items():
-        qrow = qmap.get(qid)
-        if not qrow:
-            # Ignore unknown keys silently (robust to stale client state)
-            continue
-        correct = qrow["correct_choice_id"]
-        ok = (ans == correct)
-        score += 1 if ok else 0
-        per.append(
-            {
-                "question_id": qid,
-                "user_choice_id": ans,
-                "correct_choice_id": correct,
-                "is_correct": ok,
-            }
+        passage_uid = pack.passage_uid(payload.passage_id) or payload.passage_id
+        await async_storage.save_mcq_submission(
+            session_id=payload.session_id,
+            passage_id=payload.passage_id,
+            passage_uid=passage_uid,
+            source=src,
+            per_question=per,
+            score=score,
+            meta={
+                "time_on_questions_ms": payload.time_on_questions_ms,
+                "back_to_passage_clicks": payload.back_to_passage_clicks,
+            },
+            content_version=pack.version,
         )
-
-    passage_uid = (PASSAGES.get(payload.passage_id) or {}).get("id") or payload.passage_id
-    storage.save_mcq_submission(
-        session_id=payload.session_id,
-        passage_id=payload.passage_id,
-        passage_uid=passage_uid,
-        source=src,
-        per_question=per,
-        score=score,
-        meta={
-            "time_on_questions_ms": payload.time_on_questions_ms,
-            "back_to_passage_clicks": payload.back_to_passage_clicks,
-        },
-    )
-    return MCQSubmitResult(passage_id=payload.passage_id, per_question=per, score=score)
+        return MCQSubmitResult(passage_id=payload.passage_id, per_question=per, score=score)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Post-task feedback (store under passage_uid) + data for review
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.post("/api/posttask")
-def posttask_feedback(payload: PostTaskFeedbackPayload):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    p = PASSAGES.get(payload.passage_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Passage not found.")
-    storage.save_posttask_feedback(payload.session_id, p["id"], payload.ratings or {})
-    return {"ok": True}
+async def posttask_feedback(payload: PostTaskFeedbackPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        uid = (await _content_for(payload.session_id)).passage_uid(payload.passage_id)
+        if not uid:
+            raise HTTPException(status_code=404, detail="Passage not found.")
+        await async_storage.save_posttask_feedback(payload.session_id, uid, payload.ratings or {})
+        return {"ok": True}
 
 @app.get("/api/posttask_data/{passage_id}")
-def posttask_data(passage_id: str, session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-
-    passage = PASSAGES.get(passage_id)
-    mcq = storage.get_mcq_submission(session_id, passage_id)
-    if not passage or not mcq:
-        raise HTTPException(status_code=404, detail="Not ready.")
-
-    src = mcq.get("source")
-    pq = QUESTIONS.get(passage_id) or {}
-    qset = pq.get("questions", {}).get(src) or []
-    qmap = {q["question_id"]: q for q in qset}
-
-    # Exclude attention checks ("QX*")
-    details: List[Dict[str, Any]] = []
-    for row in mcq["per_question"]:
-        qid = row["question_id"]
-        if str(qid).upper().startswith("QX"):
-            continue
-        q = qmap.get(qid)
-        if not q:
-            continue
-        details.append(
-            {
-                "question_id": qid,
-                "prompt": q["prompt"],
-                "choices": q["choices"],
-                "user_choice_id": row["user_choice_id"],
-                "correct_choice_id": row["correct_choice_id"],
-                "is_correct": row["is_correct"],
-            }
-        )
+async def posttask_data(request: Request, passage_id: str, session_id: str = Query(...)):
+    claims = _session_claims(request, session_id)
+    async with async_storage.unit_of_work():
+        if claims is None and not await async_storage.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+
+        mcq = await async_storage.get_mcq_submission(session_id, passage_id)
+        if not mcq:
+            raise HTTPException(status_code=404, detail="Not ready.")
+        # review against the content the answers were scored with
+        version = mcq.get("content_version")
+        if version:
+            pack = content.get(version)
+        elif claims is not None and "p" in claims:
+            pack = content.get(claims.get("v"))
+        else:
+            pack = await _content_for(session_id)
+        passage = pack.passage(passage_id)
+        if not passage:
+            raise HTTPException(status_code=404, detail="Not ready.")
+
+        src = mcq.get("source")
+        qmap = pack.question_rows(passage_id, src)
+        checks = pack.attention_check_ids(passage_id, src)
+
+        # Exclude attention checks ("QX*")
+        details: List[Dict[str, Any]] = []
+        for row in mcq["per_question"]:
+            qid = row["question_id"]
+            if qid in checks:
+                continue
+            q = qmap.get(qid)
+            if not q:
+                continue
+            details.append(
+                {
+                    "question_id": qid,
+                    "prompt": q["prompt"],
+                    "choices": q["choices"],
+                    "user_choice_id": row["user_choice_id"],
+                    "correct_choice_id": row["correct_choice_id"],
+                    "is_correct": row["is_correct"],
+                }
+            )
 
-    return {"passage": passage, "questions": details, "score": mcq["score"]}
+        return {"passage": passage, "questions": details, "score": mcq["score"]}
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Vocabulary task
 # ──────────────────────────────────────────────────────────────────────────────
 
-@app.post("/api/vocab/start")
-def vocab_start(session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    storage.init_vocab(session_id, size=len(VOCAB))
-    return {"ok": True, "size": len(VOCAB)}
+@app.post("/api/vocab/start", response_model=VocabStartResponse)
+async def vocab_start(session_id: str = Query(...), deck: bool = Query(False)):
+    """
+    Start (or restart) the task. With `deck=true` the whole deck comes back at once:
+    the client runs the trials locally and sends every answer in one /api/vocab/submit.
+    """
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        pack = await _content_for(session_id)
+        vocab = pack.vocab()
+        await async_storage.init_vocab(session_id, size=len(vocab))
+        if not deck:
+            return VocabStartResponse(ok=True, size=len(vocab))
+        items = list(pack.vocab_deck())
+        if VOCAB_SHUFFLE:
+            # same order on every reload of the page
+            random.Random((_sha_seed(session_id) * 17 + 3) % (2**31)).shuffle(items)
+        return VocabStartResponse(ok=True, size=len(items), items=[VocabItem(**it) for it in items])
 
 @app.get("/api/vocab/next", response_model=VocabNextResponse)
-def vocab_next(session_id: str = Query(...)):
-    if not storage.session_exists(session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    prog = storage.get_vocab_progress(session_id)
-    idx = prog.get("index", 0)
-    size = prog.get("size", len(VOCAB))
-
-    if idx >= size or idx >= len(VOCAB):
-        return VocabNextResponse(done=True, remaining=0, item=None)
-
-    item = VOCAB[idx]
-    iid = item.get("id") or f"v{idx}"
-    item["id"] = iid
-
-    remaining = max(0, min(size, len(VOCAB)) - idx)
-    return VocabNextResponse(done=False, remaining=remaining, item=VocabItem(id=iid, token=item["token"]))
+async def vocab_next(request: Request, session_id: str = Query(...)):
+    claims = _session_claims(request, session_id)
+    async with async_storage.unit_of_work():
+        if claims is None and not await async_storage.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        if claims is not None and "p" in claims:
+            vocab = content.get(claims.get("v")).vocab()
+        else:
+            vocab = (await _content_for(session_id)).vocab()
+        prog = await async_storage.get_vocab_progress(session_id)
+        idx = prog.get("index", 0)
+        size = prog.get("size", len(vocab))
+
+        if idx >= size or idx >= len(vocab):
+            return VocabNextResponse(done=True, remaining=0, item=None)
+
+        # copy: the pack's vocab dicts are shared by every request and must stay unchanged
+        item = vocab[idx]
+        iid = item.get("id") or f"v{idx}"
+        item = {**item, "id": iid}
+
+        remaining = max(0, min(size, len(vocab)) - idx)
+        return VocabNextResponse(done=False, remaining=remaining, item=VocabItem(id=iid, token=item["token"]))
 
 @app.post("/api/vocab/answer")
-def vocab_answer(payload: VocabAnswerPayload):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-
-    truth: Optional[bool] = None
-    for it in VOCAB:
-        if it.get("id") == payload.item_id:
-            truth = it.get("is_word")
-            break
-    if truth is None:
-        raise HTTPException(status_code=400, detail="Unknown vocabulary item.")
-
-    is_correct = bool(payload.is_word == truth)
-
-    # IMPORTANT: advance the progress counter so /api/vocab/next serves the next token.
-    # This does NOT persist per-click answers in SQLite—our storage.advance_vocab just bumps the index.
-    storage.advance_vocab(
-        payload.session_id,
-        payload.item_id,
-        payload.is_word,
-        payload.rt_ms,
-        is_correct,
-    )
+async def vocab_answer(payload: VocabAnswerPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        # same ids (and v<index> fallback) /api/vocab/next hands out
+        truth = (await _content_for(payload.session_id)).vocab_key().get(payload.item_id)
+        if truth is None:
+            raise HTTPException(status_code=400, detail="Unknown vocabulary item.")
+
+        is_correct = bool(payload.is_word == truth)
+
+        # IMPORTANT: advance the progress counter so /api/vocab/next serves the next token.
+        # The answer (with RT) is recorded too; repeating an item does not advance twice.
+        await async_storage.advance_vocab(
+            payload.session_id,
+            payload.item_id,
+            payload.is_word,
+            payload.rt_ms,
+            is_correct,
+        )
 
-    return {"ok": True, "correct": is_correct}
+        return {"ok": True, "correct": is_correct}
 
 @app.post("/api/vocab/submit")
-def vocab_submit(payload: VocabSubmitPayload):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    # one row only
-    storage.save_vocab_final(
-        payload.session_id,
-        [t.model_dump() for t in payload.trials],
-    )
-    return {"ok": True}
+async def vocab_submit(payload: VocabSubmitPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        trials = [t.model_dump() for t in payload.trials]
+        if payload.answers is None:
+            # one row only
+            await async_storage.save_vocab_final(payload.session_id, trials)
+            return {"ok": True}
+
+        # deck mode: score every answer against the pack's id -> is_word index
+        pack = await _content_for(payload.session_id)
+        key = pack.vocab_key()
+        tokens = {it["id"]: it["token"] for it in pack.vocab_deck()}
+        answers: List[Dict[str, Any]] = []
+        seen = set()
+        for a in payload.answers:
+            if a.item_id not in key:
+                raise HTTPException(status_code=400, detail="Unknown vocabulary item.")
+            if a.item_id in seen:
+                continue  # first answer per item counts, as with /api/vocab/answer
+            seen.add(a.item_id)
+            answers.append({"item_id": a.item_id, "position": len(answers), "is_word": a.is_word,
+                            "is_correct": a.is_word == key[a.item_id], "rt_ms": a.rt_ms})
+        if not trials:
+            trials = [{"token": tokens[a["item_id"]], "user_answer": "yes" if a["is_word"] else "no"}
+                      for a in answers]
+        # the final trials row and every answer commit together
+        await async_storage.save_vocab_final(payload.session_id, trials, answers=answers)
+        correct = sum(1 for a in answers if a["is_correct"])
+        return {"ok": True, "completed": len(answers), "correct": correct}
 # ──────────────────────────────────────────────────────────────────────────────
 # Final check
 # ──────────────────────────────────────────────────────────────────────────────
@@ -541,17 +691,17 @@ async def submit_final_check(
     payload: Dict[str, Any] = Body(...),
     session_id: str = "",
 ):
-    if not storage.session_exists(session_id):
+    if not await async_storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found.")
 
     token = (payload.get("recaptcha_token") or "").strip()
     remote_ip = request.client.host if request.client else None
-    ok = await verify_recaptcha_v2(token, remote_ip)
-    storage.mark_recaptcha_result(session_id, "final_check", ok)
+    ok = await recaptcha.verify(token, remote_ip, session_id, "final_check")
+    await async_storage.mark_recaptcha_result(session_id, "final_check", ok)
     if not ok:
         raise HTTPException(status_code=400, detail="reCAPTCHA failed")
 
-    storage.final_check(session_id, payload, recaptcha_verification="yes")
+    await async_storage.final_check(session_id, payload, recaptcha_verification="yes")
     return {"ok": True}
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -559,43 +709,54 @@ async def submit_final_check(
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.post("/api/log/participation_end")
-def log_participation_end(payload: ParticipationEndRequest):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    try:
-        res = storage.log_total_participation_time(payload.session_id, payload.finished_at_ms)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    return res
+async def log_participation_end(payload: ParticipationEndRequest):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        try:
+            res = await async_storage.log_total_participation_time(payload.session_id, payload.finished_at_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return res
 
 @app.post("/api/log/attention")
-def log_attention(payload: AttentionLogPayload):
-    if not storage.session_exists(payload.session_id):
-        raise HTTPException(status_code=404, detail="Session not found.")
-    try:
-        res = storage.log_total_task_time(payload.session_id, payload.bucket, payload.elapsed_ms)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    return res
+async def log_attention(payload: AttentionLogPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        try:
+            res = await async_storage.log_total_task_time(payload.session_id, payload.bucket, payload.elapsed_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return res
 
 @app.post("/api/log/rc_event")
-def log_rc_event(payload: RCEventPayload):
-    if not storage.session_exists(payload.session_id):
+async def log_rc_event(payload: RCEventPayload):
+    async with async_storage.unit_of_work():
+        if not await async_storage.session_exists(payload.session_id):
+            raise HTTPException(status_code=404, detail="Session not found.")
+        try:
+            rec = await async_storage.log_reading_comprehension_details(
+                payload.session_id,
+                {
+                    "start_time": payload.start_time,
+                    "status": payload.status,
+                    "passage_id": payload.passage_id,
+                    "page_name": payload.page_name or "unknown",
+                    "duration_ms": payload.duration_ms or 0,
+                },
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"ok": True, "start_time": rec["start_time"], "server_ts": rec["server_ts"]}
+
+@app.post("/api/log/batch")
+async def log_batch(payload: TelemetryBatchPayload):
+    # session is checked once for the whole batch; per-event problems come back in `results`
+    if not await async_storage.session_exists(payload.session_id):
         raise HTTPException(status_code=404, detail="Session not found.")
-    try:
-        rec = storage.log_reading_comprehension_details(
-            payload.session_id,
-            {
-                "start_time": payload.start_time,
-                "status": payload.status,
-                "passage_id": payload.passage_id,
-                "page_name": payload.page_name or "unknown",
-                "duration_ms": payload.duration_ms or 0,
-            },
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    return {"ok": True, "start_time": rec["start_time"], "server_ts": rec["server_ts"]}
+    results = await async_storage.log_batch(payload.session_id, payload.events)
+    return {"ok": all(r["ok"] for r in results), "results": results}
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -65,6 +65,7 @@ class Assignment(Base):
     session_id = Column(String(64), ForeignKey("sessions.id"), primary_key=True)
     passage_ids = Column(JSON)        # list[str]
     sources = Column(JSON)            # {passage_key: "baseline"|"requesta"}
+    content_version = Column(String(32), nullable=True)  # content pack the session was assigned under
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     session = relationship("Session", back_populates="assignment")
@@ -82,6 +83,7 @@ class MCQSubmission(Base):
     score = Column(Integer)
     time_on_questions_ms = Column(Integer, nullable=True)
     back_to_passage_clicks = Column(Integer, default=0)
+    content_version = Column(String(32), nullable=True)  # answer key version used for scoring
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     session = relationship("Session", back_populates="mcq_submissions")
@@ -107,8 +109,34 @@ class VocabFinal(Base):
 
     session = relationship("Session", back_populates="vocab_submission")
 
+class VocabProgress(Base):
+    """Next vocabulary item per session; shared by every worker, advanced in SQL."""
+    __tablename__ = "vocab_progress"
+
+    session_id = Column(String(64), ForeignKey("sessions.id"), primary_key=True)
+    next_index = Column(Integer, nullable=False, default=0)
+    size = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class VocabAnswer(Base):
+    __tablename__ = "vocab_answers"
+    # one answer per item; a retried click does not advance twice
+    __table_args__ = (UniqueConstraint('session_id', 'item_id', name='uniq_vocab_answer'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(64), ForeignKey("sessions.id"))
+    item_id = Column(String(64))
+    position = Column(Integer)        # index the item was served at
+    is_word = Column(Boolean)         # the participant's answer
+    is_correct = Column(Boolean)
+    rt_ms = Column(Integer, nullable=True)
+    server_ts = Column(DateTime, default=datetime.datetime.utcnow)
+
 class RCEvent(Base):
     __tablename__ = "rc_events"
+    # one row per debounced segment; merges upsert the same key
+    __table_args__ = (UniqueConstraint('session_id', 'passage_id', 'start_time', 'status', 'page_name',
+                                       name='uniq_rc_segment'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(64), ForeignKey("sessions.id"))
@@ -142,3 +170,11 @@ class FinalCheck(Base):
     server_ts = Column(DateTime, default=datetime.datetime.utcnow)
 
     session = relationship("Session", back_populates="final_check")
+
+class KnownParticipant(Base):
+    """First session to submit each (normalized) prolific ID; the returning-participant index."""
+    __tablename__ = "known_participants"
+
+    prolific_id = Column(String(128), primary_key=True)  # stripped + lower-cased
+    session_id = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,227 @@
+# backend/recaptcha.py
+"""
+reCAPTCHA v2 verification over one pooled, app-lifetime HTTP client.
+
+- `startup()` / `shutdown()` are called from the app lifespan; the client keeps
+  TLS connections to the verifier alive between submissions.
+- Connect / read timeouts are configurable (RECAPTCHA_CONNECT_TIMEOUT_S,
+  RECAPTCHA_READ_TIMEOUT_S).
+- Circuit breaker: after RECAPTCHA_BREAKER_FAILURES consecutive errors or slow
+  answers (> RECAPTCHA_SLOW_MS) the verifier is skipped for RECAPTCHA_BREAKER_OPEN_S.
+  While it is unavailable, RECAPTCHA_MODE decides: "required" fails closed,
+  "auto" lets the submission through (and logs it).
+- Settings missing from the environment are read from SSM on first use, not at
+  import, so a worker boots without a network round trip.
+- Verdicts are cached per (token, session, endpoint) for RECAPTCHA_TOKEN_TTL_S:
+  tokens are single-use, so a client retry of the same submission would otherwise
+  be rejected by Google. The session and endpoint are part of the key so a cached
+  pass never lets the same token through a different submission.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from backend.config import _get
+
+load_dotenv()  # read at import, before main.py's own load_dotenv() runs
+
+# from the environment at import; what it leaves unset comes from SSM on first use (_configure)
+RECAPTCHA_SECRET = os.getenv("RECAPTCHA_SECRET") or None
+RECAPTCHA_MODE = os.getenv("RECAPTCHA_MODE") or None
+DEV_BYPASS_RECAPTCHA = os.getenv("DEV_BYPASS_RECAPTCHA") or None
+
+VERIFY_URL = os.getenv("RECAPTCHA_VERIFY_URL") or "https://www.google.com/recaptcha/api/siteverify"
+CONNECT_TIMEOUT_S = float(os.getenv("RECAPTCHA_CONNECT_TIMEOUT_S") or 2.0)
+READ_TIMEOUT_S = float(os.getenv("RECAPTCHA_READ_TIMEOUT_S") or 3.0)
+MAX_CONNECTIONS = int(os.getenv("RECAPTCHA_MAX_CONNECTIONS") or 20)
+SLOW_MS = float(os.getenv("RECAPTCHA_SLOW_MS") or 2000)
+BREAKER_FAILURES = int(os.getenv("RECAPTCHA_BREAKER_FAILURES") or 5)
+BREAKER_OPEN_S = float(os.getenv("RECAPTCHA_BREAKER_OPEN_S") or 30)
+TOKEN_TTL_S = float(os.getenv("RECAPTCHA_TOKEN_TTL_S") or 120)  # tokens expire after 2 minutes
+TOKEN_CACHE_SIZE = int(os.getenv("RECAPTCHA_TOKEN_CACHE_SIZE") or 10000)
+
+_CONFIGURED = False
+
+
+def _configure() -> None:
+    """Resolve the settings the environment left unset (SSM, then defaults), once per process."""
+    global RECAPTCHA_SECRET, RECAPTCHA_MODE, DEV_BYPASS_RECAPTCHA, _CONFIGURED
+    if _CONFIGURED:
+        return
+    if RECAPTCHA_SECRET is None:
+        RECAPTCHA_SECRET = _get("RECAPTCHA_SECRET", ssm_path="/requesta/RECAPTCHA_SECRET", secure=True) or ""
+    if RECAPTCHA_MODE is None:
+        RECAPTCHA_MODE = (_get("RECAPTCHA_MODE", default="auto", ssm_path="/requesta/RECAPTCHA_MODE") or "auto").strip().lower()
+    if DEV_BYPASS_RECAPTCHA is None:
+        DEV_BYPASS_RECAPTCHA = (_get("DEV_BYPASS_RECAPTCHA", default="0", ssm_path="/requesta/DEV_BYPASS_RECAPTCHA") or "0").strip() == "1"
+    _CONFIGURED = True
+    print(
+        "[recaptcha cfg] mode=", RECAPTCHA_MODE,
+        "secret_set=", bool(RECAPTCHA_SECRET),
+        "dev_bypass=", DEV_BYPASS_RECAPTCHA
+    )
+
+
+def recaptcha_required() -> bool:
+    _configure()
+    if RECAPTCHA_MODE in ("disabled", "off", "false", "0"):
+        return False
+    if RECAPTCHA_MODE in ("required", "on", "true", "1"):
+        return True
+    # auto
+    return bool(RECAPTCHA_SECRET)
+
+
+def _degraded_result() -> bool:
+    """Verdict when the verifier cannot answer: only "required" mode blocks the participant."""
+    return RECAPTCHA_MODE not in ("required", "on", "true", "1")
+
+
+# ── Pooled client ─────────────────────────────────────────────────────────────
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(READ_TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+    )
+
+
+async def startup() -> None:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = _new_client()
+
+
+async def shutdown() -> None:
+    global _CLIENT
+    client, _CLIENT = _CLIENT, None
+    if client is not None:
+        await client.aclose()
+
+
+def _client() -> httpx.AsyncClient:
+    # created on first use when the app runs without its lifespan (scripts, test clients)
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = _new_client()
+    return _CLIENT
+
+
+# ── Circuit breaker ───────────────────────────────────────────────────────────
+# All state is touched from the event loop only, so no locking.
+_BREAKER = {"failures": 0, "open_until": 0.0}
+_STATS = {"verified": 0, "cache_hits": 0, "errors": 0, "slow": 0, "short_circuited": 0, "degraded": 0}
+
+
+def _breaker_open() -> bool:
+    return _BREAKER["failures"] >= BREAKER_FAILURES and time.monotonic() < _BREAKER["open_until"]
+
+
+def _record(success: bool) -> None:
+    if success:
+        _BREAKER["failures"] = 0
+        return
+    _BREAKER["failures"] += 1
+    if _BREAKER["failures"] >= BREAKER_FAILURES:
+        # (re)open; once it elapses the next call is a trial and a failure reopens at once
+        _BREAKER["open_until"] = time.monotonic() + BREAKER_OPEN_S
+        print(f"[reCAPTCHA] verifier unhealthy ({_BREAKER['failures']} failures); "
+              f"skipping it for {BREAKER_OPEN_S:g}s")
+
+
+# ── Verdict cache ─────────────────────────────────────────────────────────────
+_VERDICTS: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+
+
+def _token_key(token: str, session_id: str, endpoint: str) -> str:
+    return hashlib.sha256(f"{session_id}\0{endpoint}\0{token}".encode("utf-8")).hexdigest()
+
+
+def _cached_verdict(key: str) -> Optional[bool]:
+    hit = _VERDICTS.get(key)
+    if hit is None:
+        return None
+    if hit[1] <= time.monotonic():
+        del _VERDICTS[key]
+        return None
+    return hit[0]
+
+
+def _remember_verdict(key: str, ok: bool) -> None:
+    _VERDICTS[key] = (ok, time.monotonic() + TOKEN_TTL_S)
+    _VERDICTS.move_to_end(key)
+    while len(_VERDICTS) > TOKEN_CACHE_SIZE:
+        _VERDICTS.popitem(last=False)
+
+
+def stats() -> Dict[str, Any]:
+    return dict(_STATS, breaker_open=_breaker_open(), consecutive_failures=_BREAKER["failures"],
+                cached_tokens=len(_VERDICTS))
+
+
+# ── Verification ──────────────────────────────────────────────────────────────
+async def verify(token: str, remote_ip: str | None = None, session_id: str = "", endpoint: str = "") -> bool:
+    _configure()
+    if DEV_BYPASS_RECAPTCHA:
+        print("[reCAPTCHA] bypass (dev)")
+        return True
+    if not recaptcha_required():
+        print("[reCAPTCHA] not required (mode/secret disabled)")
+        return True
+    if not RECAPTCHA_SECRET or not token:
+        print("[reCAPTCHA] skipped: missing secret or token")
+        return False
+
+    key = _token_key(token, session_id, endpoint)
+    cached = _cached_verdict(key)
+    if cached is not None:
+        _STATS["cache_hits"] += 1
+        return cached
+
+    if _breaker_open():
+        _STATS["short_circuited"] += 1
+        _STATS["degraded"] += 1
+        ok = _degraded_result()
+        print("[reCAPTCHA] verifier skipped (breaker open); mode=", RECAPTCHA_MODE, "->", "PASS" if ok else "FAIL")
+        return ok
+
+    started = time.monotonic()
+    try:
+        r = await _client().post(
+            VERIFY_URL,
+            data={
+                "secret": RECAPTCHA_SECRET,
+                "response": token,
+                **({"remoteip": remote_ip} if remote_ip else {}),
+            },
+        )
+        r.raise_for_status()
+        data = r.json()
+    except Exception as e:
+        _STATS["errors"] += 1
+        _STATS["degraded"] += 1
+        _record(False)
+        ok = _degraded_result()
+        print("[reCAPTCHA] verify exception:", repr(e), "mode=", RECAPTCHA_MODE, "->", "PASS" if ok else "FAIL")
+        return ok
+
+    slow = (time.monotonic() - started) * 1000 > SLOW_MS
+    if slow:
+        _STATS["slow"] += 1
+    _record(not slow)
+    _STATS["verified"] += 1
+    ok = bool(data.get("success"))
+    _remember_verdict(key, ok)
+    # Mask token for safety; log code paths clearly
+    print("[reCAPTCHA] verify result:", "OK" if ok else "FAIL",
+          "hostname=", data.get("hostname"),
+          "errors=", data.get("error-codes"))
+    return ok
@@ -7,6 +7,7 @@ class SessionStartRequest(BaseModel):
 
 class SessionStartResponse(BaseModel):
     session_id: str
+    token: Optional[str] = None  # signed session token (X-Session-Token); None when signing is off
 
 class DemographicsPayload(BaseModel):
     # Keep accepting extra fields (Q1–Q12) while explicitly modeling citizenship
@@ -24,6 +25,7 @@ class DemographicsPayload(BaseModel):
 
 class RandomizeResponse(BaseModel):
     passage_ids: List[str]  # three in this template
+    token: Optional[str] = None  # session token that also carries the assignment
 
 class Passage(BaseModel):
     id: str
@@ -74,6 +76,11 @@ class VocabItem(BaseModel):
     id: str
     token: str
 
+class VocabStartResponse(BaseModel):
+    ok: bool
+    size: int
+    items: Optional[List[VocabItem]] = None  # deck mode: every item, in presentation order
+
 class VocabNextResponse(BaseModel):
     done: bool
     remaining: int
@@ -89,9 +96,15 @@ class VocabTrial(BaseModel):
     token: str
     user_answer: Literal["yes","no"]  # just what you asked for
 
+class VocabDeckAnswer(BaseModel):
+    item_id: str
+    is_word: bool
+    rt_ms: Optional[int] = None
+
 class VocabSubmitPayload(BaseModel):
     session_id: str
-    trials: List[VocabTrial]
+    trials: List[VocabTrial] = []
+    answers: Optional[List[VocabDeckAnswer]] = None  # deck mode: scored server-side, in answer order
 
 
 class ParticipationEndRequest(BaseModel):
@@ -118,3 +131,10 @@ class RCEventPayload(BaseModel):
     status: Literal["active","blur"]
     start_time: int   # client ms epoch (Date.now())
     duration_ms: int  # duration of this segment
+
+# Batched telemetry: attention + RC events for one session in one beacon.
+# Events stay loosely typed here so one bad item cannot reject the whole batch;
+# storage.log_batch validates each one and reports per-item results.
+class TelemetryBatchPayload(BaseModel):
+    session_id: str
+    events: List[Any] = Field(..., max_length=500)  # {"kind": "attention"|"rc", ...} each
@@ -1,4 +1,94 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
 import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import _get
 
 def new_session_id() -> str:
     return str(uuid.uuid4())
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Signed session tokens
+#
+# "<kid>.<payload>.<sig>": base64url JSON claims {sid, exp[, p, s, v]} and an
+# HMAC-SHA256 over "<kid>.<payload>". SESSION_TOKEN_KEYS is "kid:secret,..."; the
+# first key signs, all of them verify, so a key can be rotated in ahead of use and
+# retired after SESSION_TOKEN_TTL_S. Without keys no tokens are issued and every
+# route takes the storage path.
+# ──────────────────────────────────────────────────────────────────────────────
+
+SESSION_TOKEN_TTL_S = int(_get("SESSION_TOKEN_TTL_S", default="86400") or 86400)
+
+
+def _parse_keys(raw: Optional[str]) -> List[Tuple[str, bytes]]:
+    keys = []
+    for part in (raw or "").split(","):
+        kid, sep, secret = part.strip().partition(":")
+        if sep and kid and secret:
+            keys.append((kid, secret.encode("utf-8")))
+    return keys
+
+
+_KEY_RING: Optional[Tuple[List[Tuple[str, bytes]], Dict[str, bytes]]] = None
+
+
+def _key_ring() -> Tuple[List[Tuple[str, bytes]], Dict[str, bytes]]:
+    """(keys in signing order, keys by id), resolved on first use so worker boot stays off SSM."""
+    global _KEY_RING
+    if _KEY_RING is None:
+        keys = _parse_keys(_get("SESSION_TOKEN_KEYS", ssm_path="/requesta/SESSION_TOKEN_KEYS", secure=True))
+        _KEY_RING = (keys, dict(keys))
+    return _KEY_RING
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(key: bytes, signing_input: str) -> str:
+    return _b64(hmac.new(key, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_session_token(session_id: str, passage_ids: Optional[List[str]] = None,
+                        sources: Optional[Dict[str, str]] = None,
+                        content_version: Optional[str] = None) -> Optional[str]:
+    """Token for this session (with its assignment, once there is one); None if signing is off."""
+    keys, _ = _key_ring()
+    if not keys:
+        return None
+    kid, key = keys[0]
+    claims: Dict[str, Any] = {"sid": session_id, "exp": int(time.time()) + SESSION_TOKEN_TTL_S}
+    if passage_ids is not None:
+        claims.update(p=list(passage_ids), s=dict(sources or {}), v=content_version)
+    signing_input = f"{kid}.{_b64(json.dumps(claims, separators=(',', ':')).encode('utf-8'))}"
+    return f"{signing_input}.{_sign(key, signing_input)}"
+
+
+def verify_session_token(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Claims of a valid, unexpired token signed with a configured key; None otherwise."""
+    if not token:
+        return None
+    keys, keys_by_id = _key_ring()
+    if not keys:
+        return None
+    try:
+        signing_input, _, sig = token.rpartition(".")
+        kid, _, payload = signing_input.partition(".")
+        key = keys_by_id.get(kid)
+        # as bytes: headers arrive latin-1 decoded, and compare_digest rejects non-ASCII str
+        if key is None or not hmac.compare_digest(sig.encode("latin-1"), _sign(key, signing_input).encode("ascii")):
+            return None
+        claims = json.loads(_unb64(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+        return None
+    return claims
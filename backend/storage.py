@@ -6,72 +6,61 @@ Set STORAGE_BACKEND=sqlite for SQLite.
 Set STORAGE_BACKEND=aurora for Aurora MySQL.
 
 Exposed API (used by main.py):
+- unit_of_work()                                       # context manager: one DB session/transaction per request
 - start_session(session_id, source=None)
-- session_exists(session_id) -> bool
+- session_exists(session_id) -> bool                  # cached (see _SessionCache)
+- session_cached(session_id) -> bool | None           # cache only, never blocks
 
 - save_demographics(session_id, payload, recaptcha_verification=None)
+- prolific_id_owner(prolific_id) -> session_id | None   # first session that submitted the ID (cached)
 - mark_recaptcha_result(session_id, endpoint, ok)
 
 - set_assignment(session_id, passage_ids)
 - get_assignment(session_id) -> list[str] | None
 - set_source_assignment(session_id, mapping)
+- get_assignment_record(session_id) -> dict | None     # passage_ids + sources + content_version, once both are set
+- create_assignment(session_id, passage_ids, sources,  # insert-if-absent; returns the stored assignment
+                    content_version=None) -> dict
 - get_source_for(session_id, passage_id) -> str | None
 
 - save_mcq_submission(...)
 - get_mcq_submission(session_id, passage_id) -> dict | None
 - save_posttask_feedback(session_id, passage_uid, ratings)
 
-- init_vocab(session_id, size)                         # progress only (in-memory)
-- advance_vocab(session_id, item_id, is_word, rt_ms,   # progress only (in-memory)
-                is_correct: bool)
-- get_vocab_progress(session_id)                       # progress only (in-memory)
-- save_vocab_final(session_id, trials)                 # ONE final row persisted (list of {token,user_answer})
+- init_vocab(session_id, size)                         # (re)start: index 0, clears recorded answers
+- advance_vocab(session_id, item_id, is_word, rt_ms,   # records the answer + RT, index += 1 (once per item)
+                is_correct: bool) -> {index, size}
+- get_vocab_progress(session_id) -> {index, size}      # shared row; see _VocabProgressCache
+- save_vocab_final(session_id, trials, answers=None)   # ONE final row persisted (list of {token,user_answer});
+                                                       # deck mode also records the scored answers
 
 - final_check(session_id, data, recaptcha_verification=None)
 
+- flush()                                              # drain any write-behind queue
+- shutdown()                                           # flush + stop background writers
+- stats() -> dict                                      # cache / queue counters
+
 - log_total_participation_time(session_id, finished_at_ms=None) -> { ... }
 - log_total_task_time(session_id, bucket, elapsed_ms) -> { ... }
-- log_reading_comprehension_details(session_id, event) -> { ... }
+- get_task_time(session_id) -> {bucket: total_ms}
+- log_reading_comprehension_details(session_id, event) -> { ... }   # debounced; see _RCDebouncer
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, DefaultDict, Dict, List, Optional
-import os
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import atexit
+import threading
 import time
 import json
 
 # -----------------------------
-# Config helpers (env + optional SSM)
+# Config helpers (env + optional SSM, see backend/config.py)
 # -----------------------------
-try:
-    import boto3  
-except Exception:  
-    boto3 = None
-
-from functools import lru_cache
-
-@lru_cache()
-def _get_ssm_param(name: str, decrypt: bool = True) -> Optional[str]:
-    if boto3 is None:
-        return None
-    region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
-    try:
-        ssm = boto3.client("ssm", region_name=region)
-        return ssm.get_parameter(Name=name, WithDecryption=decrypt)["Parameter"]["Value"]
-    except Exception:
-        return None
-
-def _cfg(env_key: str, default: Optional[str] = None, ssm_path: Optional[str] = None, secure: bool = False) -> Optional[str]:
-    v = os.getenv(env_key)
-    if v:
-        return v
-    if ssm_path:
-        vv = _get_ssm_param(ssm_path, decrypt=secure)
-        if vv:
-            return vv
-    return default
+from backend.config import _get as _cfg
 
 # Backend selection
 STORAGE_BACKEND = (_cfg("STORAGE_BACKEND", default="sqlite", ssm_path="/requesta/STORAGE_BACKEND")).lower()
@@ -98,20 +87,586 @@ _RC_SPURIOUS_BLUR_MAX_MS = 250
 _RC_MIN_SEG_MS = 40                # drop micro flutter
 _RC_MAX_SEG_MS = 30 * 60 * 1000    # cap single segment to 30 minutes
 _RC_MERGE_GAP_MS = 500             # merge identical adjacent segments if gap <= 500ms
+_RC_MAX_START_TIME = 2 ** 63 - 1   # start_time is a signed 64-bit column in both backends
+_RC_MAX_PASSAGE_ID = 64            # column widths (rc_events); longer values cannot be stored
+_RC_MAX_PAGE_NAME = 128
 _ATTENTION_MAX_INC_MS = 4 * 60 * 60 * 1000  # cap single increment to 4h
 
+def _cfg_flag(env_key: str, default: str = "0") -> bool:
+    return (_cfg(env_key, default=default) or default).strip().lower() in ("1", "true", "on", "yes")
+
+# =====================================================================
+# Write-behind queue (shared)
+# =====================================================================
+class _WriteBehind:
+    """
+    Coalescing write-behind queue drained by one background thread.
+
+    Ops are keyed: a newer op for a pending key replaces the older one, or is
+    combined with it via `merge`. Every `flush_ms` (or as soon as `max_rows`
+    keys are waiting) the writer hands all pending ops to `write` in one call.
+    `io_lock` is held for the whole flush so callers can serialize their own
+    synchronous writes against it. Once `max_pending` keys are queued, `put`
+    flushes inline (backpressure) and only drops the op if that flush fails.
+
+    When a batch fails, `bad_row(exc)` decides whether the store rejected the
+    data (True: rows are retried one by one, rejected ones dropped and counted)
+    or is unavailable (False: the whole batch is queued again).
+    """
+
+    def __init__(self, name: str, write: Callable[[List[Tuple[Any, Any]]], None],
+                 flush_ms: int = 50, max_rows: int = 256, max_pending: int = 10000,
+                 io_lock: Optional[Any] = None,
+                 bad_row: Callable[[BaseException], bool] = lambda e: True) -> None:
+        self.name = name
+        self._write = write
+        self._bad_row = bad_row
+        self._flush_s = max(1, int(flush_ms)) / 1000.0
+        self._max_rows = max(1, int(max_rows))
+        self._max_pending = max(self._max_rows, int(max_pending))
+        self.io_lock = io_lock or threading.RLock()
+        self._lock = threading.Lock()
+        self._pending: Dict[Any, Any] = {}
+        self._inflight: Dict[Any, Any] = {}
+        self._merge: Dict[Any, Callable[[Any, Any], Any]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"enqueued": 0, "flushes": 0, "rows_written": 0,
+                       "backpressure": 0, "dropped": 0, "errors": 0}
+
+    def put(self, key: Any, op: Any, merge: Optional[Callable[[Any, Any], Any]] = None) -> bool:
+        if self._is_full(key):
+            self._bump("backpressure")
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[{self.name}] backpressure flush failed:", repr(e))
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self._max_pending:
+                self._stats["dropped"] += 1
+                return False
+            prev = self._pending.get(key)
+            self._pending[key] = merge(prev, op) if (merge and prev is not None) else op
+            if merge:
+                self._merge[key] = merge
+            self._stats["enqueued"] += 1
+            size = len(self._pending)
+        self._ensure_thread()
+        if size >= self._max_rows:
+            self._wake.set()
+        return True
+
+    def get(self, key: Any) -> Any:
+        """Pending (or in-flight) op for `key`, so reads can see queued writes."""
+        with self._lock:
+            op = self._pending.get(key)
+            return op if op is not None else self._inflight.get(key)
+
+    def queued(self, match: Callable[[Any], bool]) -> List[Tuple[Any, Any]]:
+        """In-flight and pending ops whose key matches, oldest first: what a store read may not show yet."""
+        with self._lock:
+            out = {k: op for k, op in self._inflight.items() if match(k)}
+            out.update((k, op) for k, op in self._pending.items() if match(k))
+            return list(out.items())
+
+    def discard(self, key: Any) -> None:
+        """Drop a queued op; call with `io_lock` held before writing `key` directly."""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._merge.pop(key, None)
+
+    def flush(self) -> int:
+        with self.io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                merges, self._merge = self._merge, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                self._write(list(batch.items()))
+                written = len(batch)
+            except Exception as e:
+                self._bump("errors")
+                if not self._bad_row(e):
+                    self._requeue(batch, merges)
+                    raise
+                written = self._write_rows(batch, merges)
+            with self._lock:
+                self._inflight = {}
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += written
+            return written
+
+    def _write_rows(self, batch: Dict[Any, Any], merges: Dict[Any, Callable[[Any, Any], Any]]) -> int:
+        """A row in `batch` was rejected: write the rows one by one and drop the ones that fail."""
+        written, retry = 0, {}
+        for k, op in batch.items():
+            try:
+                self._write([(k, op)])
+                written += 1
+            except Exception as e:
+                if not self._bad_row(e):
+                    retry[k] = op
+                    continue
+                self._bump("dropped")
+                print(f"[{self.name}] dropped unwritable row {k!r}:", repr(e))
+        if retry:
+            self._requeue(retry, merges)
+        return written
+
+    def _requeue(self, batch: Dict[Any, Any], merges: Dict[Any, Callable[[Any, Any], Any]]) -> None:
+        # put the rows back underneath anything queued meanwhile
+        with self._lock:
+            for k, op in batch.items():
+                newer = self._pending.get(k)
+                if newer is None:
+                    self._pending[k] = op
+                elif k in merges:
+                    self._pending[k] = merges[k](op, newer)
+            for k, m in merges.items():
+                self._merge.setdefault(k, m)
+            self._inflight = {}
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        t = self._thread
+        if t is not None and t.is_alive() and t is not threading.current_thread():
+            t.join(timeout=10)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[{self.name}] final flush failed, {self.stats()['pending']} row(s) not written:", repr(e))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+    def _is_full(self, key: Any) -> bool:
+        with self._lock:
+            return key not in self._pending and len(self._pending) >= self._max_pending
+
+    def _bump(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[{self.name}] flush failed:", repr(e))
+
+# =====================================================================
+# Reading-comprehension debouncer (shared)
+# =====================================================================
+_RC_TAIL_LEN = 16        # recent segments kept per session (merge target)
+_RC_BLUR_RUN_MAX = 64    # trailing spurious blurs kept per not-yet-active passage
+
+
+def _rc_spurious(ev: Dict[str, Any]) -> bool:
+    return (ev.get("status") == "blur" and (ev.get("page_name") or "unknown") == "unknown"
+            and int(ev.get("duration_ms") or 0) <= _RC_SPURIOUS_BLUR_MAX_MS)
+
+
+def _rc_ident(ev: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (ev["passage_id"], ev["start_time"], ev["status"], ev["page_name"])
+
+
+def _rc_overlay(recent: List[Dict[str, Any]], by_passage: Dict[str, Tuple[bool, List[Dict[str, Any]]]],
+                ops: List[Tuple[bool, Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[bool, List[Dict[str, Any]]]]]:
+    """Apply one session's queued (deleted, segment) ops, oldest first, over what was read from the store."""
+    tail = OrderedDict((_rc_ident(ev), ev) for ev in recent)
+    passages = dict(by_passage)
+    for deleted, rec in ops:
+        ident = _rc_ident(rec)
+        active, latest = passages.get(rec["passage_id"], (False, []))
+        latest = [ev for ev in latest if _rc_ident(ev) != ident]
+        if deleted:
+            tail.pop(ident, None)
+        else:
+            tail[ident] = rec  # an update keeps its place, a new segment is the newest
+            if rec["status"] == "active":
+                active, latest = True, []
+            elif not active:
+                latest.insert(0, rec)
+        passages[rec["passage_id"]] = (active, latest[:_RC_BLUR_RUN_MAX])
+    return list(tail.values())[-_RC_TAIL_LEN:], passages
+
+
+class _RCDebouncer:
+    """
+    Spurious-blur suppression, min-segment drop and merge-gap coalescing for
+    RC beacons, shared by both backends.
+
+    Per session it keeps only:
+    - tail: the last few segments, newest last (merge target)
+    - passages: {passage_id: {"active": bool, "run": [...]}} where `run` is
+      the trailing spurious blurs of a passage that has no active segment
+      yet, i.e. the only segments the active-after-blur rule can drop.
+
+    so every beacon is O(1) regardless of history length. Sessions are held
+    in an LRU of `max_sessions`; on a miss `load(session_id)` rebuilds the
+    state from the store and must return (recent segments oldest-first,
+    {passage_id: (has_active, that passage's latest segments newest-first)}),
+    including what `save(rec)` / `delete(rec)` have queued but not written
+    (see _rc_overlay). Accepted/updated segments go to `save`, dropped ones to
+    `delete`. Loads run outside the shared lock, one at a time per session,
+    so a cold session never stalls beacons for the others.
+    """
+
+    def __init__(self, load: Callable[[str], Tuple[List[Dict[str, Any]], Dict[str, Tuple[bool, List[Dict[str, Any]]]]]],
+                 save: Callable[[Dict[str, Any]], None], delete: Callable[[Dict[str, Any]], None],
+                 max_sessions: int) -> None:
+        self._load = load
+        self._save = save
+        self._delete = delete
+        self._max_sessions = max(1, int(max_sessions))
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, session_id: str) -> None:
+        """Load a missing session without holding the shared lock; concurrent callers wait for that load."""
+        while True:
+            with self._lock:
+                if session_id in self._states:
+                    return
+                loading = self._loading.get(session_id)
+                if loading is None:
+                    loading = self._loading[session_id] = threading.Event()
+                    break
+            loading.wait()
+        try:
+            st = self._build(*self._load(session_id))
+            with self._lock:
+                self._states[session_id] = st
+                while len(self._states) > self._max_sessions:
+                    self._states.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._loading[session_id]
+            loading.set()
+
+    @staticmethod
+    def _build(recent: List[Dict[str, Any]],
+               by_passage: Dict[str, Tuple[bool, List[Dict[str, Any]]]]) -> Dict[str, Any]:
+        tail: Deque[Dict[str, Any]] = deque(recent, maxlen=_RC_TAIL_LEN)
+        # share record objects between tail and runs so merges update both
+        by_key = {_rc_ident(ev): ev for ev in tail}
+        passages: Dict[str, Dict[str, Any]] = {}
+        for pid, (has_active, latest) in by_passage.items():
+            run: List[Dict[str, Any]] = []
+            if not has_active:
+                for ev in latest[:_RC_BLUR_RUN_MAX]:
+                    if not _rc_spurious(ev):
+                        break
+                    run.insert(0, by_key.get(_rc_ident(ev), ev))
+            passages[pid] = {"active": bool(has_active), "run": run}
+        return {"tail": tail, "passages": passages}
+
+    def sessions(self) -> int:
+        return len(self._states)
+
+    def log(self, session_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        passage_id = str(event.get("passage_id") or "")
+        status = str(event.get("status") or "active")
+        page_name = str(event.get("page_name") or "unknown")
+        start_time = int(event.get("start_time") or 0)
+        # reject what the store cannot hold before it reaches the (batched) writer
+        if not 0 <= start_time <= _RC_MAX_START_TIME:
+            raise ValueError("start_time out of range.")
+        if status not in ("active", "blur"):
+            raise ValueError(f"Unknown status: {status}")
+        if len(passage_id) > _RC_MAX_PASSAGE_ID or len(page_name) > _RC_MAX_PAGE_NAME:
+            raise ValueError("passage_id or page_name too long.")
+        try:
+            duration_ms = int(event.get("duration_ms") or 0)
+        except Exception:
+            duration_ms = 0
+        duration_ms = max(0, min(duration_ms, _RC_MAX_SEG_MS))
+        server_ts = _now_ms()
+
+        while True:
+            self._ensure_loaded(session_id)
+            with self._lock:
+                st = self._states.get(session_id)
+                if st is None:
+                    continue  # evicted between the load and here
+                self._states.move_to_end(session_id)
+                return self._apply(st, session_id, passage_id, status, page_name, start_time, duration_ms, server_ts)
+
+    def _apply(self, st: Dict[str, Any], session_id: str, passage_id: str, status: str, page_name: str,
+               start_time: int, duration_ms: int, server_ts: int) -> Dict[str, Any]:
+        """One accepted beacon against the session's state; caller holds the lock."""
+        events = st["tail"]
+        ps = st["passages"].setdefault(passage_id, {"active": False, "run": []})
+        has_active_before = ps["active"]
+
+        if status == "blur" and not has_active_before and page_name == "unknown" and duration_ms <= _RC_SPURIOUS_BLUR_MAX_MS:
+            return {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
+                    "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts, "suppressed": True}
+
+        if status == "active" and not has_active_before and ps["run"]:
+            # the passage's latest segment is a spurious blur: drop it
+            ev = ps["run"].pop()
+            for i in range(len(events) - 1, -1, -1):
+                if events[i] is ev:
+                    del events[i]
+                    break
+            self._delete(ev)
+
+        if duration_ms < _RC_MIN_SEG_MS:
+            return {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
+                    "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts, "suppressed": True}
+
+        if events:
+            prev = events[-1]
+            if prev.get("passage_id") == passage_id and prev.get("status") == status and (prev.get("page_name") or "unknown") == page_name:
+                prev_end = int(prev.get("start_time", 0)) + int(prev.get("duration_ms", 0))
+                gap = max(0, start_time - prev_end)
+                if gap <= _RC_MERGE_GAP_MS:
+                    prev["duration_ms"] = min(int(prev["duration_ms"]) + duration_ms + gap, _RC_MAX_SEG_MS)
+                    prev["server_ts"] = server_ts
+                    if ps["run"] and ps["run"][-1] is prev and not _rc_spurious(prev):
+                        ps["run"].clear()
+                    self._save(prev)  # same key: updates the stored segment in place
+                    return prev
+
+        rec = {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
+               "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts}
+        events.append(rec)
+        if status == "active":
+            ps["active"] = True
+            ps["run"].clear()
+        elif _rc_spurious(rec):
+            ps["run"].append(rec)
+            del ps["run"][:-_RC_BLUR_RUN_MAX]
+        else:
+            ps["run"].clear()
+        self._save(rec)
+        return rec
+
+# =====================================================================
+# session_exists cache (shared)
+# =====================================================================
+class _SessionCache:
+    """
+    Bounded TTL cache in front of session_exists.
+
+    Known session ids are kept for `ttl_s` (LRU-bounded by `max_size`);
+    unknown ids are remembered briefly (`neg_ttl_s`) so bursts of random ids
+    do not each reach the database. start_session calls `remember(sid, True)`,
+    which also clears any negative entry.
+    """
+
+    def __init__(self, max_size: int, ttl_s: float, neg_max_size: int, neg_ttl_s: float) -> None:
+        self._pos: "OrderedDict[str, float]" = OrderedDict()
+        self._neg: "OrderedDict[str, float]" = OrderedDict()
+        self._max = max(1, int(max_size))
+        self._neg_max = max(1, int(neg_max_size))
+        self._ttl = float(ttl_s)
+        self._neg_ttl = float(neg_ttl_s)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+    def lookup(self, session_id: str) -> Optional[bool]:
+        now = time.monotonic()
+        with self._lock:
+            for cache, found, counter in ((self._pos, True, "hits"), (self._neg, False, "negative_hits")):
+                exp = cache.get(session_id)
+                if exp is None:
+                    continue
+                if exp > now:
+                    cache.move_to_end(session_id)
+                    self._stats[counter] += 1
+                    return found
+                del cache[session_id]
+            self._stats["misses"] += 1
+            return None
+
+    def peek(self, session_id: str) -> Optional[bool]:
+        """Like lookup, but a miss is not counted (the caller falls through to session_exists)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._pos.get(session_id, 0) > now:
+                self._stats["hits"] += 1
+                return True
+            if self._neg.get(session_id, 0) > now:
+                self._stats["negative_hits"] += 1
+                return False
+            return None
+
+    def remember(self, session_id: str, exists: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if exists:
+                self._neg.pop(session_id, None)
+                cache, ttl, cap = self._pos, self._ttl, self._max
+            else:
+                cache, ttl, cap = self._neg, self._neg_ttl, self._neg_max
+            if ttl <= 0:
+                return
+            cache[session_id] = now + ttl
+            cache.move_to_end(session_id)
+            while len(cache) > cap:
+                cache.popitem(last=False)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._pos.pop(session_id, None)
+            self._neg.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._pos), negative_size=len(self._neg))
+
+
+_SESSION_CACHE = _SessionCache(
+    max_size=int(_cfg("SESSION_CACHE_SIZE", default="100000") or 100000),
+    ttl_s=float(_cfg("SESSION_CACHE_TTL_S", default="3600") or 3600),
+    neg_max_size=int(_cfg("SESSION_NEG_CACHE_SIZE", default="10000") or 10000),
+    neg_ttl_s=float(_cfg("SESSION_NEG_CACHE_TTL_S", default="5") or 5),
+)
+
+def session_cached(session_id: str) -> Optional[bool]:
+    """Cached session_exists answer without touching the database (None = unknown)."""
+    return _SESSION_CACHE.peek(session_id)
+
+
+def normalize_prolific_id(prolific_id: Any) -> str:
+    return str(prolific_id or "").strip().lower()
+
+
+class _KnownParticipants:
+    """
+    LRU of prolific ID -> owning session id in front of the known-participants index.
+
+    Ownership never changes once written (the first session wins), so entries
+    need no TTL. Unknown IDs are not cached: another worker may register them
+    at any moment, and a miss is a single primary-key read.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._owners: "OrderedDict[str, str]" = OrderedDict()
+        self._max = max(1, int(max_size))
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def lookup(self, prolific_id: str) -> Optional[str]:
+        with self._lock:
+            owner = self._owners.get(prolific_id)
+            if owner is None:
+                self._stats["misses"] += 1
+                return None
+            self._owners.move_to_end(prolific_id)
+            self._stats["hits"] += 1
+            return owner
+
+    def remember(self, prolific_id: str, session_id: str) -> None:
+        with self._lock:
+            self._owners.setdefault(prolific_id, session_id)
+            self._owners.move_to_end(prolific_id)
+            while len(self._owners) > self._max:
+                self._owners.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._owners))
+
+
+_KNOWN_PARTICIPANTS = _KnownParticipants(int(_cfg("PROLIFIC_CACHE_SIZE", default="100000") or 100000))
+
+
+class _VocabProgressCache:
+    """
+    Write-through TTL cache of vocabulary progress (session -> (index, size)).
+
+    The shared vocab_progress row is the source of truth. An entry is only as
+    fresh as this process's last read or write of it, so leave VOCAB_CACHE_TTL_S
+    at 0 (off) unless a session's requests stick to one worker.
+    """
+
+    def __init__(self, max_size: int, ttl_s: float) -> None:
+        self._entries: "OrderedDict[str, Tuple[int, int, float]]" = OrderedDict()
+        self._max = max(1, int(max_size))
+        self._ttl = float(ttl_s)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def lookup(self, session_id: str) -> Optional[Dict[str, int]]:
+        if self._ttl <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(session_id)
+            if hit is None or hit[2] <= now:
+                self._entries.pop(session_id, None)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self._stats["hits"] += 1
+            return {"index": hit[0], "size": hit[1]}
+
+    def remember(self, session_id: str, index: int, size: int) -> None:
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            self._entries[session_id] = (index, size, time.monotonic() + self._ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+_VOCAB_CACHE = _VocabProgressCache(
+    max_size=int(_cfg("VOCAB_CACHE_SIZE", default="10000") or 10000),
+    ttl_s=float(_cfg("VOCAB_CACHE_TTL_S", default="0") or 0),
+)
+
 # =====================================================================
-# SQLITE BACKEND 
+# SQLITE BACKEND
 # =====================================================================
 if STORAGE_BACKEND == "sqlite":
     import sqlite3
-    import threading
+    from itertools import groupby
+
+    # Opt-in group commit: non-durable _put calls are queued and committed in
+    # batches by a single writer thread instead of one commit per row.
+    SQLITE_WRITE_BEHIND = _cfg_flag("SQLITE_WRITE_BEHIND")
+    SQLITE_FLUSH_MS = int(_cfg("SQLITE_FLUSH_MS", default="50") or 50)
+    SQLITE_FLUSH_ROWS = int(_cfg("SQLITE_FLUSH_ROWS", default="256") or 256)
+
+    # RC segments live in the rc_events table; memory only keeps debounce state
+    # for recently active sessions (LRU, see _RCDebouncer).
+    SQLITE_RC_CACHE_SESSIONS = int(_cfg("SQLITE_RC_CACHE_SESSIONS", default="2048") or 2048)
 
-    SESSIONS: Dict[str, Dict[str, Any]] = {}
-    RC_EVENTS: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
+    # One writer connection (serialized by _LOCK) plus one read-only connection
+    # per thread; WAL lets readers run alongside the writer without queueing.
+    _DB_PATH = SQLITE_PATH or "study_data.db"
+    _SHARED_READS = _DB_PATH == ":memory:"  # a private in-memory db has no second connection
 
     _LOCK = threading.RLock()
-    _conn = sqlite3.connect(SQLITE_PATH or "study_data.db", check_same_thread=False)
+    _conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
     with _conn:
         _conn.execute("PRAGMA journal_mode=WAL;")
         _conn.execute("PRAGMA synchronous=NORMAL;")
@@ -125,6 +680,154 @@ if STORAGE_BACKEND == "sqlite":
               PRIMARY KEY (pk, sk)
             )
         """)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS rc_events (
+              pk TEXT NOT NULL,
+              passage_id TEXT NOT NULL,
+              start_time INTEGER NOT NULL,
+              status TEXT NOT NULL,
+              page_name TEXT NOT NULL,
+              duration_ms INTEGER NOT NULL,
+              server_ts INTEGER NOT NULL,
+              PRIMARY KEY (pk, passage_id, start_time, status, page_name)
+            )
+        """)
+        # attention buckets: one row per (session, bucket), incremented in SQL
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS attention (
+              pk TEXT NOT NULL,
+              bucket TEXT NOT NULL,
+              total_ms INTEGER NOT NULL DEFAULT 0,
+              ts INTEGER NOT NULL,
+              PRIMARY KEY (pk, bucket)
+            )
+        """)
+        # returning-participant index: first session to submit each normalized prolific ID
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS known_participants (
+              prolific_id TEXT PRIMARY KEY,
+              pk TEXT NOT NULL,
+              ts INTEGER NOT NULL
+            )
+        """)
+        # vocabulary progress shared by every worker (advanced in SQL) and one row per answer
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS vocab_progress (
+              pk TEXT PRIMARY KEY,
+              next_index INTEGER NOT NULL DEFAULT 0,
+              size INTEGER NOT NULL,
+              ts INTEGER NOT NULL
+            )
+        """)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS vocab_answers (
+              pk TEXT NOT NULL,
+              item_id TEXT NOT NULL,
+              position INTEGER NOT NULL,
+              is_word INTEGER NOT NULL,
+              is_correct INTEGER NOT NULL,
+              rt_ms INTEGER,
+              ts INTEGER NOT NULL,
+              PRIMARY KEY (pk, item_id)
+            )
+        """)
+        if _conn.execute("SELECT 1 FROM known_participants LIMIT 1").fetchone() is None:
+            # one-off backfill from demographics saved before the index existed
+            _conn.execute("""
+                INSERT OR IGNORE INTO known_participants (prolific_id, pk, ts)
+                SELECT lower(trim(json_extract(content_json, '$.payload.prolific_id'))), pk, ts
+                FROM kv
+                WHERE sk = 'DEMOGRAPHICS'
+                  AND trim(coalesce(json_extract(content_json, '$.payload.prolific_id'), '')) <> ''
+                ORDER BY ts
+            """)
+
+    _READERS = threading.local()
+
+    def _reader() -> sqlite3.Connection:
+        conn = getattr(_READERS, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(_DB_PATH)
+            conn.execute("PRAGMA query_only=ON;")
+            _READERS.conn = conn
+        return conn
+
+    def _query_one(sql: str, params: tuple) -> Optional[tuple]:
+        if _SHARED_READS:
+            with _LOCK:
+                return _conn.execute(sql, params).fetchone()
+        return _reader().execute(sql, params).fetchone()
+
+    def _query_all(sql: str, params: tuple) -> List[tuple]:
+        if _SHARED_READS:
+            with _LOCK:
+                return _conn.execute(sql, params).fetchall()
+        return _reader().execute(sql, params).fetchall()
+
+    _KV_UPSERT = (
+        "INSERT INTO kv (pk, sk, content_json, ts) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(pk, sk) DO UPDATE SET content_json=excluded.content_json, ts=excluded.ts"
+    )
+    _KV_INSERT_NEW = "INSERT INTO kv (pk, sk, content_json, ts) VALUES (?, ?, ?, ?) ON CONFLICT(pk, sk) DO NOTHING"
+
+    # first writer keeps the ID; a later session re-using it stays a "returning" participant
+    _KNOWN_INSERT = "INSERT OR IGNORE INTO known_participants (prolific_id, pk, ts) VALUES (?, ?, ?)"
+
+    def _apply_batch(items: List[Tuple[Any, Tuple[str, tuple]]]) -> None:
+        """Run queued (sql, params) ops in ONE transaction; caller holds _LOCK."""
+        try:
+            for sql, group in groupby((op for _, op in items), key=lambda op: op[0]):
+                _conn.executemany(sql, [params for _, params in group])
+            _conn.commit()
+        except Exception:
+            _conn.rollback()
+            raise
+
+    _WRITER: Optional[_WriteBehind] = None
+    if SQLITE_WRITE_BEHIND:
+        # "database is locked" / I/O errors are retried; anything else means the row itself is bad
+        _WRITER = _WriteBehind("sqlite", _apply_batch, flush_ms=SQLITE_FLUSH_MS,
+                               max_rows=SQLITE_FLUSH_ROWS, io_lock=_LOCK,
+                               bad_row=lambda e: not isinstance(e, sqlite3.OperationalError))
+
+    def flush() -> None:
+        if _WRITER is not None:
+            _WRITER.flush()
+
+    def stats() -> Dict[str, Any]:
+        return {"session_cache": _SESSION_CACHE.stats(), "known_participants": _KNOWN_PARTICIPANTS.stats(),
+                "vocab_progress": _VOCAB_CACHE.stats(),
+                "write_behind": _WRITER.stats() if _WRITER is not None else None}
+
+    def shutdown() -> None:
+        if _WRITER is not None:
+            _WRITER.close()
+
+    atexit.register(shutdown)
+
+    @contextmanager
+    def unit_of_work():
+        # every SQLite call already runs on a pooled connection; nothing to scope
+        yield
+
+    _TX = threading.local()
+
+    @contextmanager
+    def _transaction():
+        """Collect the non-durable writes made inside the block and commit them together."""
+        if _WRITER is not None or getattr(_TX, "ops", None) is not None:
+            # write-behind already group-commits; nested blocks join the outer one
+            yield
+            return
+        _TX.ops = []
+        try:
+            yield
+            ops = _TX.ops
+        finally:
+            _TX.ops = None
+        if ops:
+            with _LOCK:
+                _apply_batch(ops)
 
     def _pk(session_id: str) -> str:
         return f"{session_id}"
@@ -133,59 +836,103 @@ if STORAGE_BACKEND == "sqlite":
         return f"{kind}#{suffix}" if suffix else kind
 
     def _get(pk: str, sk: str) -> Optional[Dict[str, Any]]:
-        with _LOCK:
-            cur = _conn.execute("SELECT content_json FROM kv WHERE pk=? AND sk=?", (pk, sk))
-            row = cur.fetchone()
+        if _WRITER is not None:
+            op = _WRITER.get(("kv", pk, sk))
+            if op is not None:
+                return json.loads(op[1][2])
+        row = _query_one("SELECT content_json FROM kv WHERE pk=? AND sk=?", (pk, sk))
         if not row:
             return None
         return json.loads(row[0])
 
-    def _put(pk: str, sk: str, content: Dict[str, Any]) -> None:
-        blob = json.dumps(content, separators=(",", ":"), ensure_ascii=False)
-        ts = _now_ms()
+    def _write_op(key: Tuple[str, ...], sql: str, params: tuple, durable: bool = False) -> None:
+        """Run one keyed write. With write-behind on, only `durable` writes commit before returning."""
+        if not durable:
+            if _WRITER is not None:
+                _WRITER.put(key, (sql, params))
+                return
+            if getattr(_TX, "ops", None) is not None:
+                _TX.ops.append((key, (sql, params)))
+                return
         with _LOCK:
-            _conn.execute(
-                "INSERT INTO kv (pk, sk, content_json, ts) VALUES (?, ?, ?, ?) "
-                "ON CONFLICT(pk, sk) DO UPDATE SET content_json=excluded.content_json, ts=excluded.ts",
-                (pk, sk, blob, ts)
-            )
+            if _WRITER is not None:
+                _WRITER.discard(key)
+            _conn.execute(sql, params)
             _conn.commit()
 
+    def _json(content: Dict[str, Any]) -> str:
+        return json.dumps(content, separators=(",", ":"), ensure_ascii=False)
+
+    def _put(pk: str, sk: str, content: Dict[str, Any], durable: bool = False) -> None:
+        _write_op(("kv", pk, sk), _KV_UPSERT, (pk, sk, _json(content), _now_ms()), durable=durable)
+
     def start_session(session_id: str, source: str | None = None) -> None:
-        SESSIONS[session_id] = {"created_at": time.time(), "source": source, "consent": True}
         profile = {"created_at_ms": _now_ms(), "source": source, "consent": True}
-        _put(_pk(session_id), _sk("PROFILE"), profile)
+        # durable: another worker may serve the next request for this session
+        _put(_pk(session_id), _sk("PROFILE"), profile, durable=True)
+        _SESSION_CACHE.remember(session_id, True)
 
     def session_exists(session_id: str) -> bool:
-        if session_id in SESSIONS:
-            return True
+        cached = _SESSION_CACHE.lookup(session_id)
+        if cached is not None:
+            return cached
         pk = _pk(session_id)
-        with _LOCK:
-            cur = _conn.execute("SELECT 1 FROM kv WHERE pk=? AND sk='PROFILE' LIMIT 1", (pk,))
-            found = cur.fetchone() is not None
-        if found:
-            SESSIONS.setdefault(session_id, {})
+        found = (
+            (_WRITER is not None and _WRITER.get(("kv", pk, _sk("PROFILE"))) is not None)
+            or _query_one("SELECT 1 FROM kv WHERE pk=? AND sk='PROFILE' LIMIT 1", (pk,)) is not None
+        )
+        _SESSION_CACHE.remember(session_id, found)
         return found
 
     def save_demographics(session_id: str, payload: Dict[str, Any], recaptcha_verification: str | None = None) -> None:
         rec = dict(payload)
         if recaptcha_verification in ("yes", "no"):
             rec["recaptcha_verification"] = recaptcha_verification
-        row = {"payload": rec, "server_ts": _now_ms()}
-        _put(_pk(session_id), _sk("DEMOGRAPHICS"), row)
+        pk, now = _pk(session_id), _now_ms()
+        row = {"payload": rec, "server_ts": now}
+        ops = [(("kv", pk, _sk("DEMOGRAPHICS")), (_KV_UPSERT, (pk, _sk("DEMOGRAPHICS"), _json(row), now)))]
+        if recaptcha_verification in ("yes", "no"):
+            prof = _get(pk, _sk("PROFILE")) or {}
+            prof["recaptcha_demographics"] = recaptcha_verification
+            prof["recaptcha_ts"] = now
+            ops.append((("kv", pk, _sk("PROFILE")), (_KV_UPSERT, (pk, _sk("PROFILE"), _json(prof), now))))
+        pid = normalize_prolific_id(rec.get("prolific_id"))
+        if pid:
+            ops.append((("known", pid), (_KNOWN_INSERT, (pid, pk, now))))
+        # demographics, the profile's reCAPTCHA flag and the ID index commit together
+        with _LOCK:
+            if _WRITER is not None:
+                for key, _ in ops:
+                    _WRITER.discard(key)
+            _apply_batch(ops)
+        if pid:
+            _KNOWN_PARTICIPANTS.remember(pid, session_id)
+
+    def prolific_id_owner(prolific_id: str) -> Optional[str]:
+        pid = normalize_prolific_id(prolific_id)
+        if not pid:
+            return None
+        owner = _KNOWN_PARTICIPANTS.lookup(pid)
+        if owner is None:
+            row = _query_one("SELECT pk FROM known_participants WHERE prolific_id=?", (pid,))
+            if row is not None:
+                owner = row[0]
+                _KNOWN_PARTICIPANTS.remember(pid, owner)
+        return owner
 
     def mark_recaptcha_result(session_id: str, endpoint: str, ok: bool) -> None:
         prof = _get(_pk(session_id), _sk("PROFILE")) or {}
         prof[f"recaptcha_{endpoint}"] = "yes" if ok else "no"
         prof["recaptcha_ts"] = _now_ms()
         _put(_pk(session_id), _sk("PROFILE"), prof)
-        SESSIONS.setdefault(session_id, {}).update({"recaptcha_ts": prof["recaptcha_ts"]})
 
-    def set_assignment(session_id: str, passage_ids: List[str]) -> None:
+    def set_assignment(session_id: str, passage_ids: List[str], content_version: Optional[str] = None) -> None:
         row = _get(_pk(session_id), _sk("ASSIGNMENT")) or {}
         row["passage_ids"] = list(passage_ids)
+        if content_version:
+            row["content_version"] = content_version
         row["server_ts"] = _now_ms()
-        _put(_pk(session_id), _sk("ASSIGNMENT"), row)
+        _put(_pk(session_id), _sk("ASSIGNMENT"), row, durable=True)
 
     def get_assignment(session_id: str) -> List[str] | None:
         row = _get(_pk(session_id), _sk("ASSIGNMENT")) or {}
@@ -195,7 +942,32 @@ if STORAGE_BACKEND == "sqlite":
         row = _get(_pk(session_id), _sk("ASSIGNMENT")) or {}
         row["sources"] = dict(mapping)
         row["server_ts"] = _now_ms()
-        _put(_pk(session_id), _sk("ASSIGNMENT"), row)
+        _put(_pk(session_id), _sk("ASSIGNMENT"), row, durable=True)
+
+    def get_assignment_record(session_id: str) -> Optional[Dict[str, Any]]:
+        row = _get(_pk(session_id), _sk("ASSIGNMENT")) or {}
+        if not (row.get("passage_ids") and row.get("sources")):
+            return None
+        return {"passage_ids": row["passage_ids"], "sources": row["sources"],
+                "content_version": row.get("content_version")}
+
+    def create_assignment(session_id: str, passage_ids: List[str], sources: Dict[str, str],
+                          content_version: Optional[str] = None) -> Dict[str, Any]:
+        pk, now = _pk(session_id), _now_ms()
+        row = {"passage_ids": list(passage_ids), "sources": dict(sources), "server_ts": now}
+        if content_version:
+            row["content_version"] = content_version
+        with _LOCK:
+            _conn.execute(_KV_INSERT_NEW, (pk, _sk("ASSIGNMENT"), _json(row), now))
+            _conn.commit()
+            stored = _conn.execute("SELECT content_json FROM kv WHERE pk=? AND sk=?", (pk, _sk("ASSIGNMENT"))).fetchone()
+        stored = json.loads(stored[0])
+        if not (stored.get("passage_ids") and stored.get("sources")):
+            # a half-written row from the old two-step writes: complete it
+            _put(pk, _sk("ASSIGNMENT"), row, durable=True)
+            stored = row
+        return {"passage_ids": stored["passage_ids"], "sources": stored["sources"],
+                "content_version": stored.get("content_version")}
 
     def get_source_for(session_id: str, passage_id: str) -> Optional[str]:
         row = _get(_pk(session_id), _sk("ASSIGNMENT")) or {}
@@ -203,10 +975,11 @@ if STORAGE_BACKEND == "sqlite":
         return srcs.get(passage_id)
 
     def save_mcq_submission(session_id: str, passage_id: str, passage_uid: str, source: str,
-                            per_question: List[Dict[str, Any]], score: int, meta: Dict[str, Any]) -> None:
+                            per_question: List[Dict[str, Any]], score: int, meta: Dict[str, Any],
+                            content_version: Optional[str] = None) -> None:
         item = {"passage_uid": passage_uid, "source": source, "per_question": per_question,
-                "score": score, "meta": meta, "ts": _now_ms()}
-        _put(_pk(session_id), _sk("MCQ", passage_id), item)
+                "score": score, "meta": meta, "content_version": content_version, "ts": _now_ms()}
+        _put(_pk(session_id), _sk("MCQ", passage_id), item, durable=True)
 
     def get_mcq_submission(session_id: str, passage_id: str) -> Optional[Dict[str, Any]]:
         return _get(_pk(session_id), _sk("MCQ", passage_id))
@@ -219,20 +992,80 @@ if STORAGE_BACKEND == "sqlite":
         merged.update(ratings)
         _put(key_pk, key_sk, {"ratings": merged, "ts": _now_ms()})
 
-    VOCAB_PROGRESS: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    # Vocab progress is written straight through (never write-behind): the next
+    # /api/vocab/next may land on another worker and must see the new index.
+    _VOCAB_INIT = (
+        "INSERT INTO vocab_progress (pk, next_index, size, ts) VALUES (?, 0, ?, ?) "
+        "ON CONFLICT(pk) DO UPDATE SET next_index=0, size=excluded.size, ts=excluded.ts"
+    )
+    # the answer is stamped with the position it was served at; a repeat of an item is ignored
+    _VOCAB_ANSWER = (
+        "INSERT OR IGNORE INTO vocab_answers (pk, item_id, position, is_word, is_correct, rt_ms, ts) "
+        "SELECT pk, ?, next_index, ?, ?, ?, ? FROM vocab_progress WHERE pk=?"
+    )
 
     def init_vocab(session_id: str, size: int) -> None:
-        VOCAB_PROGRESS[session_id] = {"index": 0, "size": size}
-
-    def advance_vocab(session_id: str, item_id: str, is_word: bool, rt_ms: int | None, is_correct: bool) -> None:
-        prog = VOCAB_PROGRESS[session_id]
-        prog["index"] = int(prog.get("index", 0)) + 1
+        pk = _pk(session_id)
+        with _LOCK:
+            _apply_batch([
+                (None, ("DELETE FROM vocab_answers WHERE pk=?", (pk,))),
+                (None, (_VOCAB_INIT, (pk, int(size), _now_ms()))),
+            ])
+        _VOCAB_CACHE.remember(session_id, 0, int(size))
+
+    def advance_vocab(session_id: str, item_id: str, is_word: bool, rt_ms: int | None, is_correct: bool) -> Dict[str, Any]:
+        pk, now = _pk(session_id), _now_ms()
+        with _LOCK:
+            try:
+                # the INSERT takes the write lock, so the bump below is atomic across processes too
+                cur = _conn.execute(_VOCAB_ANSWER, (item_id, int(bool(is_word)), int(bool(is_correct)), rt_ms, now, pk))
+                if cur.rowcount > 0:
+                    _conn.execute("UPDATE vocab_progress SET next_index=next_index+1, ts=? WHERE pk=?", (now, pk))
+                _conn.commit()
+            except Exception:
+                _conn.rollback()
+                raise
+            row = _conn.execute("SELECT next_index, size FROM vocab_progress WHERE pk=?", (pk,)).fetchone()
+        if row is None:
+            return {"index": 0, "size": 0}
+        _VOCAB_CACHE.remember(session_id, row[0], row[1])
+        return {"index": row[0], "size": row[1]}
 
     def get_vocab_progress(session_id: str) -> Dict[str, Any]:
-        return VOCAB_PROGRESS.get(session_id, {"index": 0, "size": 0})
+        cached = _VOCAB_CACHE.lookup(session_id)
+        if cached is not None:
+            return cached
+        row = _query_one("SELECT next_index, size FROM vocab_progress WHERE pk=?", (_pk(session_id),))
+        if row is None:
+            return {"index": 0, "size": 0}
+        _VOCAB_CACHE.remember(session_id, row[0], row[1])
+        return {"index": row[0], "size": row[1]}
+
+    _VOCAB_ANSWER_ROW = (
+        "INSERT OR IGNORE INTO vocab_answers (pk, item_id, position, is_word, is_correct, rt_ms, ts) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _VOCAB_RECOUNT = (
+        "UPDATE vocab_progress SET next_index=(SELECT count(*) FROM vocab_answers WHERE pk=?), ts=? WHERE pk=?"
+    )
 
-    def save_vocab_final(session_id: str, trials: List[Dict[str, Any]]) -> None:
-        _put(_pk(session_id), _sk("VOCAB"), {"trials": trials, "ts": _now_ms()})
+    def save_vocab_final(session_id: str, trials: List[Dict[str, Any]],
+                         answers: Optional[List[Dict[str, Any]]] = None) -> None:
+        if answers is None:
+            _put(_pk(session_id), _sk("VOCAB"), {"trials": trials, "ts": _now_ms()}, durable=True)
+            return
+        pk, now = _pk(session_id), _now_ms()
+        ops = [(("kv", pk, _sk("VOCAB")), (_KV_UPSERT, (pk, _sk("VOCAB"), _json({"trials": trials, "ts": now}), now)))]
+        ops += [(None, (_VOCAB_ANSWER_ROW, (pk, a["item_id"], a["position"], int(bool(a["is_word"])),
+                                            int(bool(a["is_correct"])), a.get("rt_ms"), now)))
+                for a in answers]
+        ops.append((None, (_VOCAB_RECOUNT, (pk, now, pk))))
+        # the final row, the answers and the progress count commit together
+        with _LOCK:
+            if _WRITER is not None:
+                _WRITER.discard(("kv", pk, _sk("VOCAB")))
+            _apply_batch(ops)
+        _VOCAB_CACHE.forget(session_id)
 
     def final_check(session_id: str, data: Dict[str, Any], recaptcha_verification: str | None = None) -> None:
         prof = _get(_pk(session_id), _sk("PROFILE")) or {}
@@ -245,7 +1078,7 @@ if STORAGE_BACKEND == "sqlite":
         if recaptcha_verification in ("yes", "no"):
             rec["recaptcha_verification"] = recaptcha_verification
         prof["final_check"] = rec
-        _put(_pk(session_id), _sk("PROFILE"), prof)
+        _put(_pk(session_id), _sk("PROFILE"), prof, durable=True)
 
     def log_total_participation_time(session_id: str, finished_at_ms: Optional[int] = None) -> Dict[str, Any]:
         prof = _get(_pk(session_id), _sk("PROFILE"))
@@ -258,82 +1091,125 @@ if STORAGE_BACKEND == "sqlite":
         total_ms = max(0, end_ms - start_ms)
         prof["participation_end_ms"] = end_ms
         prof["total_participation_ms"] = total_ms
-        _put(_pk(session_id), _sk("PROFILE"), prof)
+        _put(_pk(session_id), _sk("PROFILE"), prof, durable=True)
         return {"session_id": session_id, "total_participation_ms": total_ms}
 
+    _ATTENTION_INC = (
+        "INSERT INTO attention (pk, bucket, total_ms, ts) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(pk, bucket) DO UPDATE SET total_ms = total_ms + excluded.total_ms, ts = excluded.ts"
+    )
+
+    def _sum_inc(old: Tuple[str, tuple], new: Tuple[str, tuple]) -> Tuple[str, tuple]:
+        pk, bucket, old_inc, _ = old[1]
+        return (new[0], (pk, bucket, old_inc + new[1][2], new[1][3]))
+
     def log_total_task_time(session_id: str, bucket: str, elapsed_ms: int) -> Dict[str, Any]:
-        key_pk, key_sk = _pk(session_id), _sk("TASK_TIME")
-        cur = _get(key_pk, key_sk) or {"buckets": dict(DEFAULT_BUCKETS)}
+        if bucket not in DEFAULT_BUCKETS:
+            return {"session_id": session_id, "ignored_bucket": bucket}
         try:
             inc = int(elapsed_ms)
         except Exception:
             inc = 0
         inc = max(0, min(inc, _ATTENTION_MAX_INC_MS))
 
-        buckets = cur.get("buckets") or {}
-        if bucket not in buckets:
-            return {"session_id": session_id, "ignored_bucket": bucket}
+        pk = _pk(session_id)
+        if _WRITER is not None:
+            _WRITER.put(("attention", pk, bucket), (_ATTENTION_INC, (pk, bucket, inc, _now_ms())), merge=_sum_inc)
+            # committed total plus whatever is still queued for this bucket
+            row = _query_one("SELECT total_ms FROM attention WHERE pk=? AND bucket=?", (pk, bucket))
+            queued = _WRITER.get(("attention", pk, bucket))
+            total = (int(row[0]) if row else 0) + (queued[1][2] if queued else 0)
+            return {"session_id": session_id, "bucket": bucket, "total_ms": total}
+        if getattr(_TX, "ops", None) is not None:
+            # inside a batch: the increment commits with the rest of it
+            _TX.ops.append((("attention", pk, bucket), (_ATTENTION_INC, (pk, bucket, inc, _now_ms()))))
+            return {"session_id": session_id, "bucket": bucket}
 
-        buckets[bucket] = int(buckets.get(bucket, 0)) + inc
-        cur["buckets"] = buckets
-        cur["ts"] = _now_ms()
-        _put(key_pk, key_sk, cur)
-        return {"session_id": session_id, "bucket": bucket, "total_ms": buckets[bucket]}
+        with _LOCK:
+            total = _conn.execute(_ATTENTION_INC + " RETURNING total_ms", (pk, bucket, inc, _now_ms())).fetchone()[0]
+            _conn.commit()
+        return {"session_id": session_id, "bucket": bucket, "total_ms": int(total)}
+
+    def get_task_time(session_id: str) -> Dict[str, int]:
+        flush()
+        out = dict(DEFAULT_BUCKETS)
+        # sessions that started before the attention table existed kept a TASK_TIME blob
+        legacy = (_get(_pk(session_id), _sk("TASK_TIME")) or {}).get("buckets") or {}
+        for b, ms in legacy.items():
+            if b in out:
+                out[b] += int(ms or 0)
+        for b, ms in _query_all("SELECT bucket, total_ms FROM attention WHERE pk=?", (_pk(session_id),)):
+            if b in out:
+                out[b] += int(ms or 0)
+        return out
+
+    _RC_COLS = "passage_id, start_time, status, page_name, duration_ms, server_ts"
+    _RC_UPSERT = (
+        f"INSERT INTO rc_events (pk, {_RC_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(pk, passage_id, start_time, status, page_name) "
+        "DO UPDATE SET duration_ms=excluded.duration_ms, server_ts=excluded.server_ts"
+    )
+    _RC_DELETE = "DELETE FROM rc_events WHERE pk=? AND passage_id=? AND start_time=? AND status=? AND page_name=?"
 
-    def log_reading_comprehension_details(session_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
-        passage_id = str(event.get("passage_id") or "")
-        status = str(event.get("status") or "active")
-        page_name = str(event.get("page_name") or "unknown")
-        start_time = int(event.get("start_time") or 0)
-        try:
-            duration_ms = int(event.get("duration_ms") or 0)
-        except Exception:
-            duration_ms = 0
-        duration_ms = max(0, min(duration_ms, _RC_MAX_SEG_MS))
-        server_ts = _now_ms()
+    def _rc_key(rec: Dict[str, Any]) -> Tuple[str, ...]:
+        return ("rc", _pk(rec["session_id"]), rec["passage_id"], rec["start_time"], rec["status"], rec["page_name"])
 
-        events = RC_EVENTS[session_id]
-        has_active_before = any(ev.get("passage_id") == passage_id and ev.get("status") == "active" for ev in events)
+    def _rc_save(rec: Dict[str, Any]) -> None:
+        _write_op(_rc_key(rec), _RC_UPSERT, (_pk(rec["session_id"]), rec["passage_id"], rec["start_time"],
+                                             rec["status"], rec["page_name"], rec["duration_ms"], rec["server_ts"]))
 
-        if status == "blur" and not has_active_before and page_name == "unknown" and duration_ms <= _RC_SPURIOUS_BLUR_MAX_MS:
-            return {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
-                    "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts, "suppressed": True}
+    def _rc_delete(rec: Dict[str, Any]) -> None:
+        _write_op(_rc_key(rec), _RC_DELETE, (_pk(rec["session_id"]), rec["passage_id"], rec["start_time"],
+                                             rec["status"], rec["page_name"]))
 
-        if status == "active" and not has_active_before:
-            for i in range(len(events) - 1, -1, -1):
-                ev = events[i]
-                if ev.get("passage_id") == passage_id:
-                    if ev.get("status") == "blur" and (ev.get("page_name") or "unknown") == "unknown" and int(ev.get("duration_ms") or 0) <= _RC_SPURIOUS_BLUR_MAX_MS:
-                        events.pop(i)
-                    break
+    def _rc_row(session_id: str, row: tuple) -> Dict[str, Any]:
+        passage_id, start_time, status, page_name, duration_ms, server_ts = row
+        return {"session_id": session_id, "start_time": int(start_time), "status": status, "passage_id": passage_id,
+                "page_name": page_name, "duration_ms": int(duration_ms), "server_ts": int(server_ts)}
 
-        if duration_ms < _RC_MIN_SEG_MS:
-            return {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
-                    "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts, "suppressed": True}
+    def _rc_queued(session_id: str) -> List[Tuple[bool, Dict[str, Any]]]:
+        """This session's RC writes not committed yet (write-behind queue, open unit of work)."""
+        pk = _pk(session_id)
+        ops = _WRITER.queued(lambda k: k[0] == "rc" and k[1] == pk) if _WRITER is not None else []
+        ops += [(k, op) for k, op in (getattr(_TX, "ops", None) or []) if k[0] == "rc" and k[1] == pk]
+        out = []
+        for _, (sql, params) in ops:
+            if sql == _RC_DELETE:
+                out.append((True, _rc_row(session_id, (*params[1:], 0, 0))))
+            else:
+                out.append((False, _rc_row(session_id, params[1:])))
+        return out
 
-        if events:
-            prev = events[-1]
-            if prev.get("passage_id") == passage_id and prev.get("status") == status and (prev.get("page_name") or "unknown") == page_name:
-                prev_end = int(prev.get("start_time", 0)) + int(prev.get("duration_ms", 0))
-                gap = max(0, start_time - prev_end)
-                if gap <= _RC_MERGE_GAP_MS:
-                    prev["duration_ms"] = min(int(prev["duration_ms"]) + duration_ms + gap, _RC_MAX_SEG_MS)
-                    prev["server_ts"] = server_ts
-                    from_time = f"{prev['start_time']:013d}"  # keep same key if you also persist elsewhere
-                    return prev
+    def _rc_load(session_id: str) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[bool, List[Dict[str, Any]]]]]:
+        # queued first: a row flushed while we read then shows up in both, never in neither
+        queued = _rc_queued(session_id)
+        pk = _pk(session_id)
+        rows = _query_all(f"SELECT {_RC_COLS} FROM rc_events WHERE pk=? ORDER BY rowid DESC LIMIT ?", (pk, _RC_TAIL_LEN))
+        by_passage: Dict[str, Tuple[bool, List[Dict[str, Any]]]] = {}
+        for pid, n_active in _query_all(
+            "SELECT passage_id, SUM(status='active') FROM rc_events WHERE pk=? GROUP BY passage_id", (pk,)
+        ):
+            latest: List[Dict[str, Any]] = []
+            if not n_active:
+                latest = [_rc_row(session_id, r) for r in _query_all(
+                    f"SELECT {_RC_COLS} FROM rc_events WHERE pk=? AND passage_id=? ORDER BY rowid DESC LIMIT ?",
+                    (pk, pid, _RC_BLUR_RUN_MAX))]
+            by_passage[pid] = (bool(n_active), latest)
+        return _rc_overlay([_rc_row(session_id, r) for r in reversed(rows)], by_passage, queued)
+
+    _RC = _RCDebouncer(_rc_load, _rc_save, _rc_delete, max_sessions=SQLITE_RC_CACHE_SESSIONS)
 
-        rec = {"session_id": session_id, "start_time": start_time, "status": status, "passage_id": passage_id,
-               "page_name": page_name, "duration_ms": duration_ms, "server_ts": server_ts}
-        RC_EVENTS[session_id].append(rec)
-        return rec
+    def log_reading_comprehension_details(session_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        return _RC.log(session_id, event)
 
 # =====================================================================
 # AURORA (MySQL) BACKEND  — NEW
 # =====================================================================
 elif STORAGE_BACKEND == "aurora":
     # SQLAlchemy models + session
-    from sqlalchemy import select
-    from sqlalchemy.exc import IntegrityError
+    import datetime
+    from sqlalchemy import bindparam, case, cast, delete, func, select, update
+    from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError
     from backend.database import SessionLocal, init_db
     from backend.models import (
         Session as DBSession,
@@ -346,37 +1222,213 @@ elif STORAGE_BACKEND == "aurora":
         AttentionLog as DBAttentionLog,
         BucketNameEnum,
         FinalCheck as DBFinalCheck,
+        KnownParticipant as DBKnownParticipant,
+        VocabProgress as DBVocabProgress,
+        VocabAnswer as DBVocabAnswer,
     )
 
     # initialize tables if needed
     init_db()
 
-    # Small in-process for vocab "progress only"
-    VOCAB_PROGRESS: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    def _backfill_known_participants() -> None:
+        """One-off: index prolific IDs from demographics saved before known_participants existed."""
+        db = SessionLocal()
+        try:
+            if db.execute(select(DBKnownParticipant.prolific_id).limit(1)).first() is not None:
+                return
+            norm = func.lower(func.trim(DBDemographics.prolific_id))
+            src = (
+                select(norm, func.min(DBDemographics.session_id), func.min(DBDemographics.server_ts))
+                .where(func.coalesce(func.trim(DBDemographics.prolific_id), "") != "")
+                .group_by(norm)
+            )
+            db.execute(DBKnownParticipant.__table__.insert().from_select(
+                ["prolific_id", "session_id", "created_at"], src))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print("[storage] known_participants backfill failed:", repr(e))
+        finally:
+            db.close()
+
+    _backfill_known_participants()
+
+    # Request-scoped unit of work: inside `with unit_of_work():` every storage
+    # call shares one SQLAlchemy session (one pool checkout, one pre-ping) and
+    # one transaction, committed when the block exits cleanly.
+    _UOW: ContextVar[Optional[Any]] = ContextVar("storage_uow", default=None)
 
     def _db():
         return SessionLocal()
 
-    def start_session(session_id: str, source: str | None = None) -> None:
+    @contextmanager
+    def unit_of_work():
+        if _UOW.get() is not None:
+            yield  # nested: join the outer unit of work
+            return
         db = _db()
+        token = _UOW.set(db)
         try:
-            exists = db.get(DBSession, session_id)
-            if not exists:
-                db.add(DBSession(id=session_id, source=source, consent=True))
-                db.commit()
+            yield
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
         finally:
+            _UOW.reset(token)
             db.close()
 
-    def session_exists(session_id: str) -> bool:
+    # a telemetry batch is just one unit of work; RC rows are buffered by _RC_WRITER anyway
+    _transaction = unit_of_work
+
+    @contextmanager
+    def _session():
+        db = _UOW.get()
+        if db is not None:
+            yield db
+            return
         db = _db()
         try:
-            return db.get(DBSession, session_id) is not None
+            yield db
         finally:
             db.close()
 
-    def save_demographics(session_id: str, payload: Dict[str, Any], recaptcha_verification: str | None = None) -> None:
-        db = _db()
+    def _commit(db) -> None:
+        """Commit a standalone session; inside a unit of work only flush (the block commits)."""
+        if db is _UOW.get():
+            db.flush()
+        else:
+            db.commit()
+
+    def _upsert(db, model, values: Dict[str, Any] | List[Dict[str, Any]], keys: List[str],
+                update: Callable[[Any], Dict[str, Any]]) -> None:
+        """
+        Single-statement INSERT-or-UPDATE for the bound dialect (one row or a
+        multi-row VALUES list).
+
+        `update(new)` maps column names to SET expressions, where `new` is the
+        incoming row (MySQL `VALUES(...)`, SQLite/Postgres `excluded`). `keys`
+        are the unique columns SQLite and Postgres need as the conflict target.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+            stmt = dialect_insert(model).values(values)
+            stmt = stmt.on_duplicate_key_update(**update(stmt.inserted))
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(model).values(values)
+            stmt = stmt.on_conflict_do_update(index_elements=keys, set_=update(stmt.excluded))
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(model).values(values)
+            stmt = stmt.on_conflict_do_update(index_elements=keys, set_=update(stmt.excluded))
+        else:
+            raise RuntimeError(f"No native upsert for dialect '{dialect}'")
+        db.execute(stmt)
+
+    def _insert_ignore(db, model, values: Dict[str, Any] | List[Dict[str, Any]]) -> bool:
+        """INSERT that skips rows colliding with a unique key; True when any row was new."""
+        dialect = db.get_bind().dialect.name
+        if dialect in ("mysql", "mariadb"):
+            stmt = model.__table__.insert().values(values).prefix_with("IGNORE")
+        elif dialect == "sqlite":
+            stmt = model.__table__.insert().values(values).prefix_with("OR IGNORE")
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(model).values(values).on_conflict_do_nothing()
+        else:
+            raise RuntimeError(f"No INSERT IGNORE for dialect '{dialect}'")
+        return db.execute(stmt).rowcount > 0
+
+    def _upsert_for_session(db, model, values: Dict[str, Any], keys: List[str],
+                            update: Callable[[Any], Dict[str, Any]]) -> None:
+        """_upsert for per-session rows; a missing session (FK violation) surfaces as ValueError."""
+        try:
+            _upsert(db, model, values, keys=keys, update=update)
+        except IntegrityError as e:
+            raise ValueError("Session not found.") from e
+
+    def _json_merge(db, column, incoming):
+        """SQL expression merging the `incoming` JSON object into `column` (top-level keys)."""
+        dialect = db.get_bind().dialect.name
+        if dialect in ("mysql", "mariadb"):
+            return func.json_merge_patch(func.coalesce(column, "{}"), incoming)
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+            merged = cast(func.coalesce(column, "{}"), JSONB).op("||")(cast(incoming, JSONB))
+            return cast(merged, column.type)
+        return func.json_patch(func.coalesce(column, "{}"), incoming)
+
+    # RC segments: debounced in memory with the same rules as SQLite, then
+    # written by a background writer in multi-row batches (not one commit per beacon).
+    RC_FLUSH_MS = int(_cfg("RC_FLUSH_MS", default="1000") or 1000)
+    RC_FLUSH_ROWS = int(_cfg("RC_FLUSH_ROWS", default="500") or 500)
+    RC_MAX_PENDING = int(_cfg("RC_MAX_PENDING", default="20000") or 20000)
+    RC_CACHE_SESSIONS = int(_cfg("RC_CACHE_SESSIONS", default="2048") or 2048)
+
+    _RC_KEY_COLS = ("session_id", "passage_id", "start_time", "status", "page_name")
+
+    def _rc_apply_batch(items: List[Tuple[Any, Tuple[str, Dict[str, Any]]]]) -> None:
+        saves = [row for _, (kind, row) in items if kind == "save"]
+        deletes = [row for _, (kind, row) in items if kind == "delete"]
+        db = _db()  # never the request's unit of work: this may run on the writer thread
         try:
+            if deletes:
+                t = DBRCEvent.__table__
+                db.execute(
+                    t.delete().where(*(t.c[c] == bindparam(f"b_{c}") for c in _RC_KEY_COLS)),
+                    [{f"b_{c}": row[c] for c in _RC_KEY_COLS} for row in deletes],
+                )
+            if saves:
+                _upsert(db, DBRCEvent, saves, keys=list(_RC_KEY_COLS),
+                        update=lambda new: {"duration_ms": new.duration_ms, "server_ts": new.server_ts})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _rc_bad_row(e: BaseException) -> bool:
+        # lost connections, deadlocks and timeouts are retried; data errors drop the row
+        return not isinstance(e, (OperationalError, InterfaceError)) and not getattr(e, "connection_invalidated", False)
+
+    _RC_WRITER = _WriteBehind("aurora-rc", _rc_apply_batch, flush_ms=RC_FLUSH_MS,
+                              max_rows=RC_FLUSH_ROWS, max_pending=RC_MAX_PENDING, bad_row=_rc_bad_row)
+
+    def flush() -> None:
+        _RC_WRITER.flush()
+
+    def shutdown() -> None:
+        _RC_WRITER.close()
+
+    atexit.register(shutdown)
+
+    def stats() -> Dict[str, Any]:
+        return {"session_cache": _SESSION_CACHE.stats(), "known_participants": _KNOWN_PARTICIPANTS.stats(),
+                "vocab_progress": _VOCAB_CACHE.stats(),
+                "rc_buffer": _RC_WRITER.stats()}
+
+    def start_session(session_id: str, source: str | None = None) -> None:
+        with _session() as db:
+            exists = db.get(DBSession, session_id)
+            if not exists:
+                db.add(DBSession(id=session_id, source=source, consent=True))
+                _commit(db)
+        _SESSION_CACHE.remember(session_id, True)
+
+    def session_exists(session_id: str) -> bool:
+        cached = _SESSION_CACHE.lookup(session_id)
+        if cached is not None:
+            return cached
+        with _session() as db:
+            found = db.get(DBSession, session_id) is not None
+        _SESSION_CACHE.remember(session_id, found)
+        return found
+
+    def save_demographics(session_id: str, payload: Dict[str, Any], recaptcha_verification: str | None = None) -> None:
+        with _session() as db:
             sess = db.get(DBSession, session_id)
             if not sess:
                 raise ValueError("Session not found.")
@@ -396,18 +1448,35 @@ elif STORAGE_BACKEND == "aurora":
             if recaptcha_verification in ("yes", "no"):
                 row.recaptcha_verification = recaptcha_verification
             row.server_ts = row.server_ts or None  # default handled by model
-            db.commit()
-        finally:
-            db.close()
+            pid = normalize_prolific_id(payload.get("prolific_id"))
+            if pid:
+                # first session keeps the ID (self-assignment = no-op on conflict)
+                _upsert(db, DBKnownParticipant, {"prolific_id": pid, "session_id": session_id},
+                        keys=["prolific_id"], update=lambda new: {"session_id": DBKnownParticipant.session_id})
+            _commit(db)
+        if pid:
+            _KNOWN_PARTICIPANTS.remember(pid, session_id)
+
+    def prolific_id_owner(prolific_id: str) -> Optional[str]:
+        pid = normalize_prolific_id(prolific_id)
+        if not pid:
+            return None
+        owner = _KNOWN_PARTICIPANTS.lookup(pid)
+        if owner is None:
+            with _session() as db:
+                row = db.get(DBKnownParticipant, pid)
+                owner = row.session_id if row is not None else None
+            if owner is not None:
+                _KNOWN_PARTICIPANTS.remember(pid, owner)
+        return owner
 
     def mark_recaptcha_result(session_id: str, endpoint: str, ok: bool) -> None:
         # Optional: you can store these flags somewhere if you like.
         # Not strictly needed by the rest of the app.
         return
 
-    def set_assignment(session_id: str, passage_ids: List[str]) -> None:
-        db = _db()
-        try:
+    def set_assignment(session_id: str, passage_ids: List[str], content_version: Optional[str] = None) -> None:
+        with _session() as db:
             sess = db.get(DBSession, session_id)
             if not sess:
                 raise ValueError("Session not found.")
@@ -417,21 +1486,17 @@ elif STORAGE_BACKEND == "aurora":
                 db.add(row)
             else:
                 row.passage_ids = list(passage_ids)
-            db.commit()
-        finally:
-            db.close()
+            if content_version:
+                row.content_version = content_version
+            _commit(db)
 
     def get_assignment(session_id: str) -> List[str] | None:
-        db = _db()
-        try:
+        with _session() as db:
             row = db.get(DBAssignment, session_id)
             return (row.passage_ids if row else None)
-        finally:
-            db.close()
 
     def set_source_assignment(session_id: str, mapping: Dict[str, str]) -> None:
-        db = _db()
-        try:
+        with _session() as db:
             row = db.get(DBAssignment, session_id)
             if not row:
                 # If randomize called fresh, set both
@@ -439,55 +1504,67 @@ elif STORAGE_BACKEND == "aurora":
                 db.add(row)
             else:
                 row.sources = dict(mapping)
-            db.commit()
-        finally:
-            db.close()
+            _commit(db)
+
+    def get_assignment_record(session_id: str) -> Optional[Dict[str, Any]]:
+        with _session() as db:
+            row = db.get(DBAssignment, session_id)
+            if row is None or not (row.passage_ids and row.sources):
+                return None
+            return {"passage_ids": list(row.passage_ids), "sources": dict(row.sources),
+                    "content_version": row.content_version}
+
+    def create_assignment(session_id: str, passage_ids: List[str], sources: Dict[str, str],
+                          content_version: Optional[str] = None) -> Dict[str, Any]:
+        with _session() as db:
+            # insert-if-absent (self-assignment = no-op on conflict): the first writer wins
+            _upsert_for_session(db, DBAssignment,
+                                {"session_id": session_id, "passage_ids": list(passage_ids),
+                                 "sources": dict(sources), "content_version": content_version},
+                                keys=["session_id"], update=lambda new: {"session_id": DBAssignment.session_id})
+            row = db.execute(
+                select(DBAssignment).where(DBAssignment.session_id == session_id)
+                .execution_options(populate_existing=True)
+            ).scalar_one()
+            if not (row.passage_ids and row.sources):
+                # a half-written row from the old two-step writes: complete it
+                row.passage_ids, row.sources = list(passage_ids), dict(sources)
+                row.content_version = content_version
+            _commit(db)
+            return {"passage_ids": list(row.passage_ids), "sources": dict(row.sources),
+                    "content_version": row.content_version}
 
     def get_source_for(session_id: str, passage_id: str) -> Optional[str]:
-        db = _db()
-        try:
+        with _session() as db:
             row = db.get(DBAssignment, session_id)
             if not row:
                 return None
             srcs = row.sources or {}
             return srcs.get(passage_id)
-        finally:
-            db.close()
 
     def save_mcq_submission(session_id: str, passage_id: str, passage_uid: str, source: str,
-                            per_question: List[Dict[str, Any]], score: int, meta: Dict[str, Any]) -> None:
-        db = _db()
-        try:
-            exists_stmt = select(DBMCQSubmission).where(
-                DBMCQSubmission.session_id == session_id, DBMCQSubmission.passage_id == passage_id
+                            per_question: List[Dict[str, Any]], score: int, meta: Dict[str, Any],
+                            content_version: Optional[str] = None) -> None:
+        values = {
+            "session_id": session_id,
+            "passage_id": passage_id,
+            "passage_uid": passage_uid,
+            "source": source,
+            "per_question": per_question,
+            "score": score,
+            "time_on_questions_ms": (meta or {}).get("time_on_questions_ms"),
+            "back_to_passage_clicks": int((meta or {}).get("back_to_passage_clicks") or 0),
+            "content_version": content_version,
+        }
+        with _session() as db:
+            _upsert_for_session(
+                db, DBMCQSubmission, values, keys=["session_id", "passage_id"],
+                update=lambda new: {c: getattr(new, c) for c in values if c not in ("session_id", "passage_id")},
             )
-            existing = db.execute(exists_stmt).scalar_one_or_none()
-            if existing:
-                existing.passage_uid = passage_uid
-                existing.source = source
-                existing.per_question = per_question
-                existing.score = score
-                existing.time_on_questions_ms = (meta or {}).get("time_on_questions_ms")
-                existing.back_to_passage_clicks = int((meta or {}).get("back_to_passage_clicks") or 0)
-            else:
-                row = DBMCQSubmission(
-                    session_id=session_id,
-                    passage_id=passage_id,
-                    passage_uid=passage_uid,
-                    source=source,
-                    per_question=per_question,
-                    score=score,
-                    time_on_questions_ms=(meta or {}).get("time_on_questions_ms"),
-                    back_to_passage_clicks=int((meta or {}).get("back_to_passage_clicks") or 0),
-                )
-                db.add(row)
-            db.commit()
-        finally:
-            db.close()
+            _commit(db)
 
     def get_mcq_submission(session_id: str, passage_id: str) -> Optional[Dict[str, Any]]:
-        db = _db()
-        try:
+        with _session() as db:
             stmt = select(DBMCQSubmission).where(
                 DBMCQSubmission.session_id == session_id, DBMCQSubmission.passage_id == passage_id
             )
@@ -503,81 +1580,104 @@ elif STORAGE_BACKEND == "aurora":
                     "time_on_questions_ms": row.time_on_questions_ms,
                     "back_to_passage_clicks": row.back_to_passage_clicks,
                 },
+                "content_version": row.content_version,
                 "ts": int(row.created_at.timestamp() * 1000) if row.created_at else _now_ms(),
             }
-        finally:
-            db.close()
 
     def save_posttask_feedback(session_id: str, passage_uid: str, ratings: Dict[str, int]) -> None:
-        db = _db()
-        try:
-            stmt = select(DBPostTaskFeedback).where(
-                DBPostTaskFeedback.session_id == session_id,
-                DBPostTaskFeedback.passage_uid == passage_uid
+        with _session() as db:
+            _upsert_for_session(
+                db, DBPostTaskFeedback,
+                {"session_id": session_id, "passage_uid": passage_uid, "ratings": ratings or {}},
+                keys=["session_id", "passage_uid"],
+                update=lambda new: {"ratings": _json_merge(db, DBPostTaskFeedback.ratings, new.ratings)},
             )
-            row = db.execute(stmt).scalar_one_or_none()
-            if row:
-                merged = dict(row.ratings or {})
-                merged.update(ratings or {})
-                row.ratings = merged
-            else:
-                db.add(DBPostTaskFeedback(session_id=session_id, passage_uid=passage_uid, ratings=ratings or {}))
-            db.commit()
-        finally:
-            db.close()
+            _commit(db)
 
     def init_vocab(session_id: str, size: int) -> None:
-        VOCAB_PROGRESS[session_id] = {"index": 0, "size": size}
-
-    def advance_vocab(session_id: str, item_id: str, is_word: bool, rt_ms: int | None, is_correct: bool) -> None:
-        prog = VOCAB_PROGRESS[session_id]
-        prog["index"] = int(prog.get("index", 0)) + 1
+        with _session() as db:
+            db.execute(delete(DBVocabAnswer).where(DBVocabAnswer.session_id == session_id))
+            _upsert_for_session(
+                db, DBVocabProgress, {"session_id": session_id, "next_index": 0, "size": int(size)},
+                keys=["session_id"], update=lambda new: {"next_index": 0, "size": new.size},
+            )
+            _commit(db)
+        _VOCAB_CACHE.remember(session_id, 0, int(size))
+
+    def advance_vocab(session_id: str, item_id: str, is_word: bool, rt_ms: int | None, is_correct: bool) -> Dict[str, Any]:
+        with _session() as db:
+            # row lock: concurrent answers for one session take turns, so positions stay distinct
+            row = db.execute(
+                select(DBVocabProgress.next_index, DBVocabProgress.size)
+                .where(DBVocabProgress.session_id == session_id).with_for_update()
+            ).first()
+            if row is None:
+                return {"index": 0, "size": 0}
+            index, size = row
+            recorded = _insert_ignore(db, DBVocabAnswer, {
+                "session_id": session_id, "item_id": item_id, "position": index,
+                "is_word": bool(is_word), "is_correct": bool(is_correct), "rt_ms": rt_ms,
+            })
+            if recorded:  # a repeated item is not counted twice
+                db.execute(update(DBVocabProgress).where(DBVocabProgress.session_id == session_id)
+                           .values(next_index=DBVocabProgress.next_index + 1))
+                index += 1
+            _commit(db)
+        _VOCAB_CACHE.remember(session_id, index, size)
+        return {"index": index, "size": size}
 
     def get_vocab_progress(session_id: str) -> Dict[str, Any]:
-        return VOCAB_PROGRESS.get(session_id, {"index": 0, "size": 0})
-
-    def save_vocab_final(session_id: str, trials: List[Dict[str, Any]]) -> None:
-        db = _db()
-        try:
-            row = db.get(DBVocabFinal, session_id)
-            if row:
-                row.trials = trials or []
-            else:
-                db.add(DBVocabFinal(session_id=session_id, trials=trials or []))
-            db.commit()
-        finally:
-            db.close()
+        cached = _VOCAB_CACHE.lookup(session_id)
+        if cached is not None:
+            return cached
+        with _session() as db:
+            row = db.execute(
+                select(DBVocabProgress.next_index, DBVocabProgress.size)
+                .where(DBVocabProgress.session_id == session_id)
+            ).first()
+        if row is None:
+            return {"index": 0, "size": 0}
+        _VOCAB_CACHE.remember(session_id, row[0], row[1])
+        return {"index": row[0], "size": row[1]}
+
+    def save_vocab_final(session_id: str, trials: List[Dict[str, Any]],
+                         answers: Optional[List[Dict[str, Any]]] = None) -> None:
+        with _session() as db:
+            _upsert_for_session(
+                db, DBVocabFinal, {"session_id": session_id, "trials": trials or []},
+                keys=["session_id"], update=lambda new: {"trials": new.trials},
+            )
+            if answers:
+                # deck mode: every scored answer in one multi-row insert, then the progress count
+                _insert_ignore(db, DBVocabAnswer, [{"session_id": session_id, **a} for a in answers])
+                answered = (select(func.count()).select_from(DBVocabAnswer)
+                            .where(DBVocabAnswer.session_id == session_id).scalar_subquery())
+                db.execute(update(DBVocabProgress).where(DBVocabProgress.session_id == session_id)
+                           .values(next_index=answered))
+            _commit(db)
+        if answers:
+            _VOCAB_CACHE.forget(session_id)
 
     def final_check(session_id: str, data: Dict[str, Any], recaptcha_verification: str | None = None) -> None:
-        db = _db()
-        try:
-            sess = db.get(DBSession, session_id)
-            if not sess:
-                raise ValueError("Session not found.")
-            row = db.get(DBFinalCheck, session_id)
-            payload = {
-                "used_ai_tools": data.get("used_ai_tools"),
-                "tools": list(data.get("tools") or []),
-                "other_tool": (data.get("other_tool") or "").strip(),
-            }
-            if row:
-                row.payload = payload
-                if recaptcha_verification in ("yes", "no"):
-                    row.recaptcha_verification = recaptcha_verification
-            else:
-                row = DBFinalCheck(
-                    session_id=session_id,
-                    payload=payload,
-                    recaptcha_verification=(recaptcha_verification if recaptcha_verification in ("yes", "no") else None),
-                )
-                db.add(row)
-            db.commit()
-        finally:
-            db.close()
+        payload = {
+            "used_ai_tools": data.get("used_ai_tools"),
+            "tools": list(data.get("tools") or []),
+            "other_tool": (data.get("other_tool") or "").strip(),
+        }
+        verified = recaptcha_verification if recaptcha_verification in ("yes", "no") else None
+        with _session() as db:
+            _upsert_for_session(
+                db, DBFinalCheck,
+                {"session_id": session_id, "payload": payload, "recaptcha_verification": verified},
+                keys=["session_id"],
+                # keep a previously recorded verification when this call has none
+                update=lambda new: {"payload": new.payload,
+                                    **({"recaptcha_verification": new.recaptcha_verification} if verified else {})},
+            )
+            _commit(db)
 
     def log_total_participation_time(session_id: str, finished_at_ms: Optional[int] = None) -> Dict[str, Any]:
-        db = _db()
-        try:
+        with _session() as db:
             sess = db.get(DBSession, session_id)
             if not sess:
                 raise ValueError("Session not found.")
@@ -588,68 +1688,169 @@ elif STORAGE_BACKEND == "aurora":
             total_ms = max(0, end_ms - start_ms)
             sess.participation_end_ms = end_ms
             sess.total_participation_ms = total_ms
-            db.commit()
+            _commit(db)
             return {"session_id": session_id, "total_participation_ms": total_ms}
-        finally:
-            db.close()
 
     def log_total_task_time(session_id: str, bucket: str, elapsed_ms: int) -> Dict[str, Any]:
-        db = _db()
+        # validate bucket against enum
+        if bucket not in {b.value for b in BucketNameEnum}:
+            return {"session_id": session_id, "ignored_bucket": bucket}
         try:
-            # validate bucket against enum
-            if bucket not in {b.value for b in BucketNameEnum}:
-                return {"session_id": session_id, "ignored_bucket": bucket}
-            try:
-                inc = int(elapsed_ms)
-            except Exception:
-                inc = 0
-            inc = max(0, min(inc, _ATTENTION_MAX_INC_MS))
+            inc = int(elapsed_ms)
+        except Exception:
+            inc = 0
+        inc = max(0, min(inc, _ATTENTION_MAX_INC_MS))
 
-            stmt = select(DBAttentionLog).where(
-                DBAttentionLog.session_id == session_id, DBAttentionLog.bucket == BucketNameEnum(bucket)
+        with _session() as db:
+            # one atomic statement: concurrent beacons cannot lose increments
+            _upsert(
+                db, DBAttentionLog,
+                values={"session_id": session_id, "bucket": BucketNameEnum(bucket), "total_ms": inc,
+                        "updated_at": datetime.datetime.utcnow()},
+                keys=["session_id", "bucket"],
+                update=lambda new: {"total_ms": DBAttentionLog.total_ms + new.total_ms,
+                                    "updated_at": new.updated_at},
             )
-            row = db.execute(stmt).scalar_one_or_none()
-            if row:
-                row.total_ms = int(row.total_ms or 0) + inc
-            else:
-                row = DBAttentionLog(session_id=session_id, bucket=BucketNameEnum(bucket), total_ms=inc)
-                db.add(row)
-            db.commit()
-            return {"session_id": session_id, "bucket": bucket, "total_ms": row.total_ms}
-        finally:
-            db.close()
+            total = db.execute(
+                select(DBAttentionLog.total_ms).where(
+                    DBAttentionLog.session_id == session_id, DBAttentionLog.bucket == BucketNameEnum(bucket)
+                )
+            ).scalar_one()
+            _commit(db)
+            return {"session_id": session_id, "bucket": bucket, "total_ms": int(total or 0)}
+
+    def get_task_time(session_id: str) -> Dict[str, int]:
+        with _session() as db:
+            out = dict(DEFAULT_BUCKETS)
+            rows = db.execute(
+                select(DBAttentionLog.bucket, DBAttentionLog.total_ms).where(DBAttentionLog.session_id == session_id)
+            ).all()
+            for b, ms in rows:
+                out[b.value] = int(ms or 0)
+            return out
+
+    def _rc_key(rec: Dict[str, Any]) -> Tuple[Any, ...]:
+        return ("rc", rec["session_id"], *_rc_ident(rec))
+
+    def _rc_save(rec: Dict[str, Any]) -> None:
+        row = {c: rec[c] for c in _RC_KEY_COLS}
+        row["duration_ms"] = rec["duration_ms"]
+        row["server_ts"] = datetime.datetime.utcfromtimestamp(rec["server_ts"] / 1000)
+        _RC_WRITER.put(_rc_key(rec), ("save", row))
+
+    def _rc_delete(rec: Dict[str, Any]) -> None:
+        _RC_WRITER.put(_rc_key(rec), ("delete", {c: rec[c] for c in _RC_KEY_COLS}))
+
+    def _rc_from_row(row) -> Dict[str, Any]:
+        return {"session_id": row.session_id, "start_time": int(row.start_time), "status": row.status,
+                "passage_id": row.passage_id, "page_name": row.page_name, "duration_ms": int(row.duration_ms or 0),
+                "server_ts": int(row.server_ts.timestamp() * 1000) if row.server_ts else _now_ms()}
+
+    def _rc_queued(session_id: str) -> List[Tuple[bool, Dict[str, Any]]]:
+        """This session's RC writes still in _RC_WRITER."""
+        out = []
+        for _, (kind, row) in _RC_WRITER.queued(lambda k: k[0] == "rc" and k[1] == session_id):
+            rec = {c: row[c] for c in _RC_KEY_COLS}
+            if kind == "save":
+                ts = row["server_ts"].replace(tzinfo=datetime.timezone.utc)
+                rec.update(duration_ms=int(row["duration_ms"]), server_ts=int(ts.timestamp() * 1000))
+            out.append((kind == "delete", rec))
+        return out
+
+    def _rc_load(session_id: str) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[bool, List[Dict[str, Any]]]]]:
+        # queued first: a row flushed while we read then shows up in both, never in neither
+        queued = _rc_queued(session_id)
+        with _session() as db:
+            by_id = DBRCEvent.session_id == session_id
+            recent = db.execute(
+                select(DBRCEvent).where(by_id).order_by(DBRCEvent.id.desc()).limit(_RC_TAIL_LEN)
+            ).scalars().all()
+            counts = db.execute(
+                select(DBRCEvent.passage_id, func.sum(case((DBRCEvent.status == "active", 1), else_=0)))
+                .where(by_id).group_by(DBRCEvent.passage_id)
+            ).all()
+            by_passage: Dict[str, Tuple[bool, List[Dict[str, Any]]]] = {}
+            for pid, n_active in counts:
+                latest: List[Dict[str, Any]] = []
+                if not n_active:
+                    latest = [_rc_from_row(r) for r in db.execute(
+                        select(DBRCEvent).where(by_id, DBRCEvent.passage_id == pid)
+                        .order_by(DBRCEvent.id.desc()).limit(_RC_BLUR_RUN_MAX)
+                    ).scalars()]
+                by_passage[pid] = (bool(n_active), latest)
+            return _rc_overlay([_rc_from_row(r) for r in reversed(recent)], by_passage, queued)
+
+    _RC = _RCDebouncer(_rc_load, _rc_save, _rc_delete, max_sessions=RC_CACHE_SESSIONS)
 
     def log_reading_comprehension_details(session_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
-        # NOTE: We only persist accepted segments; debounce/merge logic is typically handled in-memory.
-        # For Aurora, we’ll accept the segment and write a row directly (no merge here).
-        db = _db()
-        try:
-            sess = db.get(DBSession, session_id)
-            if not sess:
-                raise ValueError("Session not found.")
-            # clamp duration
-            try:
-                duration_ms = int(event.get("duration_ms") or 0)
-            except Exception:
-                duration_ms = 0
-            duration_ms = max(0, min(duration_ms, _RC_MAX_SEG_MS))
-            rec = DBRCEvent(
-                session_id=session_id,
-                passage_id=str(event.get("passage_id") or ""),
-                page_name=str(event.get("page_name") or "unknown"),
-                status=str(event.get("status") or "active"),
-                start_time=int(event.get("start_time") or 0),
-                duration_ms=duration_ms,
-            )
-            db.add(rec)
-            db.commit()
-            return {"session_id": session_id, "start_time": rec.start_time,
-                    "status": rec.status, "server_ts": int(rec.server_ts.timestamp() * 1000)}
-        finally:
-            db.close()
+        if not session_exists(session_id):
+            raise ValueError("Session not found.")
+        return _RC.log(session_id, event)
 
 # =====================================================================
 # Unsupported
 # =====================================================================
 else:
     raise ValueError(f"Unsupported STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+# =====================================================================
+# Batched telemetry (shared)
+# =====================================================================
+def _is_int(value: Any) -> bool:
+    return (isinstance(value, int) and not isinstance(value, bool)) or (isinstance(value, float) and value.is_integer())
+
+
+def _batch_event_error(ev: Any) -> Optional[str]:
+    """Why a raw /api/log/batch event is malformed, or None if it can be applied."""
+    if not isinstance(ev, dict):
+        return "event must be an object"
+    kind = ev.get("kind")
+    if kind == "attention":
+        if ev.get("bucket") not in DEFAULT_BUCKETS:
+            return f"unknown bucket: {ev.get('bucket')!r}"
+        if not _is_int(ev.get("elapsed_ms")):
+            return "elapsed_ms must be an integer"
+        return None
+    if kind == "rc":
+        for field in ("passage_id", "page_name"):
+            if not isinstance(ev.get(field), str):
+                return f"{field} must be a string"
+        if ev.get("status") not in ("active", "blur"):
+            return f"unknown status: {ev.get('status')!r}"
+        for field in ("start_time", "duration_ms"):
+            if not _is_int(ev.get(field)):
+                return f"{field} must be an integer"
+        return None
+    return f"unknown kind: {kind!r}"
+
+
+def log_batch(session_id: str, events: List[Any]) -> List[Dict[str, Any]]:
+    """Apply mixed attention / RC events for one session in a single transaction.
+
+    Events arrive unvalidated; returns one result per event, in order. A
+    malformed or rejected event does not abort the rest.
+    """
+    results: List[Dict[str, Any]] = []
+    with _transaction():
+        for ev in events:
+            error = _batch_event_error(ev)
+            if error is not None:
+                results.append({"ok": False, "error": error})
+                continue
+            try:
+                if ev.get("kind") == "attention":
+                    res = log_total_task_time(session_id, ev["bucket"], int(ev["elapsed_ms"]))
+                    results.append({"ok": "ignored_bucket" not in res, **res})
+                else:
+                    rec = log_reading_comprehension_details(session_id, {
+                        "start_time": int(ev["start_time"]),
+                        "status": ev.get("status"),
+                        "passage_id": ev.get("passage_id"),
+                        "page_name": ev.get("page_name") or "unknown",
+                        "duration_ms": ev.get("duration_ms") or 0,
+                    })
+                    results.append({"ok": True, "suppressed": bool(rec.get("suppressed"))})
+            except ValueError as e:
+                results.append({"ok": False, "error": str(e)})
+    return results
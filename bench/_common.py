@@ -0,0 +1,54 @@
+# bench/_common.py
+"""Shared setup for the benchmark scripts: throwaway databases, no network config."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_env(**overrides: str) -> str:
+    """Point storage at a fresh temp dir; call before importing anything from backend."""
+    tmp = tempfile.mkdtemp(prefix="requesta-bench-")
+    env = {
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(tmp, "study.db"),
+        "DATABASE_URL": f"sqlite:///{tmp}/aurora.db",
+        "CONTENT_PACK": os.path.join(tmp, "missing.pack"),
+        "RECAPTCHA_MODE": "off",
+        "SSM_ENABLED": "0",
+        "AWS_EC2_METADATA_DISABLED": "true",
+    }
+    env.update(overrides)
+    for k, v in env.items():
+        os.environ.setdefault(k, v)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    return tmp
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+def summary(label: str, samples_ms: List[float], elapsed_s: float) -> str:
+    return (f"{label:28s} n={len(samples_ms):6d}  {len(samples_ms) / elapsed_s:8.0f} req/s  "
+            f"p50={percentile(samples_ms, 50):7.2f}ms  p99={percentile(samples_ms, 99):7.2f}ms")
+
+
+async def new_session(client: Any) -> Tuple[str, List[str], Dict[str, str]]:
+    """Consented, randomized session: (session_id, passage_ids, sources)."""
+    sid = (await client.post("/api/session/start", json={"consent": True})).json()["session_id"]
+    await client.post("/api/randomize", params={"session_id": sid})
+    boot = (await client.get("/api/session/bootstrap", params={"session_id": sid})).json()
+    return sid, boot["passage_ids"], boot["sources"]
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
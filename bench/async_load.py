@@ -0,0 +1,90 @@
+# bench/async_load.py
+"""
+Load test for the async routes: throughput and latency as in-flight requests
+grow past FastAPI's threadpool (40 slots by default), then the same load with
+every threadpool slot held by blocking work.
+
+Each client loops over a participant-like mix (passage, questions, RC beacon,
+attention) against one in-process app:
+
+    python bench/async_load.py [--seconds 3] [--concurrency 10 40 100 200 400]
+"""
+import argparse
+import asyncio
+import time
+
+from _common import new_session, now_ms, setup_env, summary
+
+setup_env()
+
+import anyio  # noqa: E402
+import httpx  # noqa: E402
+from backend.main import app  # noqa: E402
+
+
+async def _client_loop(client, sid, pids, until, samples, errors):
+    i, start = 0, now_ms()
+    while time.perf_counter() < until:
+        pid = pids[i % len(pids)]
+        kind = i % 4
+        t = time.perf_counter()
+        if kind == 0:
+            r = await client.get(f"/api/passage/{pid}", params={"session_id": sid})
+        elif kind == 1:
+            r = await client.get(f"/api/questions/{pid}", params={"session_id": sid})
+        elif kind == 2:
+            start += 5000
+            r = await client.post("/api/log/rc_event", json={
+                "session_id": sid, "passage_id": pid, "page_name": pid,
+                "status": "active" if i % 8 == 2 else "blur", "start_time": start, "duration_ms": 1000})
+        else:
+            r = await client.post("/api/log/attention", json={"session_id": sid, "bucket": "reading_task1",
+                                                              "elapsed_ms": 250})
+        samples.append((time.perf_counter() - t) * 1000)
+        if r.status_code >= 400:
+            errors.append(r.status_code)
+        i += 1
+
+
+async def _run_level(client, sessions, concurrency, seconds, label):
+    samples, errors = [], []
+    until = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client_loop(client, *sessions[n % len(sessions)], until, samples, errors) for n in range(concurrency)))
+    print(summary(label, samples, time.perf_counter() - started), f" errors={len(errors)}")
+
+
+async def main(seconds, levels):
+    pool = anyio.to_thread.current_default_thread_limiter().total_tokens
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load") as client:
+        sessions = []
+        for _ in range(50):
+            sid, pids, _ = await new_session(client)
+            sessions.append((sid, pids))
+        for c in levels:
+            await _run_level(client, sessions, c, seconds, f"{c} in flight")
+
+        # hold every threadpool slot: sync routes would now stall, async ones must not
+        hold = asyncio.Event()
+
+        def _block():
+            while not hold.is_set():
+                time.sleep(0.01)
+
+        blockers = [asyncio.ensure_future(anyio.to_thread.run_sync(_block)) for _ in range(pool)]
+        await asyncio.sleep(0.1)
+        try:
+            await _run_level(client, sessions, max(levels), seconds, f"{max(levels)} in flight, pool held")
+        finally:
+            hold.set()
+            await asyncio.gather(*blockers)
+    print(f"(threadpool size {pool})")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 100, 200, 400])
+    args = ap.parse_args()
+    asyncio.run(main(args.seconds, args.concurrency))
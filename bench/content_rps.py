@@ -0,0 +1,73 @@
+# bench/content_rps.py
+"""
+Requests/sec for GET /api/passage/{id} and /api/questions/{id}: the original
+per-request model validation ("before", rebuilt below on a side app) against
+the pre-serialized bodies, with and without If-None-Match (304):
+
+    python bench/content_rps.py [--requests 3000]
+"""
+import argparse
+import asyncio
+import time
+
+from _common import new_session, setup_env
+
+setup_env()
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException, Query  # noqa: E402
+
+from backend import storage  # noqa: E402
+from backend.data import PASSAGES, QUESTIONS  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.schemas import Passage, PublicQuestionsResponse  # noqa: E402
+
+# "before": the handlers as they were, validating through the response models on every call
+before = FastAPI()
+
+
+@before.get("/api/passage/{passage_id}", response_model=Passage)
+def old_get_passage(passage_id: str, session_id: str = Query(...)):
+    if not storage.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return Passage(**PASSAGES[passage_id])
+
+
+@before.get("/api/questions/{passage_id}", response_model=PublicQuestionsResponse)
+def old_get_questions(passage_id: str, session_id: str = Query(...)):
+    if not storage.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    src = storage.get_source_for(session_id, passage_id)
+    qset = QUESTIONS[passage_id]["questions"][src]
+    mapped = [{"id": q["question_id"], "prompt": q["prompt"], "choices": q["choices"]} for q in qset]
+    return PublicQuestionsResponse(passage_id=passage_id, questions=mapped)
+
+
+async def _rate(client, url, sid, n, headers=None) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        r = await client.get(url, params={"session_id": sid}, headers=headers or {})
+        assert r.status_code in (200, 304), r.text
+    return n / (time.perf_counter() - started)
+
+
+async def main(n: int) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://after") as after_c, \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=before), base_url="http://before") as before_c:
+        sid, pids, _ = await new_session(after_c)
+        for path in ("/api/passage/", "/api/questions/"):
+            url = path + pids[0]
+            etag = (await after_c.get(url, params={"session_id": sid})).headers.get("etag")
+            rates = {
+                "before": await _rate(before_c, url, sid, n),
+                "after 200": await _rate(after_c, url, sid, n),
+                "after 304": await _rate(after_c, url, sid, n, {"If-None-Match": etag}),
+            }
+            print(f"{path:17s} " + "  ".join(f"{k}={v:7.0f} req/s" for k, v in rates.items()))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=3000)
+    args = ap.parse_args()
+    asyncio.run(main(args.requests))
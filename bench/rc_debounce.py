@@ -0,0 +1,65 @@
+# bench/rc_debounce.py
+"""
+Cost per RC beacon in the shared debouncer as a session's history grows.
+
+Each run pre-fills one session with N segments, then times a mix of new
+segments, merges and spurious blurs on top of it. With per-passage state
+the time per beacon should not depend on N:
+
+    python bench/rc_debounce.py [--beacons 20000] [--history 100 1000 10000 50000]
+"""
+import argparse
+import time
+
+from _common import setup_env
+
+setup_env()
+
+from backend.storage import _RC_MERGE_GAP_MS, _RCDebouncer  # noqa: E402
+
+
+def _debouncer() -> _RCDebouncer:
+    # storage is out of the picture: nothing to load, writes are dropped
+    return _RCDebouncer(load=lambda sid: ([], {}), save=lambda rec: None, delete=lambda rec: None,
+                        max_sessions=16)
+
+
+def _beacons(n: int, start: int, passages: int = 3):
+    t = start
+    for i in range(n):
+        kind = i % 4
+        pid = f"p{i % passages}"
+        if kind == 0:    # new active segment after a long gap
+            t += _RC_MERGE_GAP_MS + 5000
+            yield {"passage_id": pid, "page_name": "reading", "status": "active", "start_time": t, "duration_ms": 3000}
+        elif kind == 1:  # continues it: merged
+            t += 3000
+            yield {"passage_id": f"p{(i - 1) % passages}", "page_name": "reading", "status": "active",
+                   "start_time": t, "duration_ms": 1000}
+        elif kind == 2:  # real blur
+            t += _RC_MERGE_GAP_MS + 5000
+            yield {"passage_id": pid, "page_name": "reading", "status": "blur", "start_time": t, "duration_ms": 4000}
+        else:            # spurious blur on a passage not yet active
+            t += 100
+            yield {"passage_id": f"fresh{i}", "page_name": "unknown", "status": "blur", "start_time": t, "duration_ms": 50}
+
+
+def main(beacons: int, histories) -> None:
+    for n in histories:
+        deb = _debouncer()
+        for ev in _beacons(n, start=0):
+            deb.log("s", ev)
+        events = list(_beacons(beacons, start=10 ** 12))
+        started = time.perf_counter()
+        for ev in events:
+            deb.log("s", ev)
+        elapsed = time.perf_counter() - started
+        print(f"history={n:7d}  {beacons} beacons  {elapsed / beacons * 1e6:7.2f} us/beacon")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--beacons", type=int, default=20000)
+    ap.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    args = ap.parse_args()
+    main(args.beacons, args.history)
@@ -0,0 +1,66 @@
+# bench/rc_load_p99.py
+"""
+Latency of GET /api/questions/{passage_id} with and without RC beacon load.
+
+Readers and writers share one in-process app (httpx ASGI transport), so the
+numbers show storage contention, not network cost:
+
+    python bench/rc_load_p99.py [--seconds 5] [--writers 16]
+"""
+import argparse
+import asyncio
+import time
+
+from _common import new_session, now_ms, setup_env, summary
+
+setup_env()
+
+import httpx  # noqa: E402
+from backend.main import app  # noqa: E402
+
+
+async def _read_loop(client, url, sid, until, samples):
+    while time.perf_counter() < until:
+        t = time.perf_counter()
+        r = await client.get(url, params={"session_id": sid})
+        samples.append((time.perf_counter() - t) * 1000)
+        assert r.status_code == 200, r.text
+
+
+async def _rc_loop(client, sid, passage_id, until, counter):
+    start, n = now_ms(), 0
+    while time.perf_counter() < until:
+        # 100ms after the previous segment, inside the 500ms merge gap, so only the
+        # per-writer alternating status makes every beacon a new segment (an insert)
+        start += 1000
+        status = "active" if n % 2 else "blur"
+        n += 1
+        await client.post("/api/log/rc_event", json={
+            "session_id": sid, "passage_id": passage_id, "page_name": "reading",
+            "status": status, "start_time": start, "duration_ms": 900})
+        counter[0] += 1
+
+
+async def main(seconds: float, writers: int) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        sid, pids, _ = await new_session(client)
+        url = f"/api/questions/{pids[0]}"
+        for label, n_writers in (("questions, idle", 0), (f"questions, {writers} rc writers", writers)):
+            samples, counter = [], [0]
+            wsids = [(await new_session(client))[0] for _ in range(n_writers)]
+            until = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(
+                _read_loop(client, url, sid, until, samples),
+                *(_rc_loop(client, w, pids[0], until, counter) for w in wsids),
+            )
+            print(summary(label, samples, time.perf_counter() - started),
+                  f" rc beacons={counter[0]}" if n_writers else "")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--writers", type=int, default=16)
+    args = ap.parse_args()
+    asyncio.run(main(args.seconds, args.writers))
@@ -14,8 +14,13 @@ window.addEventListener("unhandledrejection", (e) => {
 // ---- Session helpers ----
 function getSession() { return localStorage.getItem("session_id"); }
 function setSession(id) { localStorage.setItem("session_id", id); }
+// signed session token (null when the server does not sign): lets read routes skip storage
+function getSessionToken() { return localStorage.getItem("session_token"); }
+function setSessionToken(t) { t ? localStorage.setItem("session_token", t) : localStorage.removeItem("session_token"); }
 function getAssignedPassages() { return JSON.parse(localStorage.getItem("assigned_passages") || "[]"); }
 function setAssignedPassages(ids) { localStorage.setItem("assigned_passages", JSON.stringify(ids)); }
+function getStudyContent() { return JSON.parse(localStorage.getItem("study_content") || "null"); }
+function setStudyContent(c) { localStorage.setItem("study_content", JSON.stringify(c)); }
 function setBackClicks(pid, n) { localStorage.setItem(`back_clicks_${pid}`, String(n)); }
 function getBackClicks(pid) { return Number(localStorage.getItem(`back_clicks_${pid}`) || 0); }
 function setVisitCount(pid, n) { localStorage.setItem(`passage_visits_${pid}`, String(n)); }
@@ -72,6 +77,8 @@ function param(name){ return new URLSearchParams(location.search).get(name); }
 
 async function api(path, options = {}) {
   const url = `${API_BASE}${path}`;
+  const token = getSessionToken();
+  if (token) options = { ...options, headers: { ...(options.headers || {}), "X-Session-Token": token } };
   let res;
   try {
     res = await fetch(url, options);
@@ -150,6 +157,34 @@ function ffPost(path, body) {
   } catch (_) {}
 }
 
+// --- Telemetry queue: attention + RC segments go out together via /api/log/batch ---
+const TELEMETRY_FLUSH_MS = 5000;
+const TELEMETRY_MAX_EVENTS = 50;
+let TELEMETRY_QUEUE = [];
+let TELEMETRY_TIMER = null;
+
+function queueTelemetry(event) {
+  TELEMETRY_QUEUE.push(event);
+  if (TELEMETRY_QUEUE.length >= TELEMETRY_MAX_EVENTS) {
+    flushTelemetry();
+  } else if (!TELEMETRY_TIMER) {
+    TELEMETRY_TIMER = setTimeout(flushTelemetry, TELEMETRY_FLUSH_MS);
+  }
+}
+
+function flushTelemetry() {
+  if (TELEMETRY_TIMER) { clearTimeout(TELEMETRY_TIMER); TELEMETRY_TIMER = null; }
+  const events = TELEMETRY_QUEUE;
+  TELEMETRY_QUEUE = [];
+  const session_id = getSession();
+  if (!session_id || !events.length) return;
+  ffPost("/api/log/batch", { session_id, events });
+}
+
+// Pages without attention tracking still drain anything left in the queue
+document.addEventListener("visibilitychange", () => { if (document.hidden) flushTelemetry(); });
+window.addEventListener("pagehide", flushTelemetry);
+
 /**
  * Start attention tracking for a page bucket.
  * If rcMeta is provided, we also emit detailed RC focus/blur segments
@@ -169,10 +204,10 @@ function startPageAttention(bucket, rcMeta, warnOnReturnMs = null) {
     if (activeStart == null) return;
     const dur = Math.max(0, end - activeStart);
     if (dur > 0) {
-      ffPost("/api/log/attention", { session_id, bucket, elapsed_ms: dur });
+      queueTelemetry({ kind: "attention", bucket, elapsed_ms: dur });
       if (rcMeta) {
-        ffPost("/api/log/rc_event", {
-          session_id,
+        queueTelemetry({
+          kind: "rc",
           passage_id: rcMeta.passage_id,
           page_name: rcMeta.page_name_for_active || "unknown",
           status: "active",
@@ -188,8 +223,8 @@ function startPageAttention(bucket, rcMeta, warnOnReturnMs = null) {
     if (!rcMeta || blurStart == null) return;
     const dur = Math.max(0, end - blurStart);
     if (dur > 0) {
-      ffPost("/api/log/rc_event", {
-        session_id,
+      queueTelemetry({
+        kind: "rc",
         passage_id: rcMeta.passage_id,
         page_name: "unknown",
         status: "blur",
@@ -225,7 +260,8 @@ function startPageAttention(bucket, rcMeta, warnOnReturnMs = null) {
   }
 
   function visHandler() {
-    if (document.hidden) onBlur(); else onFocus();
+    // the tab may never come back: send the segment we just closed right away
+    if (document.hidden) { onBlur(); flushTelemetry(); } else onFocus();
   }
   window.addEventListener("focus", onFocus);
   window.addEventListener("blur", onBlur);
@@ -238,6 +274,7 @@ function startPageAttention(bucket, rcMeta, warnOnReturnMs = null) {
     } else if (!INAPP_NAV) {
       sendBlurSegment(now);
     }
+    flushTelemetry();
   }
   window.addEventListener("pagehide", flush);
   window.addEventListener("beforeunload", flush);
@@ -348,6 +385,7 @@ async function initConsent() {
         body: JSON.stringify({ source: "web", consent: true })
       });
       setSession(r.session_id);
+      setSessionToken(r.token);
       thanksBox.style.display = "block";
       nextBtn.focus();
     } catch (err) {
@@ -547,7 +585,10 @@ async function initDemographic() {
       const npid = String(pid).trim();
       if (lastCheckedPid === npid && lastResponse !== null) return lastResponse;
       try {
-        const res = await api(`/api/check_prolific?prolific_id=${encodeURIComponent(npid)}`);
+        // session_id lets the server ignore this session's own earlier submission (e.g. a resubmit)
+        const sid = getSession();
+        const res = await api(`/api/check_prolific?prolific_id=${encodeURIComponent(npid)}` +
+          (sid ? `&session_id=${encodeURIComponent(sid)}` : ""));
         lastCheckedPid = npid;
         lastResponse = res;
         return res;
@@ -647,6 +688,8 @@ async function initDemographic() {
         // 2) Randomize
         const rnd = await api(`/api/randomize?session_id=${encodeURIComponent(getSession())}`, { method: "POST" });
         setAssignedPassages(rnd.passage_ids);
+        setSessionToken(rnd.token);
+        await loadStudyContent({ refresh: true });
 
         // 3) Navigate
         markInAppNavigation();
@@ -728,18 +771,24 @@ async function initVocab() {
   let timerId = null;
   let ended   = false;
 
+  // Deck mode: the whole deck arrives with /api/vocab/start, trials run locally and
+  // every answer (with its RT) goes to the server in ONE /api/vocab/submit at the end,
+  // so the gap between items never waits on the network.
+  let deck = [];             // [{ id, token }] in presentation order
+  let pos = 0;               // index of the item on screen
   let current = null;        // { id, token }
   let lastShownAt = null;    // perf timing per item
 
   let completed = 0;         // number of answered items
-  let correct   = 0;         // number answered correctly
+  let correct   = null;      // known once the server has scored the batch
 
-  // NEW: collect one-shot payload to send at the end (ONE row in DB)
-  const trials = [];         // { token, user_answer: "yes"|"no" }
+  const trials  = [];        // { token, user_answer: "yes"|"no" }  (ONE row in DB)
+  const answers = [];        // { item_id, is_word, rt_ms }          (scored server-side)
 
   // --- Helpers ---
   function formatAcc() {
     if (completed === 0) return "0%";
+    if (correct === null) return "–";
     return Math.round((correct / completed) * 100) + "%";
   }
   function updateHUD() {
@@ -771,30 +820,40 @@ async function initVocab() {
     noBtn.disabled  = !on;
   }
   function resultMessage() {
+    const done = Math.min(completed, MAX_ITEMS);
+    if (correct === null) {
+      return `Time is out. You have completed ${done} out of 60 items in one minute. Thank you!`;
+    }
     const acc = completed === 0 ? 0 : Math.round((correct / completed) * 100);
     let ending = "Thank you!";
     if (acc >= 90) ending = "Excellent!";
     else if (acc >= 80) ending = "Good job!";
     else if (acc >= 70) ending = "Well done.";
-    return `Time is out. You have completed ${Math.min(completed, MAX_ITEMS)} out of 60 items in one minute. Your final accuracy rate is ${acc}%. ${ending}`;
+    return `Time is out. You have completed ${done} out of 60 items in one minute. Your final accuracy rate is ${acc}%. ${ending}`;
   }
 
-  // --- End game: submit ONE payload, then navigate
+  // --- End game: submit ONE payload (all answers), then navigate
   async function endGame() {
     if (ended) return;
     ended = true;
     stopTimer();
     setButtonsEnabled(false);
 
-    try {
-      await api("/api/vocab/submit", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ session_id: getSession(), trials }),
-      });
-    } catch (e) {
-      console.warn("[vocab] final submit failed (continuing):", e);
+    const body = JSON.stringify({ session_id: getSession(), trials, answers });
+    for (let attempt = 0; attempt < 2; attempt++) {
+      try {
+        const res = await api("/api/vocab/submit", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body,
+        });
+        if (res && typeof res.correct === "number") correct = res.correct;
+        break;
+      } catch (e) {
+        console.warn("[vocab] final submit failed" + (attempt ? " (continuing):" : ", retrying:"), e);
+      }
     }
+    updateHUD();
 
     alert(resultMessage());
     markInAppNavigation();
@@ -802,59 +861,36 @@ async function initVocab() {
   }
 
   async function ensureStarted() {
-    await api(`/api/vocab/start?session_id=${encodeURIComponent(getSession())}`, { method:"POST" });
+    const r = await api(`/api/vocab/start?session_id=${encodeURIComponent(getSession())}&deck=true`, { method:"POST" });
+    deck = (r && r.items) || [];
   }
 
-  async function loadNext() {
+  function showNext() {
     if (ended) return;
-    if (completed >= MAX_ITEMS) {
-      await endGame();
+    if (completed >= MAX_ITEMS || pos >= deck.length) {
+      void endGame();
       return;
     }
-    const r = await api(`/api/vocab/next?session_id=${encodeURIComponent(getSession())}`);
-    if (r.done || !r.item) {
-      await endGame();
-      return;
-    }
-    current = r.item;
+    current = deck[pos];
     tokenEl.textContent = current.token;
     lastShownAt = performance.now();
 
     if (!started) startTimer();
   }
 
-  async function submit(isWord) {
+  function submit(isWord) {
     if (ended || !current) return;
-    if (yesBtn.disabled || noBtn.disabled) return; // debounce
-    setButtonsEnabled(false);
+    if (yesBtn.disabled || noBtn.disabled) return;
 
     const rt = Math.round(performance.now() - lastShownAt);
 
-    // Record for final one-shot save
     trials.push({ token: current.token, user_answer: isWord ? "yes" : "no" });
+    answers.push({ item_id: current.id, is_word: isWord, rt_ms: rt });
 
-    try {
-      const res = await api("/api/vocab/answer", {
-        method:"POST", headers:{"Content-Type":"application/json"},
-        body: JSON.stringify({
-          session_id: getSession(),
-          item_id: current.id,
-          is_word: isWord,
-          rt_ms: rt
-        })
-      });
-
-      completed += 1;
-      if (res && res.correct === true) correct += 1;
-      updateHUD();
-
-      await loadNext();
-    } catch (err) {
-      console.error("[vocab] submit failed:", err);
-      alert("Network error while saving your answer. Please check your connection and try again.");
-    } finally {
-      if (!ended) setButtonsEnabled(true);
-    }
+    completed += 1;
+    pos += 1;
+    updateHUD();
+    showNext();
   }
 
   yesBtn.addEventListener("click", () => submit(true));
@@ -864,13 +900,13 @@ async function initVocab() {
   setButtonsEnabled(false);
   try {
     await ensureStarted();
-    await loadNext();
+    showNext();
   } catch (err) {
     console.error("[vocab] init failed:", err);
     alert("We couldn’t start the vocabulary task due to a network error. Please reload the page.");
     return;
   }
-  setButtonsEnabled(true);
+  if (!ended) setButtonsEnabled(true);
   updateHUD();
 }
 
@@ -909,6 +945,24 @@ async function initRCInstructions() {
   }
 }
 
+// Passages + public questions for the whole assignment, fetched once and kept in localStorage.
+// Returns null on failure so callers can fall back to the per-passage endpoints.
+async function loadStudyContent({ refresh = false } = {}) {
+  const cached = getStudyContent();
+  const assigned = getAssignedPassages();
+  const session_id = getSession();
+  if (!refresh && cached && cached.session_id === session_id
+      && JSON.stringify(cached.passage_ids) === JSON.stringify(assigned)) return cached;
+  try {
+    const c = await api(`/api/session/bootstrap?session_id=${encodeURIComponent(session_id)}`);
+    setStudyContent({ ...c, session_id });
+    return c;
+  } catch (err) {
+    console.warn("[bootstrap] failed, falling back to per-passage requests:", err);
+    return null;
+  }
+}
+
 // passage.html
 async function initPassage() {
   ensureSessionOrRedirect();
@@ -925,7 +979,8 @@ async function initPassage() {
   const visits = getVisitCount(pid) + 1;
   setVisitCount(pid, visits);
 
-  const data = await api(`/api/passage/${encodeURIComponent(pid)}?session_id=${encodeURIComponent(getSession())}`);
+  const data = (await loadStudyContent())?.passages?.[pid]
+    || await api(`/api/passage/${encodeURIComponent(pid)}?session_id=${encodeURIComponent(getSession())}`);
   const titleEl = qs("#title");
   if (titleEl) titleEl.textContent = `Passage ${passageOrdinal(idx)}`;
 
@@ -984,7 +1039,8 @@ async function initQuestions() {
   // Fetch questions FIRST
   let payload;
   try {
-    payload = await api(`/api/questions/${encodeURIComponent(pid)}?session_id=${encodeURIComponent(getSession())}`);
+    payload = (await loadStudyContent())?.questions?.[pid]
+      || await api(`/api/questions/${encodeURIComponent(pid)}?session_id=${encodeURIComponent(getSession())}`);
   } catch (err) {
     console.error("[questions] fetch failed:", err);
     alert("We couldn’t load the questions due to a network error. Please reload.");
@@ -0,0 +1,53 @@
+# tests/conftest.py
+"""
+Test setup: every run gets throwaway databases and no network config.
+
+The storage backend is chosen once, at import of backend.storage, so tests
+that need the other backend (or other import-time settings) run their body
+in a fresh interpreter via the `run_isolated` fixture.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+_TMP = tempfile.mkdtemp(prefix="requesta-tests-")
+
+TEST_ENV = {
+    "STORAGE_BACKEND": "sqlite",
+    "SQLITE_PATH": os.path.join(_TMP, "study.db"),
+    "DATABASE_URL": f"sqlite:///{_TMP}/aurora.db",
+    "CONTENT_PACK": os.path.join(_TMP, "missing.pack"),  # build the pack in memory from backend/data.py
+    "RECAPTCHA_MODE": "off",
+    "SSM_ENABLED": "0",  # no boto3 import or AWS calls, whatever the environment has
+    "AWS_EC2_METADATA_DISABLED": "true",
+}
+for _k, _v in TEST_ENV.items():
+    os.environ.setdefault(_k, _v)
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def run_isolated(tmp_path):
+    """Run `code` in a new interpreter with fresh databases (plus `env` overrides); returns stdout."""
+    def run(code: str, timeout: float = 120, **env: str) -> str:
+        full = dict(os.environ)
+        full.update(TEST_ENV)
+        full.update(
+            SQLITE_PATH=str(tmp_path / "study.db"),
+            DATABASE_URL=f"sqlite:///{tmp_path / 'aurora.db'}",
+            PYTHONPATH=os.pathsep.join(p for p in (str(REPO_ROOT), os.environ.get("PYTHONPATH")) if p),
+        )
+        full.update(env)
+        proc = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=str(tmp_path), env=full,
+                              capture_output=True, text=True, timeout=timeout)
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+        return proc.stdout
+    return run
@@ -0,0 +1,29 @@
+"""/api/session/bootstrap returns what the per-passage routes would, in one response."""
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _session() -> str:
+    return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+
+def test_bootstrap_matches_the_per_passage_routes():
+    sid = _session()
+    assigned = client.post("/api/randomize", params={"session_id": sid}).json()
+    body = client.get("/api/session/bootstrap", params={"session_id": sid}).json()
+
+    assert body["passage_ids"] == assigned["passage_ids"]
+    assert set(body["sources"]) == set(body["passage_ids"])
+    for pid in body["passage_ids"]:
+        assert body["passages"][pid] == client.get(f"/api/passage/{pid}", params={"session_id": sid}).json()
+        public = client.get(f"/api/questions/{pid}", params={"session_id": sid}).json()
+        assert body["questions"][pid] == public
+        assert "correct_choice_id" not in str(public)
+
+
+def test_bootstrap_needs_a_known_randomized_session():
+    assert client.get("/api/session/bootstrap", params={"session_id": "nope"}).status_code == 404
+    assert client.get("/api/session/bootstrap", params={"session_id": _session()}).status_code == 400
@@ -0,0 +1,108 @@
+"""config.load_parameters against a stub SSM client: one paginated, decrypted batch plus the encrypted file cache."""
+import pytest
+
+from backend import config
+
+PAGES = [
+    {"Parameters": [{"Name": "/requesta/RECAPTCHA_MODE", "Type": "String", "Value": "auto"}],
+     "NextToken": "1"},
+    {"Parameters": [{"Name": "/requesta/RECAPTCHA_SECRET", "Type": "SecureString", "Value": "s3cret"},
+                    {"Name": "/requesta/db/URL", "Type": "SecureString", "Value": "mysql://u:p@h/db"}]},
+]
+
+
+class _StubSSM:
+    """get_parameters_by_path paginator over PAGES; SecureStrings stay ciphertext without WithDecryption."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def get_paginator(self, operation):
+        assert operation == "get_parameters_by_path"
+        return self
+
+    def paginate(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise ConnectionError("no route to SSM")
+        for page in PAGES:
+            params = [dict(p) for p in page["Parameters"]]
+            for p in params:
+                if p["Type"] == "SecureString" and not kwargs.get("WithDecryption"):
+                    p["Value"] = "AQICAH-ciphertext"
+            yield dict(page, Parameters=params)
+
+
+@pytest.fixture(autouse=True)
+def fresh_params(monkeypatch):
+    monkeypatch.setattr(config, "_PARAMS", None)
+    monkeypatch.setattr(config, "SSM_CACHE_FILE", "")
+    monkeypatch.delenv("SSM_CACHE_KEY", raising=False)
+
+
+def test_every_page_is_loaded_decrypted_in_one_batch(monkeypatch):
+    ssm = _StubSSM()
+    values = config.load_parameters(client=ssm)
+    assert values == {"/requesta/RECAPTCHA_MODE": "auto", "/requesta/RECAPTCHA_SECRET": "s3cret",
+                      "/requesta/db/URL": "mysql://u:p@h/db"}
+    assert ssm.calls == [{"Path": "/requesta/", "Recursive": True, "WithDecryption": True}]
+
+    # later lookups are served from memory
+    monkeypatch.setattr(config, "_ssm_client", lambda: pytest.fail("SSM called again"))
+    monkeypatch.delenv("RECAPTCHA_SECRET", raising=False)
+    assert config._get("RECAPTCHA_SECRET", ssm_path="/requesta/RECAPTCHA_SECRET", secure=True) == "s3cret"
+    assert config._get("RECAPTCHA_SECRET", "dflt", ssm_path="/requesta/MISSING") == "dflt"
+    assert len(ssm.calls) == 1
+
+
+def test_env_wins_over_ssm(monkeypatch):
+    monkeypatch.setenv("RECAPTCHA_MODE", "off")
+    monkeypatch.setattr(config, "_ssm_client", lambda: pytest.fail("SSM called for a value set in env"))
+    assert config._get("RECAPTCHA_MODE", ssm_path="/requesta/RECAPTCHA_MODE") == "off"
+
+
+def test_an_ssm_outage_falls_back_to_defaults():
+    ssm = _StubSSM(fail=True)
+    assert config.load_parameters(client=ssm) == {}
+    assert config.load_parameters(client=ssm) == {}  # not retried per lookup
+    assert len(ssm.calls) == 1
+
+
+@pytest.fixture
+def cache_file(monkeypatch, tmp_path):
+    fernet = pytest.importorskip("cryptography.fernet")
+    path = tmp_path / "ssm-params.cache"
+    monkeypatch.setattr(config, "SSM_CACHE_FILE", str(path))
+    monkeypatch.setenv("SSM_CACHE_KEY", fernet.Fernet.generate_key().decode())
+    return path
+
+
+def test_cache_file_is_encrypted_and_used_on_restart(monkeypatch, cache_file):
+    values = config.load_parameters(client=_StubSSM())
+    assert b"s3cret" not in cache_file.read_bytes()
+
+    monkeypatch.setattr(config, "_PARAMS", None)  # a restarted worker
+    down = _StubSSM(fail=True)
+    assert config.load_parameters(client=down) == values
+    assert down.calls == []
+
+    # refresh goes back to SSM even with a valid file
+    ssm = _StubSSM()
+    assert config.load_parameters(client=ssm, refresh=True) == values and len(ssm.calls) == 1
+
+
+def test_unreadable_cache_file_is_refetched(monkeypatch, cache_file):
+    config.load_parameters(client=_StubSSM())
+    from cryptography.fernet import Fernet
+    monkeypatch.setenv("SSM_CACHE_KEY", Fernet.generate_key().decode())  # rotated key
+    monkeypatch.setattr(config, "_PARAMS", None)
+    ssm = _StubSSM()
+    assert config.load_parameters(client=ssm)["/requesta/RECAPTCHA_SECRET"] == "s3cret"
+    assert len(ssm.calls) == 1
+
+    # another prefix never reads this prefix's file
+    monkeypatch.setattr(config, "_PARAMS", None)
+    other = _StubSSM()
+    config.load_parameters(client=other, prefix="/other/")
+    assert other.calls[0]["Path"] == "/other/"
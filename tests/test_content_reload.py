@@ -0,0 +1,64 @@
+"""Content hot reload: sessions stay on the pack version they were randomized under."""
+
+PUBLISH = """
+    from backend.build_content import archive_path, build_pack, read_header, write_pack
+    from backend.data import ID_EXISTING, PASSAGES, QUESTIONS, VOCAB
+
+    def publish(tag):
+        passages = {k: dict(p, text=p["text"] + tag) for k, p in PASSAGES.items()}
+        data = build_pack(passages, QUESTIONS, VOCAB, ID_EXISTING)
+        version = read_header(data)[0]["version"]
+        write_pack(archive_path("content.pack", version), data)
+        write_pack("content.pack", data)
+        return version
+"""
+
+
+def test_pinned_session_keeps_its_version_across_reloads(run_isolated):
+    out = run_isolated(PUBLISH + """
+    v1 = publish(" [v1]")
+    from fastapi.testclient import TestClient
+    from backend import content
+    from backend.main import app
+    client = TestClient(app)
+
+    def passage_text(sid):
+        pid = client.post("/api/randomize", params={"session_id": sid}).json()["passage_ids"][0]
+        return client.get(f"/api/passage/{pid}", params={"session_id": sid}).json()["text"]
+
+    def new_session():
+        return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+    old = new_session()
+    print("OLD", passage_text(old)[-4:])
+    content.reload()  # same file: no switch
+    v2 = publish(" [v2]")
+    content.reload()
+    print("CURRENT", content.current().version == v2)
+    print("OLD AFTER", passage_text(old)[-4:], "NEW", passage_text(new_session())[-4:])
+
+    for n in range(3, 6):  # more versions than CONTENT_MAX_VERSIONS keeps open
+        publish(f" [v{n}]")
+        content.reload()
+    print("OPEN", len(content._VERSIONS), v1 in content._VERSIONS)
+    print("REOPENED", passage_text(old)[-4:], v1 in content._VERSIONS)
+    """, CONTENT_PACK="content.pack", CONTENT_MAX_VERSIONS="2")
+    assert "OLD [v1]" in out
+    assert "CURRENT True" in out
+    assert "OLD AFTER [v1] NEW [v2]" in out
+    assert "OPEN 2 False" in out
+    assert "REOPENED [v1] True" in out
+
+
+def test_bad_pack_is_refused_and_the_current_one_kept(run_isolated):
+    out = run_isolated(PUBLISH + """
+    v1 = publish("")
+    from backend import content
+    with open("broken.pack", "wb") as f:
+        f.write(b"not a pack")
+    try:
+        content.reload("broken.pack")
+    except ValueError:
+        print("REFUSED", content.current().version == v1)
+    """, CONTENT_PACK="content.pack")
+    assert "REFUSED True" in out
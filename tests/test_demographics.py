@@ -0,0 +1,40 @@
+"""/api/demographics: check order and the recorded reCAPTCHA verdict (RECAPTCHA_MODE=off passes)."""
+import uuid
+
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _session() -> str:
+    return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+
+def _verdict(sid: str):
+    return (storage._get(storage._pk(sid), storage._sk("PROFILE")) or {}).get("recaptcha_demographics")
+
+
+def test_unknown_session_is_404_even_with_a_malformed_payload():
+    r = client.post("/api/demographics", params={"session_id": "nope"}, json={"extras": "not an object"})
+    assert r.status_code == 404
+
+
+def test_verdict_is_recorded_when_the_prolific_id_is_a_duplicate():
+    pid = f"dup-{uuid.uuid4().hex}"
+    first = _session()
+    assert client.post("/api/demographics", params={"session_id": first}, json={"prolific_id": pid}).status_code == 200
+    second = _session()
+    r = client.post("/api/demographics", params={"session_id": second}, json={"prolific_id": pid})
+    assert r.status_code == 409
+    assert _verdict(second) == "yes"
+
+
+def test_verdict_is_recorded_when_the_payload_is_malformed():
+    sid = _session()
+    r = client.post("/api/demographics", params={"session_id": sid}, json={"extras": "not an object"})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["extras"]
+    assert _verdict(sid) == "yes"
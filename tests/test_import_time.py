@@ -0,0 +1,43 @@
+"""Import cost of the app on the SQLite backend (fresh interpreter each run)."""
+import os
+
+# generous: catches the Aurora stack (or another heavy dependency) creeping back into the import path
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS") or 3000)
+
+IMPORT_MAIN = """
+    import sys, time
+    started = time.perf_counter()
+    import backend.main
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    from backend import config
+    heavy = sorted(m for m in ("sqlalchemy", "boto3", "botocore", "backend.database", "backend.models")
+                   if m in sys.modules)
+    if config._PARAMS is not None:
+        heavy.append("ssm-lookup")
+    print("IMPORT", round(elapsed_ms, 1), ",".join(heavy))
+"""
+
+# SSM on, as in production, so an import-time lookup shows up; a dead local endpoint keeps it off the network
+SSM_ON = {"SSM_ENABLED": "1", "SSM_ENDPOINT_URL": "http://127.0.0.1:9", "AWS_REGION": "us-west-2"}
+
+
+def _import_main(run_isolated, **env):
+    line = next(l for l in run_isolated(IMPORT_MAIN, **SSM_ON, **env).splitlines() if l.startswith("IMPORT"))
+    _, ms, *heavy = line.split(" ")
+    return float(ms), [m for part in heavy for m in part.split(",") if m]
+
+
+def test_sqlite_worker_skips_the_aurora_stack_and_ssm(run_isolated):
+    times = []
+    for _ in range(3):
+        ms, heavy = _import_main(run_isolated)
+        assert heavy == []
+        times.append(ms)
+    print(f"import backend.main: best {min(times):.0f} ms of {len(times)}")
+    assert min(times) < BUDGET_MS
+
+
+def test_sqlite_worker_imports_without_aurora_or_secret_config(run_isolated):
+    _, heavy = _import_main(run_isolated, DATABASE_URL="", DB_USER="", DB_HOST="",
+                            RECAPTCHA_MODE="", RECAPTCHA_SECRET="", SESSION_TOKEN_KEYS="")
+    assert heavy == []
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _session() -> str:
+    return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+
+def test_bad_events_are_reported_per_item_and_the_rest_applied():
+    sid = _session()
+    rc = {"kind": "rc", "passage_id": "p1", "page_name": "p1", "status": "active",
+          "start_time": 1_700_000_000_000, "duration_ms": 1500}
+    events = [
+        {"kind": "attention", "bucket": "consent", "elapsed_ms": 400},
+        {"kind": "attention", "bucket": "no_such_bucket", "elapsed_ms": 100},
+        {"kind": "attention", "bucket": "consent", "elapsed_ms": "lots"},
+        {"kind": "weather"},
+        "not an object",
+        {**rc, "status": "sleeping"},
+        {**rc, "start_time": 10 ** 20},
+        rc,
+        {"kind": "attention", "bucket": "consent", "elapsed_ms": 600},
+    ]
+    r = client.post("/api/log/batch", json={"session_id": sid, "events": events})
+    assert r.status_code == 200
+    body = r.json()
+    assert [res["ok"] for res in body["results"]] == [True, False, False, False, False, False, False, True, True]
+    assert body["ok"] is False
+    assert "bucket" in body["results"][1]["error"]
+
+    storage.flush()
+    assert storage.get_task_time(sid)["consent"] == 1000
+
+
+def test_unknown_session_is_still_rejected_as_a_whole():
+    r = client.post("/api/log/batch", json={"session_id": "nope", "events": []})
+    assert r.status_code == 404
@@ -0,0 +1,87 @@
+"""RC debouncer: cold-session loads run outside the shared lock and merge queued writes."""
+import threading
+
+from backend.storage import _RCDebouncer, _rc_overlay
+
+
+def _beacon(start, duration=1000, status="active", passage="p1", page="p1"):
+    return {"passage_id": passage, "page_name": page, "status": status, "start_time": start, "duration_ms": duration}
+
+
+def _seg(start, duration=1000, status="active", passage="p1", page="p1"):
+    return dict(_beacon(start, duration, status, passage, page), session_id="s", server_ts=0)
+
+
+def test_a_slow_load_does_not_block_other_sessions():
+    release, loads = threading.Event(), []
+
+    def load(session_id):
+        loads.append(session_id)
+        if session_id == "cold":
+            assert release.wait(5)
+        return [], {}
+
+    deb = _RCDebouncer(load, save=lambda rec: None, delete=lambda rec: None, max_sessions=10)
+    deb.log("warm", _beacon(1000))
+    cold = [threading.Thread(target=deb.log, args=("cold", _beacon(1000))) for _ in range(3)]
+    for t in cold:
+        t.start()
+    # the cold session is mid-load; the warm one still gets through
+    assert deb.log("warm", _beacon(5000))["start_time"] == 5000
+    release.set()
+    for t in cold:
+        t.join(5)
+    assert loads.count("cold") == 1  # concurrent misses wait for the one load
+
+
+def test_overlay_applies_queued_ops_over_the_store():
+    stored = [_seg(1000), _seg(3000, 100, "blur", page="unknown")]
+    by_passage = {"p1": (True, []), "p2": (False, [_seg(5000, 100, "blur", "p2", "unknown")])}
+    queued = [
+        (False, _seg(3000, 700, "blur", page="unknown")),        # merge update of a stored segment
+        (True, _seg(5000, 100, "blur", "p2", "unknown")),        # dropped spurious blur
+        (False, _seg(9000, 500, "blur", "p3", "unknown")),       # new segment, not stored yet
+    ]
+    recent, passages = _rc_overlay(stored, by_passage, queued)
+    assert [(e["start_time"], e["duration_ms"]) for e in recent] == [(1000, 1000), (3000, 700), (9000, 500)]
+    assert passages["p2"] == (False, [])
+    assert passages["p3"][0] is False and [e["start_time"] for e in passages["p3"][1]] == [9000]
+
+
+def test_sqlite_miss_merges_queued_segments_without_flushing(run_isolated):
+    out = run_isolated("""
+        import sqlite3
+        from backend import storage
+        for sid in ("s1", "s2"):
+            storage.start_session(sid)
+        beacon = {"passage_id": "p1", "page_name": "p1", "status": "active", "duration_ms": 1000}
+        storage.log_reading_comprehension_details("s1", {**beacon, "start_time": 10_000})
+        storage.log_reading_comprehension_details("s2", {**beacon, "start_time": 10_000})  # evicts s1
+        # s1 is reloaded; its queued segment is still the merge target
+        merged = storage.log_reading_comprehension_details("s1", {**beacon, "start_time": 11_100})
+        print("MERGED", merged["duration_ms"], storage._WRITER.stats()["flushes"])
+        storage.flush()
+        print("ROWS", sqlite3.connect("study.db").execute(
+            "SELECT count(*), max(duration_ms) FROM rc_events WHERE pk='s1'").fetchone())
+    """, SQLITE_WRITE_BEHIND="1", SQLITE_FLUSH_MS="600000", SQLITE_RC_CACHE_SESSIONS="1")
+    assert "MERGED 2100 0" in out
+    assert "ROWS (1, 2100)" in out
+
+
+def test_aurora_miss_merges_queued_segments_without_flushing(run_isolated):
+    out = run_isolated("""
+        import sqlite3
+        from backend import storage
+        for sid in ("s1", "s2"):
+            storage.start_session(sid)
+        beacon = {"passage_id": "p1", "page_name": "p1", "status": "active", "duration_ms": 1000}
+        storage.log_reading_comprehension_details("s1", {**beacon, "start_time": 10_000})
+        storage.log_reading_comprehension_details("s2", {**beacon, "start_time": 10_000})
+        merged = storage.log_reading_comprehension_details("s1", {**beacon, "start_time": 11_100})
+        print("MERGED", merged["duration_ms"], storage._RC_WRITER.stats()["flushes"])
+        storage.flush()
+        print("ROWS", sqlite3.connect("aurora.db").execute(
+            "SELECT count(*), max(duration_ms) FROM rc_events WHERE session_id='s1'").fetchone())
+    """, STORAGE_BACKEND="aurora", RC_FLUSH_MS="600000", RC_CACHE_SESSIONS="1")
+    assert "MERGED 2100 0" in out
+    assert "ROWS (1, 2100)" in out
@@ -0,0 +1,65 @@
+"""Aurora RC ingestion (run against a SQLite URL in a fresh interpreter)."""
+
+LEGACY_DB = """
+import sqlite3, sys
+db = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "aurora.db")
+db.execute('''CREATE TABLE rc_events (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id VARCHAR(64),
+              passage_id VARCHAR(64), page_name VARCHAR(128), status VARCHAR(6), start_time BIGINT,
+              duration_ms INTEGER, server_ts DATETIME)''')
+# one segment stored three times by merges that found no unique key to update
+for ms in (1000, 2000, 3000):
+    db.execute("INSERT INTO rc_events (session_id, passage_id, page_name, status, start_time, duration_ms) "
+               "VALUES ('s-old', 'p1', 'p1', 'active', 5000, ?)", (ms,))
+db.commit()
+"""
+
+
+def test_init_db_adds_the_missing_segment_key(run_isolated):
+    run_isolated(LEGACY_DB)
+    out = run_isolated("""
+        import sqlite3
+        from backend import storage
+        from backend.models import RCEvent
+        db = sqlite3.connect("aurora.db")
+        print(db.execute("SELECT count(*), max(duration_ms) FROM rc_events").fetchone())
+
+        storage.start_session("s1")
+        for start in (10_000, 11_100):  # second beacon merges into the first segment
+            storage.log_reading_comprehension_details(
+                "s1", {"passage_id": "p1", "page_name": "p1", "status": "active", "start_time": start, "duration_ms": 1000})
+            storage.flush()
+        print(db.execute("SELECT count(*), max(duration_ms) FROM rc_events WHERE session_id='s1'").fetchone())
+    """, STORAGE_BACKEND="aurora")
+    lines = out.strip().splitlines()
+    assert lines[-2] == "(1, 3000)"   # duplicates collapsed to the latest merged state
+    assert lines[-1] == "(1, 2100)"   # the merge updated the row in place
+
+
+def test_unstorable_beacons_do_not_stop_rc_persistence(run_isolated):
+    out = run_isolated("""
+        import sqlite3
+        from backend import storage
+        storage.start_session("s1")
+        ok = {"passage_id": "p1", "page_name": "p1", "status": "active", "duration_ms": 1000}
+        for bad in ({"start_time": 10 ** 20}, {"start_time": 1, "page_name": "x" * 129},
+                    {"start_time": 1, "passage_id": "p" * 65}):
+            try:
+                storage.log_reading_comprehension_details("s1", {**ok, **bad})
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"accepted {bad}")
+
+        # a row the database rejects anyway is dropped, and the rows queued with it still land
+        storage._RC_WRITER.put(("rc", "bad"), ("save", {"session_id": "s1", "passage_id": "p1", "page_name": "p1",
+                                                        "status": "active", "start_time": 10 ** 20, "duration_ms": 1}))
+        storage.log_reading_comprehension_details("s1", {**ok, "start_time": 20_000})
+        storage.log_reading_comprehension_details("s1", {**ok, "start_time": 90_000})
+        storage.flush()
+        print(sqlite3.connect("aurora.db").execute("SELECT count(*) FROM rc_events").fetchone()[0])
+        st = storage.stats()["rc_buffer"]
+        print(st["dropped"], st["pending"])
+    """, STORAGE_BACKEND="aurora")
+    count, stats = out.strip().splitlines()[-2:]
+    assert count == "2"
+    assert stats == "1 0"
@@ -0,0 +1,54 @@
+"""SQLite RC segments live in rc_events; memory holds only a bounded per-session tail."""
+
+SETUP = """
+    import sqlite3
+    from backend import storage
+
+    def log(sid, start, duration, status="active", passage="p1", page="p1"):
+        return storage.log_reading_comprehension_details(sid, {
+            "passage_id": passage, "page_name": page, "status": status,
+            "start_time": start, "duration_ms": duration})
+
+    def rows(sid):
+        storage.flush()
+        return sqlite3.connect("study.db").execute(
+            "SELECT start_time, status, page_name, duration_ms FROM rc_events WHERE pk=? ORDER BY start_time",
+            (sid,)).fetchall()
+"""
+
+
+def test_segments_are_stored_merged_and_reloaded_after_a_restart(run_isolated):
+    out = run_isolated(SETUP + """
+    storage.start_session("s1")
+    log("s1", 1000, 1000)
+    print("MERGED", log("s1", 2100, 500)["duration_ms"])      # 100ms gap: same segment
+    print("FLUTTER", log("s1", 2700, 30).get("suppressed"))   # under the minimum segment length
+    log("s1", 5000, 800, status="blur")
+    print("ROWS", rows("s1"))
+    """)
+    assert "MERGED 1600" in out
+    assert "FLUTTER True" in out
+    assert "ROWS [(1000, 'active', 'p1', 1600), (5000, 'blur', 'p1', 800)]" in out
+
+    # a new process rebuilds the session's state from the table
+    out = run_isolated(SETUP + """
+    print("MERGED", log("s1", 6000, 400, status="blur")["duration_ms"])
+    # p1 is known to be active, so a short unknown-page blur is kept, as before the restart
+    print("KEPT", "suppressed" not in log("s1", 20000, 100, status="blur", page="unknown"))
+    print("NEW PASSAGE", log("s1", 30000, 100, status="blur", passage="p2", page="unknown").get("suppressed"))
+    print("ROWS", rows("s1"))
+    """)
+    assert "MERGED 1400" in out  # 800 + 200ms gap + 400
+    assert "KEPT True" in out
+    assert "NEW PASSAGE True" in out
+    assert "ROWS [(1000, 'active', 'p1', 1600), (5000, 'blur', 'p1', 1400), (20000, 'blur', 'unknown', 100)]" in out
+
+
+def test_memory_holds_a_bounded_number_of_sessions(run_isolated):
+    out = run_isolated(SETUP + """
+    for n in range(5):
+        storage.start_session(f"s{n}")
+        log(f"s{n}", 1000, 1000)
+    print("CACHED", storage._RC.sessions(), "STORED", sum(len(rows(f"s{n}")) for n in range(5)))
+    """, SQLITE_RC_CACHE_SESSIONS="2")
+    assert "CACHED 2 STORED 5" in out
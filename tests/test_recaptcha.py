@@ -0,0 +1,145 @@
+"""reCAPTCHA verification against a local stand-in for Google's siteverify endpoint."""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from backend import recaptcha
+
+
+class _Verifier:
+    """Single-use tokens like the real one; `latency_s` and `fail` are set per test."""
+
+    def __init__(self):
+        self.latency_s = 0.0
+        self.fail = False
+        self.calls = 0
+        self.used = set()
+
+    def answer(self, token: str):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        if self.fail:
+            return 500, {}
+        if token in self.used:
+            return 200, {"success": False, "error-codes": ["timeout-or-duplicate"]}
+        self.used.add(token)
+        return 200, {"success": token != "bad", "hostname": "localhost"}
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    state = _Verifier()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+            status, body = state.answer(form["response"][0])
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(recaptcha, "VERIFY_URL", f"http://127.0.0.1:{server.server_port}/siteverify")
+    monkeypatch.setattr(recaptcha, "RECAPTCHA_SECRET", "test-secret")
+    monkeypatch.setattr(recaptcha, "RECAPTCHA_MODE", "auto")
+    monkeypatch.setattr(recaptcha, "DEV_BYPASS_RECAPTCHA", False)
+    monkeypatch.setattr(recaptcha, "READ_TIMEOUT_S", 0.5)
+    monkeypatch.setattr(recaptcha, "SLOW_MS", 100)
+    monkeypatch.setattr(recaptcha, "BREAKER_FAILURES", 2)
+    monkeypatch.setattr(recaptcha, "BREAKER_OPEN_S", 0.2)
+    monkeypatch.setattr(recaptcha, "_CLIENT", None)
+    monkeypatch.setattr(recaptcha, "_BREAKER", {"failures": 0, "open_until": 0.0})
+    monkeypatch.setattr(recaptcha, "_STATS", dict.fromkeys(recaptcha._STATS, 0))
+    monkeypatch.setattr(recaptcha, "_VERDICTS", OrderedDict())
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _verify_all(*calls):
+    """Run verify() for each (token, session_id, endpoint) on one loop; the pooled client is per loop."""
+    async def run():
+        try:
+            out = []
+            for call in calls:
+                if call == "pause":
+                    await asyncio.sleep(recaptcha.BREAKER_OPEN_S + 0.05)
+                else:
+                    token, sid, endpoint = call
+                    out.append(await recaptcha.verify(token, None, sid, endpoint))
+            return out
+        finally:
+            await recaptcha.shutdown()
+    return asyncio.run(run())
+
+
+def test_retry_hits_the_cache(verifier):
+    assert _verify_all(("t1", "s1", "demographics"), ("t1", "s1", "demographics")) == [True, True]
+    assert verifier.calls == 1
+    assert recaptcha.stats()["cache_hits"] == 1
+
+
+def test_cached_pass_does_not_carry_over_to_other_sessions_or_endpoints(verifier):
+    results = _verify_all(("t1", "s1", "demographics"), ("t1", "s2", "demographics"),
+                          ("t1", "s1", "final_check"))
+    assert results == [True, False, False]  # the verifier sees (and rejects) each reuse
+    assert verifier.calls == 3
+
+
+def test_failed_verdicts_are_cached_too(verifier):
+    assert _verify_all(("bad", "s1", "demographics"), ("bad", "s1", "demographics")) == [False, False]
+    assert verifier.calls == 1
+
+
+def test_breaker_opens_trials_and_recovers(verifier):
+    verifier.fail = True
+    assert _verify_all(("a", "s", "e"), ("b", "s", "e"), ("c", "s", "e")) == [True, True, True]
+    assert verifier.calls == 2  # the third call is short-circuited
+    assert recaptcha.stats()["breaker_open"] and recaptcha.stats()["short_circuited"] == 1
+
+    # a failed trial reopens the breaker at once
+    _verify_all("pause", ("d", "s", "e"), ("e", "s", "e"))
+    assert verifier.calls == 3
+    assert recaptcha.stats()["breaker_open"]
+
+    # a successful trial closes it
+    verifier.fail = False
+    assert _verify_all("pause", ("f", "s", "e"), ("g", "s", "e")) == [True, True]
+    assert verifier.calls == 5
+    stats = recaptcha.stats()
+    assert not stats["breaker_open"] and stats["consecutive_failures"] == 0
+
+
+def test_slow_answers_count_towards_the_breaker(verifier):
+    verifier.latency_s = 0.15  # over SLOW_MS, under the read timeout: the verdict is still used
+    assert _verify_all(("bad", "s", "e"), ("t2", "s", "e")) == [False, True]
+    stats = recaptcha.stats()
+    assert stats["slow"] == 2 and stats["breaker_open"]
+
+
+@pytest.mark.parametrize("mode, expected", [("required", False), ("auto", True)])
+@pytest.mark.parametrize("outage", ["error", "timeout"])
+def test_degraded_verdict_depends_on_mode(verifier, monkeypatch, mode, outage, expected):
+    monkeypatch.setattr(recaptcha, "RECAPTCHA_MODE", mode)
+    if outage == "error":
+        verifier.fail = True
+    else:
+        verifier.latency_s = recaptcha.READ_TIMEOUT_S + 0.2
+    # two verifier failures, then one short-circuited call while the breaker is open
+    assert _verify_all(("a", "s", "e"), ("b", "s", "e"), ("c", "s", "e")) == [expected] * 3
+    assert recaptcha.stats()["degraded"] == 3
+    assert not recaptcha._VERDICTS  # outages are never cached
@@ -0,0 +1,77 @@
+"""Returning participants: prior-study IDs in the content pack plus the stored known-participants index."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import content
+from backend.build_content import build_pack
+from backend.content import ContentPack
+from backend.data import ID_EXISTING, PASSAGES, QUESTIONS, VOCAB
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _session() -> str:
+    return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+
+def _returning(pid, session_id=None) -> bool:
+    params = {"prolific_id": pid}
+    if session_id:
+        params["session_id"] = session_id
+    return client.get("/api/check_prolific", params=params).json()["returning"]
+
+
+def test_pack_lookup_matches_exactly_the_listed_ids():
+    pack = ContentPack(build_pack(PASSAGES, QUESTIONS, VOCAB, ["AAA", " bbb ", "cc", "zz9", ""]), "test")
+    assert all(pack.has_prolific_id(pid) for pid in ("aaa", "bbb", "cc", "zz9"))
+    # prefixes, extensions and IDs wider than the fixed record width are not matches
+    assert not any(pack.has_prolific_id(pid) for pid in ("", "a", "aaaa", "c", "zz", "zz90", "0"))
+
+
+def test_pack_ids_are_matched_case_insensitively():
+    pid = sorted(ID_EXISTING)[0]
+    assert content.is_returning_prolific(f"  {pid.upper()} ")
+    assert _returning(pid.upper())
+    assert not content.is_returning_prolific(None) and not content.is_returning_prolific("   ")
+
+
+def test_stored_ids_block_other_sessions_but_not_their_owner():
+    pid = f"New-{uuid.uuid4().hex}"
+    owner = _session()
+    assert not _returning(pid)
+    assert client.post("/api/demographics", params={"session_id": owner}, json={"prolific_id": pid}).status_code == 200
+    assert not _returning(pid, owner)
+    assert _returning(pid.lower(), _session()) and _returning(pid.upper())
+    # the owner may resubmit their own form
+    assert client.post("/api/demographics", params={"session_id": owner}, json={"prolific_id": pid}).status_code == 200
+
+
+DB_FILE = {"sqlite": "study.db", "aurora": "aurora.db"}
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "aurora"])
+def test_owner_survives_a_restart_and_the_index_is_backfilled(run_isolated, backend):
+    run_isolated("""
+        from backend import storage
+        for sid in ("s1", "s2"):
+            storage.start_session(sid)
+        storage.save_demographics("s1", {"prolific_id": " PID-1 "})
+        storage.save_demographics("s2", {"prolific_id": "pid-1"})  # the first session keeps the ID
+        storage.flush()
+    """, STORAGE_BACKEND=backend)
+    check = """
+        from backend import storage
+        print("OWNER", storage.prolific_id_owner("Pid-1"), storage.prolific_id_owner("pid-2"))
+    """
+    assert "OWNER s1 None" in run_isolated(check, STORAGE_BACKEND=backend)
+
+    run_isolated(f"""
+        import sqlite3
+        with sqlite3.connect({DB_FILE[backend]!r}) as conn:
+            conn.execute("DELETE FROM known_participants")
+    """)
+    # an empty index is rebuilt from the stored demographics on startup
+    assert "OWNER s1 None" in run_isolated(check, STORAGE_BACKEND=backend)
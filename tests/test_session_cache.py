@@ -0,0 +1,68 @@
+"""session_exists cache: positive LRU with a TTL, short-lived negative entries."""
+import time
+
+import pytest
+
+from backend.storage import _SessionCache
+
+
+def _cache(**kw):
+    opts = dict(max_size=2, ttl_s=60, neg_max_size=2, neg_ttl_s=60)
+    opts.update(kw)
+    return _SessionCache(**opts)
+
+
+def test_hits_misses_and_negative_entries():
+    c = _cache()
+    assert c.lookup("a") is None
+    c.remember("a", True)
+    c.remember("x", False)
+    assert c.lookup("a") is True and c.lookup("x") is False
+    assert c.stats() == {"hits": 1, "negative_hits": 1, "misses": 1, "size": 1, "negative_size": 1}
+
+
+def test_starting_a_session_clears_its_negative_entry():
+    c = _cache()
+    c.remember("a", False)
+    c.remember("a", True)
+    assert c.lookup("a") is True
+    assert c.stats()["negative_size"] == 0
+
+
+def test_entries_expire():
+    c = _cache(ttl_s=0.05, neg_ttl_s=0.05)
+    c.remember("a", True)
+    c.remember("x", False)
+    time.sleep(0.1)
+    assert c.lookup("a") is None and c.lookup("x") is None
+    assert c.stats()["size"] == 0 and c.stats()["negative_size"] == 0
+
+
+def test_size_is_bounded_least_recently_used_first():
+    c = _cache()
+    for sid in ("a", "b"):
+        c.remember(sid, True)
+    c.lookup("a")               # b is now the oldest
+    c.remember("c", True)
+    assert c.lookup("b") is None and c.lookup("a") is True and c.lookup("c") is True
+
+
+def test_zero_ttl_disables_caching():
+    c = _cache(ttl_s=0, neg_ttl_s=0)
+    c.remember("a", True)
+    c.remember("x", False)
+    assert c.lookup("a") is None and c.lookup("x") is None
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "aurora"])
+def test_session_exists_goes_to_the_database_once(run_isolated, backend):
+    out = run_isolated("""
+        from backend import storage
+        checks = [storage.session_exists("nope"), storage.session_exists("nope")]
+        storage.start_session("s1")
+        checks += [storage.session_exists("s1"), storage.session_exists("s1")]
+        st = storage.stats()["session_cache"]
+        print("CHECKS", checks, "MISSES", st["misses"], "HITS", st["hits"], st["negative_hits"])
+    """, STORAGE_BACKEND=backend)
+    # one miss for the unknown id; the started session is known without a lookup
+    assert "CHECKS [False, False, True, True] MISSES 1 HITS 2 1" in out
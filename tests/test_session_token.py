@@ -0,0 +1,52 @@
+"""Signed session tokens: tampered tokens are rejected and the routes fall back to storage."""
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import security
+from backend.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    keys = security._parse_keys("k1:test-secret")
+    monkeypatch.setattr(security, "_KEY_RING", (keys, dict(keys)))
+
+
+def test_round_trip():
+    token = security.issue_session_token("sid-1")
+    assert security.verify_session_token(token)["sid"] == "sid-1"
+
+
+@pytest.mark.parametrize("sig", ["é", "ÿ" * 43, "中", ""])
+def test_tampered_signature_is_rejected(sig):
+    kid, payload, _ = security.issue_session_token("sid-1").split(".")
+    assert security.verify_session_token(f"{kid}.{payload}.{sig}") is None
+
+
+def test_non_ascii_payload_is_rejected():
+    kid, _, sig = security.issue_session_token("sid-1").split(".")
+    assert security.verify_session_token(f"{kid}.é.{sig}") is None
+
+
+def test_route_falls_back_to_storage_on_a_non_ascii_signature():
+    start = client.post("/api/session/start", json={"consent": True}).json()
+    sid = start["session_id"]
+    pid = client.post("/api/randomize", params={"session_id": sid}).json()["passage_ids"][0]
+    kid, payload, _ = start["token"].split(".")
+    # latin-1 bytes on the wire, as a tampering client would send them
+    headers = {"X-Session-Token": f"{kid}.{payload}.é".encode("latin-1")}
+    assert client.get(f"/api/passage/{pid}", params={"session_id": sid}, headers=headers).status_code == 200
+    assert client.get(f"/api/passage/{pid}", params={"session_id": "nope"}, headers=headers).status_code == 404
+
+
+def test_key_ring_is_resolved_on_first_use(run_isolated):
+    out = run_isolated("""
+        from backend import config, security
+        print("AT IMPORT", security._KEY_RING is None, config._PARAMS is None)
+        token = security.issue_session_token("sid-1")
+        print("AFTER USE", security.verify_session_token(token)["sid"])
+    """, SESSION_TOKEN_KEYS="k1:test-secret")
+    assert "AT IMPORT True True" in out
+    assert "AFTER USE sid-1" in out
@@ -0,0 +1,19 @@
+"""A short question set blocks the build only when it could be assigned."""
+from backend.data import PASSAGES, QUESTIONS, VOCAB
+from backend.validators import validate_content
+
+
+def _short(messages):
+    return [m for m in messages if "need ≥ 6" in m]
+
+
+def test_short_set_on_unassigned_passage_is_a_warning():
+    report = validate_content(PASSAGES, QUESTIONS, VOCAB)
+    assert report["errors"] == []
+    assert _short(report["warnings"])
+
+
+def test_short_set_is_an_error_when_it_could_be_assigned():
+    keep = [k for k in QUESTIONS if k != "p5"][:2] + ["p5"]
+    report = validate_content({k: PASSAGES[k] for k in keep}, {k: QUESTIONS[k] for k in keep}, VOCAB)
+    assert _short(report["errors"])
@@ -0,0 +1,119 @@
+"""Vocabulary task: routes and the progress shared by every worker."""
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import content, main, storage
+from backend.main import app
+from backend.storage import _VocabProgressCache
+
+client = TestClient(app)
+
+
+def _session() -> str:
+    return client.post("/api/session/start", json={"consent": True}).json()["session_id"]
+
+
+def test_items_without_ids_are_served_without_touching_the_pack(monkeypatch):
+    pack = content.current()
+    items = [{"token": "blick", "is_word": False}, {"token": "house", "is_word": True}]
+    monkeypatch.setattr(pack, "_vocab", items)
+    monkeypatch.setattr(pack, "_vocab_deck", None)
+    monkeypatch.setattr(pack, "_vocab_key", None)
+
+    sid = _session()
+    client.post("/api/vocab/start", params={"session_id": sid})
+    assert client.get("/api/vocab/next", params={"session_id": sid}).json()["item"] == {"id": "v0", "token": "blick"}
+    assert items == [{"token": "blick", "is_word": False}, {"token": "house", "is_word": True}]
+
+    r = client.post("/api/vocab/answer", json={"session_id": sid, "item_id": "v0", "is_word": False, "rt_ms": 500})
+    assert r.json() == {"ok": True, "correct": True}
+    assert client.get("/api/vocab/next", params={"session_id": sid}).json()["item"] == {"id": "v1", "token": "house"}
+
+
+ANSWERS = {
+    "sqlite": ("study.db", "SELECT item_id, position, rt_ms FROM vocab_answers WHERE pk='s1' ORDER BY position"),
+    "aurora": ("aurora.db", "SELECT item_id, position, rt_ms FROM vocab_answers WHERE session_id='s1' ORDER BY position"),
+}
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "aurora"])
+def test_progress_is_shared_and_a_retried_answer_counts_once(run_isolated, backend):
+    db, answers = ANSWERS[backend]
+    out = run_isolated(f"""
+        import sqlite3
+        from backend import storage
+        storage.start_session("s1")
+        storage.init_vocab("s1", 5)
+        for item, rt in (("v0", 400), ("v1", 500), ("v1", 900), ("v2", 600)):  # v1 is a retried click
+            last = storage.advance_vocab("s1", item, True, rt, True)
+        print("PROGRESS", last, storage.get_vocab_progress("s1"))
+        print("ANSWERS", sqlite3.connect({db!r}).execute({answers!r}).fetchall())
+    """, STORAGE_BACKEND=backend)
+    assert "PROGRESS {'index': 3, 'size': 5} {'index': 3, 'size': 5}" in out
+    assert "ANSWERS [('v0', 0, 400), ('v1', 1, 500), ('v2', 2, 600)]" in out
+
+    # another worker (here: a later process) serves from the same index; a restart clears it
+    out = run_isolated(f"""
+        import sqlite3
+        from backend import storage
+        print("OTHER", storage.get_vocab_progress("s1"))
+        storage.init_vocab("s1", 4)
+        print("RESTARTED", storage.get_vocab_progress("s1"),
+              sqlite3.connect({db!r}).execute({answers!r}).fetchall())
+    """, STORAGE_BACKEND=backend)
+    assert "OTHER {'index': 3, 'size': 5}" in out
+    assert "RESTARTED {'index': 0, 'size': 4} []" in out
+
+
+def test_progress_cache_is_off_unless_configured():
+    off = _VocabProgressCache(max_size=2, ttl_s=0)
+    off.remember("s1", 1, 5)
+    assert off.lookup("s1") is None
+
+    on = _VocabProgressCache(max_size=2, ttl_s=60)
+    for sid in ("s1", "s2", "s3"):
+        on.remember(sid, 1, 5)
+    assert on.lookup("s1") is None and on.lookup("s3") == {"index": 1, "size": 5}
+    on.forget("s3")
+    assert on.lookup("s3") is None
+    assert on.stats() == {"hits": 1, "misses": 2, "size": 1}
+
+
+def test_deck_mode_hands_out_the_deck_without_the_answers():
+    sid = _session()
+    body = client.post("/api/vocab/start", params={"session_id": sid, "deck": "true"}).json()
+    assert body["size"] == len(body["items"]) == len(content.current().vocab())
+    assert all(set(it) == {"id", "token"} for it in body["items"])
+
+
+def test_shuffled_deck_order_is_stable_per_session(monkeypatch):
+    monkeypatch.setattr(main, "VOCAB_SHUFFLE", True)
+    deck = [it["id"] for it in content.current().vocab_deck()]
+
+    def order(sid):
+        return [it["id"] for it in client.post("/api/vocab/start", params={"session_id": sid, "deck": "true"}).json()["items"]]
+
+    orders = {sid: order(sid) for sid in (_session() for _ in range(3))}
+    assert all(order(sid) == ids for sid, ids in orders.items())  # a page reload gets the same order
+    assert all(sorted(ids) == sorted(deck) for ids in orders.values())
+    assert any(ids != deck for ids in orders.values())
+
+
+def test_deck_answers_are_scored_server_side_once():
+    sid = _session()
+    client.post("/api/vocab/start", params={"session_id": sid, "deck": "true"})
+    key = content.current().vocab_key()
+    first, second, third = list(key)[:3]
+    answers = [
+        {"item_id": first, "is_word": key[first], "rt_ms": 400},
+        {"item_id": second, "is_word": not key[second], "rt_ms": 500},
+        {"item_id": first, "is_word": not key[first], "rt_ms": 900},  # repeat: the first answer counts
+        {"item_id": third, "is_word": key[third]},
+    ]
+    for _ in range(2):  # a retried submit changes nothing
+        r = client.post("/api/vocab/submit", json={"session_id": sid, "answers": answers})
+        assert r.json() == {"ok": True, "completed": 3, "correct": 2}
+        assert storage.get_vocab_progress(sid)["index"] == 3
+
+    r = client.post("/api/vocab/submit", json={"session_id": sid, "answers": [{"item_id": "nope", "is_word": True}]})
+    assert r.status_code == 400
@@ -0,0 +1,69 @@
+import threading
+
+from backend.storage import _WriteBehind
+
+
+class _Store:
+    """Stand-in for _apply_batch: all-or-nothing batches, rejects rows whose op is "bad"."""
+
+    def __init__(self, error=ValueError):
+        self.rows = {}
+        self.error = error
+        self.down = False
+
+    def write(self, items):
+        if self.down:
+            raise ConnectionError("store unavailable")
+        if any(op == "bad" for _, op in items):
+            raise self.error("rejected")
+        self.rows.update(items)
+
+
+def _writer(store, **kw):
+    return _WriteBehind("test", store.write, io_lock=threading.RLock(),
+                        bad_row=lambda e: not isinstance(e, ConnectionError), **kw)
+
+
+def test_bad_row_is_dropped_and_the_rest_committed():
+    store = _Store(error=OverflowError)
+    wb = _writer(store)
+    wb.put("a", 1)
+    wb.put("poison", "bad")
+    wb.put("b", 2)
+
+    assert wb.flush() == 2
+    assert store.rows == {"a": 1, "b": 2}
+    stats = wb.stats()
+    assert stats["dropped"] == 1 and stats["errors"] == 1 and stats["pending"] == 0
+
+    # later writes are not held up by the rejected row
+    wb.put("c", 3)
+    assert wb.flush() == 1
+    assert store.rows["c"] == 3
+
+
+def test_unavailable_store_keeps_the_batch_queued():
+    store = _Store()
+    wb = _writer(store)
+    wb.put("a", 1)
+    store.down = True
+    try:
+        wb.flush()
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("flush should surface the outage")
+    assert wb.stats()["pending"] == 1 and wb.stats()["dropped"] == 0
+
+    store.down = False
+    assert wb.flush() == 1
+    assert store.rows == {"a": 1}
+
+
+def test_close_does_not_raise_while_the_store_is_down():
+    store = _Store()
+    wb = _writer(store)
+    wb.put("a", 1)
+    store.down = True
+    wb.close()
+    assert wb.stats()["pending"] == 1